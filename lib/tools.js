@@ -1,6 +1,9 @@
 import { MakeExecutor } from './make_executor.js';
 import { FileSystem } from './file_system.js';
 
+// Cap on jules_client.py output passed back into the model's context
+const JULES_MAX_OUTPUT_BYTES = 16384;
+
 /**
  * Tool registry — single source of truth for all tool definitions and executors.
  */
@@ -42,14 +45,14 @@ export class ToolRegistry {
         type: 'function',
         function: {
           name: 'jules',
-          description: 'Interact with the Jules AI agent for complex coding tasks, PR reviews, or repository-wide changes.',
+          description: 'Interact with the Jules AI agent for complex coding tasks, PR reviews, or repository-wide changes. Output is JSON Lines: one record per session, activity, source or output.',
           parameters: {
             type: 'object',
             properties: {
               action: {
                 type: 'string',
-                enum: ['create', 'list-sessions', 'get-session', 'send-message', 'approve-plan', 'list-sources'],
-                description: 'The action to perform with Jules.',
+                enum: ['create', 'list-sessions', 'get-session', 'digest', 'send-message', 'approve-plan', 'list-sources'],
+                description: 'The action to perform with Jules. Prefer digest over get-session to check on a long-running session.',
               },
               prompt: {
                 type: 'string',
@@ -65,7 +68,7 @@ export class ToolRegistry {
               },
               extraArgs: {
                 type: 'string',
-                description: 'Any additional flags or arguments for the jules client.',
+                description: 'Any additional flags or arguments for the jules client (e.g. "--fields id,state,title" to trim each JSON record, "--max-records 20").',
               }
             },
             required: ['action'],
@@ -109,7 +112,8 @@ export class ToolRegistry {
         return `STDOUT: ${result.stdout}\nSTDERR: ${result.stderr}\nExit Code: ${result.exitCode}`;
       }
       case 'jules': {
-        let commandArgs = `${args.action} --plain`;
+        // JSON Lines keeps the result compact; the byte cap ends with a {"type":"truncated"} record.
+        let commandArgs = `${args.action} --plain --format jsonl --max-bytes ${JULES_MAX_OUTPUT_BYTES}`;
         if (args.prompt) commandArgs += ` --prompt "${args.prompt.replace(/"/g, '\\"')}"`;
 
         let repo = args.repo;
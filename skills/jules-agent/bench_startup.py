@@ -0,0 +1,100 @@
+"""Startup-time benchmark for jules_client.py.
+
+Measures the cost the agent pays before any API work on a ``--plain`` call:
+cumulative import time of ``jules_client`` (via ``python -X importtime``) and
+wall-clock time of a full CLI invocation that exits right after argument
+parsing. Exits non-zero when the median exceeds the budget, or when the plain
+path pulls in rich. ``--no-timing`` runs only the rich check, which does not
+depend on machine load (npm test uses it; ``make jules-bench-startup`` keeps
+the timing budgets).
+
+Usage:
+    python bench_startup.py [--runs 5] [--import-budget-ms 250] [--cli-budget-ms 400] [--no-timing]
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLIENT_PATH = os.path.join(SCRIPT_DIR, "jules_client.py")
+
+
+def import_time_us() -> int:
+    """Returns the cumulative import time of jules_client in microseconds."""
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", "import jules_client"],
+        cwd=SCRIPT_DIR, capture_output=True, text=True, check=True,
+    )
+    # Lines look like: "import time:   self [us] | cumulative | imported package"
+    for line in result.stderr.splitlines():
+        parts = [p.strip() for p in line.split("|")]
+        if len(parts) == 3 and parts[2] == "jules_client":
+            return int(parts[1])
+    raise RuntimeError("jules_client not found in -X importtime output")
+
+
+def cli_time_ms() -> float:
+    """Wall-clock time of a --plain invocation that stops after argument parsing."""
+    start = time.perf_counter()
+    subprocess.run(
+        [sys.executable, CLIENT_PATH, "--plain", "get-session", "--help"],
+        cwd=SCRIPT_DIR, capture_output=True, check=True,
+    )
+    return (time.perf_counter() - start) * 1000
+
+
+def plain_imports_rich() -> bool:
+    """True if parsing a --plain command imports any rich module."""
+    code = (
+        "import sys, jules_client; "
+        "jules_client.build_parser('list-sessions').parse_args(['--plain', 'list-sessions']); "
+        "print(any(m == 'rich' or m.startswith('rich.') for m in sys.modules))"
+    )
+    result = subprocess.run([sys.executable, "-c", code], cwd=SCRIPT_DIR,
+                            capture_output=True, text=True, check=True)
+    return result.stdout.strip() == "True"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jules_client.py startup time")
+    parser.add_argument("--runs", type=int, default=5, help="Number of runs per measurement")
+    parser.add_argument("--import-budget-ms", type=float, default=250, help="Budget for median import time")
+    parser.add_argument("--cli-budget-ms", type=float, default=400, help="Budget for median CLI wall time")
+    parser.add_argument("--no-timing", action="store_true",
+                        help="Only check that --plain does not import rich (no wall-clock budgets)")
+    parser.add_argument("--json", action="store_true", help="Print results as JSON")
+    args = parser.parse_args()
+
+    failures = []
+    results = {}
+    if not args.no_timing:
+        import_ms = statistics.median(import_time_us() / 1000 for _ in range(args.runs))
+        cli_ms = statistics.median(cli_time_ms() for _ in range(args.runs))
+        if import_ms > args.import_budget_ms:
+            failures.append(f"import time {import_ms:.1f}ms exceeds budget {args.import_budget_ms:.0f}ms")
+        if cli_ms > args.cli_budget_ms:
+            failures.append(f"CLI startup {cli_ms:.1f}ms exceeds budget {args.cli_budget_ms:.0f}ms")
+        results.update(import_ms=round(import_ms, 1), cli_ms=round(cli_ms, 1))
+    rich_loaded = plain_imports_rich()
+    if rich_loaded:
+        failures.append("--plain path imports rich")
+    results.update(plain_imports_rich=rich_loaded, failures=failures)
+
+    if args.json:
+        print(json.dumps(results, indent=2))
+    else:
+        if not args.no_timing:
+            print(f"Import time (median of {args.runs}): {import_ms:.1f}ms (budget {args.import_budget_ms:.0f}ms)")
+            print(f"CLI startup (median of {args.runs}): {cli_ms:.1f}ms (budget {args.cli_budget_ms:.0f}ms)")
+        print(f"--plain imports rich: {'yes' if rich_loaded else 'no'}")
+        for failure in failures:
+            print(f"FAIL: {failure}")
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
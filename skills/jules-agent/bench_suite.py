@@ -0,0 +1,287 @@
+"""Throughput and latency benchmarks for jules_client.py and gui_server.py.
+
+Runs everything against ``mock_jules_api.py`` on a free local port, so no
+API key or network is needed and numbers are comparable between runs:
+
+- ``cli``: cold-start wall time of one-shot CLI calls
+- ``calls``: per-call latency of the main client methods
+- ``polling``: requests and time for the first and a steady-state poll tick
+  of sessions with 10, 1k and 10k activities
+- ``gui``: GUI server requests/sec and latency under concurrent clients,
+  with and without its response cache
+- ``bulk``: batch-create and bulk delete throughput
+
+Usage:
+    python bench_suite.py [--quick] [--only cli,polling] [--latency 0.0]
+                          [--output results.json] [--compare baseline.json] [--threshold 0.25]
+
+With ``--compare`` every shared metric is checked against the baseline and the
+run exits non-zero when one is more than ``--threshold`` worse.
+"""
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, Dict, List
+
+SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
+CLIENT_PATH = os.path.join(SCRIPT_DIR, "jules_client.py")
+API_KEY = "bench-key"
+SUITES = ("cli", "calls", "polling", "gui", "bulk")
+# Timing differences below this are scheduler noise on a loopback mock, whatever the ratio
+MIN_REGRESSION_MS = 5.0
+
+
+def percentiles(samples_ms: List[float]) -> Dict[str, float]:
+    ordered = sorted(samples_ms)
+    p95 = ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))]
+    return {"p50_ms": round(statistics.median(ordered), 2), "p95_ms": round(p95, 2)}
+
+
+def timed(fn: Callable[[], Any], runs: int) -> List[float]:
+    samples = []
+    for _ in range(runs):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    return samples
+
+
+def start_in_thread(server):
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+def bench_cli(base_url: str, runs: int) -> Dict[str, Any]:
+    """Wall time of fresh ``--plain`` processes, including imports and the API round trips."""
+    env = dict(os.environ, JULES_API_KEY=API_KEY, JULES_API_BASE_URL=base_url)
+    results = {}
+    for name, args in (("list_sessions", ["list-sessions"]), ("get_session", ["get-session", "--session-id", "1"])):
+        def run():
+            subprocess.run([sys.executable, CLIENT_PATH, "--plain", *args], cwd=SCRIPT_DIR, env=env,
+                           capture_output=True, check=True)
+        results[name] = percentiles(timed(run, runs))
+    return results
+
+
+def bench_calls(client, runs: int) -> Dict[str, Any]:
+    """Per-call latency of single client methods over a warm connection."""
+    calls = {
+        "get_session": lambda: client.get_session("1"),
+        "list_sessions": lambda: client.list_sessions(page_size=30),
+        "list_activities": lambda: client.list_activities("1", page_size=50),
+        "get_source": lambda: client.get_source("github/mock-org/repo0"),
+    }
+    results = {}
+    for name, call in calls.items():
+        call() # Warm the connection
+        results[name] = percentiles(timed(call, runs))
+    return results
+
+
+def bench_polling(client, api, sizes: List[int]) -> Dict[str, Any]:
+    """Cost of the first poll tick (full history) and of a steady-state tick on an unchanged session."""
+    from jules_client import SessionPoller
+
+    results = {}
+    for size in sizes:
+        poller = SessionPoller(client, f"sessions/size-{size}")
+        api.reset_counters()
+        start = time.perf_counter()
+        activities = poller.tick()
+        first_ms = (time.perf_counter() - start) * 1000
+        first_requests = api.requests
+        if len(activities) != size:
+            raise RuntimeError(f"Expected {size} activities from the first tick, got {len(activities)}")
+
+        api.reset_counters()
+        steady = timed(poller.tick, 5)
+        results[str(size)] = {
+            "first_tick_ms": round(first_ms, 2),
+            "first_tick_requests": first_requests,
+            "steady_tick_ms": round(statistics.median(steady), 2),
+            "steady_tick_requests": api.requests / len(steady),
+        }
+    return results
+
+
+def load(url: str, concurrency: int, total: int) -> Dict[str, Any]:
+    """Issues ``total`` GETs from ``concurrency`` keep-alive clients and reports throughput and latency."""
+    import requests
+
+    local = threading.local()
+    samples: List[float] = []
+    errors = 0
+    lock = threading.Lock()
+
+    def fetch(_):
+        nonlocal errors
+        session = getattr(local, "session", None)
+        if session is None:
+            session = local.session = requests.Session()
+        start = time.perf_counter()
+        ok = session.get(url, timeout=30).ok
+        elapsed = (time.perf_counter() - start) * 1000
+        with lock:
+            samples.append(elapsed)
+            errors += not ok
+
+    start = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as pool:
+        list(pool.map(fetch, range(total)))
+    wall = time.perf_counter() - start
+    return dict(percentiles(samples), requests_per_sec=round(total / wall, 1), errors=errors)
+
+
+def bench_gui(base_url: str, concurrency: int, total: int) -> Dict[str, Any]:
+    """GUI server throughput for a session listing, served from its cache and straight from the API."""
+    import gui_server
+    from jules_client import JulesClient
+
+    os.environ.update(JULES_API_KEY=API_KEY, JULES_API_BASE_URL=base_url)
+    # Per-request access logging to stderr would be most of what gets measured
+    gui_server.JulesGuiHandler.log_message = lambda handler, format, *args: None
+    results = {}
+    for name, cache_ttl in (("cached", 5.0), ("uncached", 0.0)):
+        server = gui_server.create_server("127.0.0.1", 0, max_workers=concurrency, cache_ttl=cache_ttl)
+        # Unthrottled, so the numbers show the server rather than the client's default request budget
+        gui_server.JulesGuiHandler.client = JulesClient(API_KEY, pool_maxsize=concurrency, requests_per_second=None)
+        start_in_thread(server)
+        try:
+            url = f"http://127.0.0.1:{server.server_address[1]}/api/sessions?pageSize=30"
+            results[name] = load(url, concurrency, total)
+        finally:
+            server.shutdown()
+            server.server_close()
+    return results
+
+
+def bench_bulk(client, count: int, workers: int) -> Dict[str, Any]:
+    """Throughput of batch-create and of a bulk delete of the sessions it created."""
+    from jules_batch import create_sessions, run_bulk
+
+    specs = [{"id": f"bench-{index}", "prompt": f"Benchmark task {index}"} for index in range(count)]
+    start = time.perf_counter()
+    created = create_sessions(client, specs, max_workers=workers, requests_per_second=10000)
+    create_s = time.perf_counter() - start
+    names = [result["session"] for result in created if result["status"] == "created"]
+
+    start = time.perf_counter()
+    deleted = run_bulk(client, names, client._delete_session_request, max_workers=workers,
+                       requests_per_second=10000)
+    delete_s = time.perf_counter() - start
+    return {
+        "create": {"ops_per_sec": round(len(names) / create_s, 1), "failed": count - len(names)},
+        "delete": {"ops_per_sec": round(deleted["ok"] / delete_s, 1), "failed": deleted["failed"]},
+    }
+
+
+def flatten(results: Dict[str, Any], prefix: str = "") -> Dict[str, float]:
+    flat = {}
+    for key, value in results.items():
+        name = f"{prefix}{key}"
+        if isinstance(value, dict):
+            flat.update(flatten(value, name + "."))
+        elif isinstance(value, (int, float)) and not isinstance(value, bool):
+            flat[name] = value
+    return flat
+
+
+def compare(results: Dict[str, Any], baseline: Dict[str, Any], threshold: float) -> List[str]:
+    """Metrics more than ``threshold`` worse than the baseline; throughput is higher-is-better, the rest lower."""
+    current, previous = flatten(results["suites"]), flatten(baseline.get("suites", {}))
+    regressions = []
+    for name, before in sorted(previous.items()):
+        after = current.get(name)
+        if after is None or name.endswith((".errors", ".failed")):
+            continue
+        if name.endswith("_per_sec"):
+            worse = after < before * (1 - threshold)
+        else:
+            worse = after > before * (1 + threshold)
+            if name.endswith("_ms"):
+                worse = worse and after - before > MIN_REGRESSION_MS
+        if worse:
+            regressions.append(f"{name}: {before} -> {after}")
+    return regressions
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark jules_client.py and gui_server.py against a local mock API")
+    parser.add_argument("--only", help=f"Comma-separated suites to run (default: all of {','.join(SUITES)})")
+    parser.add_argument("--quick", action="store_true", help="Fewer runs and smaller sizes, for a smoke test")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean latency the mock adds per request (seconds)")
+    parser.add_argument("--concurrency", type=int, default=16, help="Concurrent GUI clients (default: 16)")
+    parser.add_argument("--output", help="Write results as JSON to this file")
+    parser.add_argument("--compare", help="Baseline results JSON to check for regressions")
+    parser.add_argument("--threshold", type=float, default=0.25,
+                        help="Allowed relative regression against the baseline (default: 0.25)")
+    args = parser.parse_args()
+
+    suites = args.only.split(",") if args.only else list(SUITES)
+    unknown = set(suites) - set(SUITES)
+    if unknown:
+        parser.error(f"Unknown suite(s): {', '.join(sorted(unknown))}")
+    sizes = [10, 1000] if args.quick else [10, 1000, 10000]
+    runs = 3 if args.quick else 20
+
+    # Keep source indexes and stores out of the user's cache
+    os.environ["JULES_CACHE_DIR"] = tempfile.mkdtemp(prefix="jules-bench-")
+    sys.path.insert(0, SCRIPT_DIR)
+    from jules_client import JulesClient
+    from mock_jules_api import base_url, create_mock_server
+
+    server = start_in_thread(create_mock_server("127.0.0.1", 0, sized=sizes, latency=args.latency, growth=0))
+    url = base_url(server)
+    os.environ["JULES_API_BASE_URL"] = url
+    client = JulesClient(API_KEY, plain=True, requests_per_second=None)
+
+    results: Dict[str, Any] = {
+        "python": sys.version.split()[0],
+        "platform": sys.platform,
+        "latency": args.latency,
+        "quick": args.quick,
+        "suites": {},
+    }
+    try:
+        for suite in suites:
+            print(f"Running {suite}...", file=sys.stderr)
+            if suite == "cli":
+                results["suites"]["cli"] = bench_cli(url, max(3, runs // 4))
+            elif suite == "calls":
+                results["suites"]["calls"] = bench_calls(client, runs * 5)
+            elif suite == "polling":
+                results["suites"]["polling"] = bench_polling(client, server.api, sizes)
+            elif suite == "gui":
+                results["suites"]["gui"] = bench_gui(url, args.concurrency, 200 if args.quick else 2000)
+            elif suite == "bulk":
+                results["suites"]["bulk"] = bench_bulk(client, 50 if args.quick else 500, 8)
+    finally:
+        client.close()
+        server.shutdown()
+        server.server_close()
+
+    failures = []
+    if args.compare:
+        with open(args.compare, "r") as f:
+            failures = compare(results, json.load(f), args.threshold)
+        results["regressions"] = failures
+
+    print(json.dumps(results, indent=2))
+    if args.output:
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+    for failure in failures:
+        print(f"REGRESSION: {failure}", file=sys.stderr)
+    sys.exit(1 if failures else 0)
+
+
+if __name__ == "__main__":
+    main()
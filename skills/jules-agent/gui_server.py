@@ -1,30 +1,396 @@
+import gzip
+import hashlib
 import json
 import os
+import threading
+import time
+from collections import OrderedDict, deque
+from concurrent.futures import Future, ThreadPoolExecutor
 from http.server import BaseHTTPRequestHandler, HTTPServer
 from urllib.parse import urlparse, parse_qs
 
 from dotenv import load_dotenv, find_dotenv
 
-from jules_client import JulesClient
+import requests
+
+from jules_client import TERMINAL_STATES, CircuitOpenError, JulesClient, SessionPoller
+from jules_metrics import METRICS, gui_route
+
+try:
+    import brotli  # Optional; gzip alone is used when it isn't installed
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this aren't worth compressing
+MIN_COMPRESS_BYTES = 1024
+# Seconds a browser is told to wait when every stream slot is taken
+STREAM_RETRY_AFTER = 5
+
+
+class ResponseCache:
+    """Short-TTL, size-bounded cache for upstream Jules reads.
+
+    Concurrent misses for the same key share one in-flight upstream call.
+    ``invalidate`` bumps a generation counter so a fetch that started before
+    a mutation never stores its (possibly stale) result.
+    """
+
+    def __init__(self, ttl: float = 5.0, max_entries: int = 256):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # key -> (expires_at, value)
+        self._inflight = {}  # key -> Future
+        self._generation = 0
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get_or_fetch(self, key, fetch):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry and entry[0] > time.monotonic():
+                self._entries.move_to_end(key)
+                self.hits += 1
+                METRICS.cache("gui_response", True)
+                return entry[1]
+            self.misses += 1
+            METRICS.cache("gui_response", False)
+            flight = self._inflight.get(key)
+            leader = flight is None
+            if leader:
+                flight = self._inflight[key] = Future()
+                generation = self._generation
+
+        if not leader:
+            return flight.result()
+
+        try:
+            value = fetch()
+        except Exception as exc:
+            with self._lock:
+                self._inflight.pop(key, None)
+            flight.set_exception(exc)
+            raise
+
+        with self._lock:
+            self._inflight.pop(key, None)
+            if value is not None and generation == self._generation:
+                self._entries[key] = (time.monotonic() + self.ttl, value)
+                self._entries.move_to_end(key)
+                while len(self._entries) > self.max_entries:
+                    self._entries.popitem(last=False)
+        flight.set_result(value)
+        return value
+
+    def invalidate(self, predicate=None):
+        """Drops entries whose path matches ``predicate`` (all entries if None)."""
+        with self._lock:
+            self._generation += 1
+            for key in [k for k in self._entries if predicate is None or predicate(k[0])]:
+                del self._entries[key]
+
+
+def _etag(body):
+    return hashlib.blake2b(body, digest_size=16).hexdigest()
+
+
+def _compress(body, encoding, static=False):
+    """Encodes ``body``; static assets get the slow, smallest settings since they're compressed once."""
+    if encoding == "br":
+        return brotli.compress(body, quality=11 if static else 4)
+    return gzip.compress(body, compresslevel=9 if static else 5, mtime=0)
+
+
+def choose_encoding(accept_encoding):
+    """Best content-coding this server offers for an Accept-Encoding header (``identity`` if none)."""
+    offered = {}
+    for part in (accept_encoding or "").split(","):
+        coding, _, params = part.strip().partition(";")
+        quality = 1.0
+        for param in params.split(";"):
+            name, _, value = param.strip().partition("=")
+            if name == "q":
+                try:
+                    quality = float(value)
+                except ValueError:
+                    quality = 0.0
+        if coding:
+            offered[coding.lower()] = quality
+    for coding in ("br", "gzip") if brotli else ("gzip",):
+        if offered.get(coding, offered.get("*", 0.0)) > 0:
+            return coding
+    return "identity"
+
+
+def etag_matches(if_none_match, etag):
+    """True if an If-None-Match header lists ``etag`` in any of its encodings (weak comparison)."""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == "*":
+        return True
+    for tag in if_none_match.split(","):
+        tag = tag.strip()
+        if tag.startswith("W/"):
+            tag = tag[2:]
+        if tag.strip('"').split("-", 1)[0] == etag:
+            return True
+    return False
+
+
+class StaticAsset:
+    """A file held in memory with its pre-compressed variants; reloaded when its mtime changes."""
+
+    def __init__(self, path, content_type):
+        self.path = path
+        self.content_type = content_type
+        self.mtime = None
+        self.etag = None
+        self.variants = {}  # encoding -> bytes
+        self._lock = threading.Lock()
+
+    def current(self):
+        """Returns (etag, variants), re-reading and re-compressing the file only if it changed."""
+        mtime = os.stat(self.path).st_mtime_ns
+        with self._lock:
+            if mtime != self.mtime:
+                with open(self.path, "rb") as f:
+                    body = f.read()
+                variants = {"identity": body, "gzip": _compress(body, "gzip", static=True)}
+                if brotli:
+                    variants["br"] = _compress(body, "br", static=True)
+                self.variants = variants
+                self.etag = _etag(body)
+                self.mtime = mtime
+            return self.etag, self.variants
+
+
+class CompressedBodies:
+    """Bounded memo of compressed JSON bodies by ETag, so an unchanged payload is compressed once."""
+
+    def __init__(self, max_entries=64):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()  # (etag, encoding) -> bytes
+        self._lock = threading.Lock()
+
+    def get(self, etag, encoding, body):
+        key = (etag, encoding)
+        with self._lock:
+            compressed = self._entries.get(key)
+            if compressed is not None:
+                self._entries.move_to_end(key)
+                return compressed
+        compressed = _compress(body, encoding)
+        with self._lock:
+            self._entries[key] = compressed
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return compressed
+
+
+def _session_paths(session_id=None):
+    """Cache predicate for the session list plus, optionally, one session's detail/activities."""
+    def predicate(path):
+        if path == "/api/sessions":
+            return True
+        if session_id is None:
+            return False
+        prefix = f"/api/sessions/{session_id}"
+        return path == prefix or path.startswith(prefix + "/")
+    return predicate
+
+
+class SessionFeed:
+    """One upstream poller for a session whose events fan out to every SSE subscriber.
+
+    Events are kept in a bounded backlog so reconnecting clients can resume
+    from ``Last-Event-ID``. Event IDs are ``<epoch>-<seq>``; an ID from an
+    older feed (different epoch) replays the whole backlog. A feed that stops
+    for good (terminal state, or an error retrying can't fix) publishes a
+    final ``end`` event, which tells the browser to close its EventSource.
+    """
+
+    def __init__(self, client, session_id, on_finish, backlog=500, idle_grace=30.0):
+        self.client = client
+        self.session_id = session_id
+        self.on_finish = on_finish
+        self.idle_grace = idle_grace
+        self.epoch = str(int(time.time() * 1000))
+        self.events = deque(maxlen=backlog)  # (seq, event_type, data)
+        self.seq = 0
+        self.subscribers = 0
+        self.finished = False
+        self.terminal = False # Ended in a terminal state, so the backlog is the whole story
+        self.cond = threading.Condition()
+        self.thread = threading.Thread(target=self._run, name=f"feed-{session_id}", daemon=True)
+
+    def _publish(self, event_type, data):
+        with self.cond:
+            self.seq += 1
+            self.events.append((self.seq, event_type, data))
+            self.cond.notify_all()
+
+    def resume_point(self, last_event_id):
+        """Maps a Last-Event-ID header to the sequence number to continue after."""
+        epoch, _, seq = (last_event_id or "").partition("-")
+        if epoch == self.epoch and seq.isdigit():
+            return int(seq)
+        return 0
+
+    def wait_events(self, after, timeout=15.0):
+        """Returns (events newer than ``after``, finished), blocking up to ``timeout`` for new ones."""
+        with self.cond:
+            if self.seq <= after and not self.finished:
+                self.cond.wait(timeout)
+            return [event for event in self.events if event[0] > after], self.finished
+
+    def _run(self):
+        poller = SessionPoller(self.client, self.session_id, min_interval=0.5, max_interval=5.0)
+        last_state = None
+        idle_since = None
+        while True:
+            with self.cond:
+                subscribers = self.subscribers
+            if subscribers:
+                idle_since = None
+            elif idle_since is None:
+                idle_since = time.monotonic()
+            elif time.monotonic() - idle_since > self.idle_grace:
+                break
+
+            try:
+                for activity in poller.tick():
+                    self._publish("activity", activity)
+            except requests.exceptions.HTTPError as exc:
+                self._publish("error", {"error": str(exc)})
+                status = exc.response.status_code if exc.response is not None else 0
+                if 400 <= status < 500:
+                    self._publish("end", {"error": str(exc)})
+                    break # Unknown session or bad credentials won't fix themselves
+            except Exception as exc:
+                self._publish("error", {"error": str(exc)})
+
+            if poller.state and poller.state != last_state:
+                last_state = poller.state
+                self._publish("state", {"state": poller.state})
+                if poller.state in TERMINAL_STATES:
+                    self.terminal = True
+                    self._publish("end", {"state": poller.state})
+                    break
+            time.sleep(poller.scheduler.next_delay())
+
+        with self.cond:
+            self.finished = True
+            self.cond.notify_all()
+        self.on_finish(self)
+
+
+class ActivityBroadcaster:
+    """Keeps at most one SessionFeed (and so one upstream poller) per session.
+
+    Feeds of sessions that reached a terminal state are kept for
+    ``finished_ttl`` seconds (at most ``max_finished`` of them), so a tab
+    reconnecting to a finished session is answered from the final backlog
+    instead of starting a poller that downloads the whole history again.
+    """
+
+    def __init__(self, finished_ttl=600.0, max_finished=64):
+        self.feeds = {}
+        self.finished = OrderedDict() # session_id -> (feed, monotonic time it finished)
+        self.finished_ttl = finished_ttl
+        self.max_finished = max_finished
+        self._lock = threading.Lock()
+
+    def subscribe(self, client, session_id):
+        with self._lock:
+            feed = self.feeds.get(session_id)
+            if feed is None:
+                cached = self.finished.get(session_id)
+                if cached and time.monotonic() - cached[1] <= self.finished_ttl:
+                    feed = cached[0]
+            if feed is None or (feed.finished and not feed.terminal):
+                feed = self.feeds[session_id] = SessionFeed(client, session_id, self._remove)
+                feed.thread.start()
+            with feed.cond:
+                feed.subscribers += 1
+            return feed
+
+    def unsubscribe(self, feed):
+        with feed.cond:
+            feed.subscribers -= 1
+
+    def _remove(self, feed):
+        with self._lock:
+            if self.feeds.get(feed.session_id) is feed:
+                del self.feeds[feed.session_id]
+            if feed.terminal:
+                self.finished[feed.session_id] = (feed, time.monotonic())
+                self.finished.move_to_end(feed.session_id)
+                while len(self.finished) > self.max_finished:
+                    self.finished.popitem(last=False)
 
 
 class JulesGuiHandler(BaseHTTPRequestHandler):
     client = None
+    cache = ResponseCache()
+    broadcaster = ActivityBroadcaster()
+    page = StaticAsset(os.path.join(os.path.dirname(os.path.abspath(__file__)), "gui.html"),
+                       "text/html; charset=utf-8")
+    compressed = CompressedBodies()
+
+    def handle_one_request(self):
+        self._started = time.perf_counter()
+        self._status = None
+        super().handle_one_request()
+        # A malformed request line is answered with an error before path and command are set
+        route = gui_route(getattr(self, "path", "")) if self._status is not None else None
+        # SSE streams stay open for the whole session; their duration isn't request latency
+        if route and not route.endswith("/stream"):
+            METRICS.observe("jules_gui_request_duration_seconds", time.perf_counter() - self._started,
+                            method=getattr(self, "command", None) or "other", route=route, status=str(self._status))
+
+    def send_response(self, code, message=None):
+        self._status = code
+        super().send_response(code, message)
 
     def _send_json(self, payload, status=200):
-        body = json.dumps(payload).encode("utf-8")
+        body = json.dumps(payload, separators=(",", ":")).encode("utf-8")
+        if status != 200 or self.command != "GET":
+            return self._send_body(body, "application/json", status=status)
+        # Browsers revalidate with If-None-Match, so an unchanged poll is a bodiless 304
+        etag = _etag(body)
+        encoding = choose_encoding(self.headers.get("Accept-Encoding")) if len(body) >= MIN_COMPRESS_BYTES else "identity"
+        if encoding != "identity":
+            body = self.compressed.get(etag, encoding, body)
+        self._send_body(body, "application/json", etag=etag, encoding=encoding, cache_control="no-cache")
+
+    def _send_asset(self, asset):
+        etag, variants = asset.current()
+        encoding = choose_encoding(self.headers.get("Accept-Encoding"))
+        self._send_body(variants[encoding], asset.content_type, etag=etag, encoding=encoding,
+                        cache_control="no-cache")
+
+    def _send_text(self, content, content_type):
+        self._send_body(content.encode("utf-8"), content_type)
+
+    def _send_body(self, body, content_type, status=200, etag=None, encoding="identity", cache_control=None):
+        """Writes a complete response; with ``etag`` set, answers 304 when the client already has it."""
+        if etag and etag_matches(self.headers.get("If-None-Match"), etag):
+            status, body = 304, b""
         self.send_response(status)
-        self.send_header("Content-Type", "application/json")
-        self.send_header("Content-Length", str(len(body)))
-        self.end_headers()
-        self.wfile.write(body)
-
-    def _send_html(self, content):
-        self.send_response(200)
-        self.send_header("Content-Type", "text/html")
-        self.send_header("Content-Length", str(len(content)))
+        self._send_cors()
+        if etag:
+            self.send_header("ETag", f'"{etag}"' if encoding == "identity" else f'"{etag}-{encoding}"')
+            self.send_header("Vary", "Accept-Encoding")
+        if cache_control:
+            self.send_header("Cache-Control", cache_control)
+        if status != 304:
+            self.send_header("Content-Type", content_type)
+            if encoding != "identity":
+                self.send_header("Content-Encoding", encoding)
+            self.send_header("Content-Length", str(len(body)))
         self.end_headers()
-        self.wfile.write(content.encode("utf-8"))
+        if body:
+            self.wfile.write(body)
 
     def _send_cors(self):
         self.send_header("Access-Control-Allow-Origin", "*")
@@ -47,68 +413,148 @@ class JulesGuiHandler(BaseHTTPRequestHandler):
             raise RuntimeError("Jules client not initialized")
 
     def _handle_error(self, exc):
+        if isinstance(exc, CircuitOpenError):
+            # Jules is failing; tell the browser when to come back instead of queueing more calls
+            return self._send_json({"error": str(exc), "retryIn": round(exc.retry_in)}, status=503)
         self._send_json({"error": str(exc)}, status=500)
 
+    def _stream_session(self, session_id):
+        """Starts streaming a session's activities as Server-Sent Events.
+
+        The connection is handed to its own thread (see ``PooledHTTPServer.detach``),
+        so an open stream never holds one of the request workers. Past the
+        server's stream cap the browser gets a 503 with Retry-After. A client
+        that already received a finished feed's ``end`` event gets a 204, which
+        stops EventSource from reconnecting.
+        """
+        if not self.server.acquire_stream():
+            body = json.dumps({"error": "Too many open streams", "retryIn": STREAM_RETRY_AFTER}).encode("utf-8")
+            self.send_response(503)
+            self._send_cors()
+            self.send_header("Retry-After", str(STREAM_RETRY_AFTER))
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(body)))
+            self.end_headers()
+            self.wfile.write(body)
+            return
+        try:
+            feed = self.broadcaster.subscribe(self.client, session_id)
+        except BaseException:
+            self.server.release_stream()
+            raise
+        after = feed.resume_point(self.headers.get("Last-Event-ID"))
+        with feed.cond:
+            ended = feed.finished and after >= feed.seq
+        if ended:
+            self.broadcaster.unsubscribe(feed)
+            self.server.release_stream()
+            self.send_response(204)
+            self._send_cors()
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        try:
+            self.send_response(200)
+            self._send_cors()
+            self.send_header("Content-Type", "text/event-stream")
+            self.send_header("Cache-Control", "no-cache")
+            self.end_headers()
+            self.wfile.flush()
+        except BaseException:
+            self.broadcaster.unsubscribe(feed)
+            self.server.release_stream()
+            raise
+        self.close_connection = True
+        self.server.detach(self.request)
+        threading.Thread(target=self._pump_stream, args=(feed, after, self.request),
+                         name="jules-gui-stream", daemon=True).start()
+
+    def _pump_stream(self, feed, after, connection):
+        """Writes events to ``connection`` until the session ends or the client leaves."""
+        try:
+            while True:
+                events, finished = feed.wait_events(after)
+                if events:
+                    chunks = []
+                    for seq, event_type, data in events:
+                        chunks.append(f"id: {feed.epoch}-{seq}\nevent: {event_type}\ndata: {json.dumps(data)}\n\n")
+                        after = seq
+                    connection.sendall("".join(chunks).encode("utf-8"))
+                elif not finished:
+                    connection.sendall(b": keep-alive\n\n")
+                if finished and not events:
+                    break
+        except OSError:
+            pass # Browser tab closed
+        finally:
+            self.broadcaster.unsubscribe(feed)
+            self.server.release_stream()
+            self.server.shutdown_request(connection)
+
+    def _read_api(self, path, query):
+        """Performs an upstream read for a GET API path; returns None if the path is unknown."""
+        if path == "/api/sources":
+            page_size = int(query.get("pageSize", [30])[0])
+            filter_expr = query.get("filter", [None])[0]
+            return self.client.list_sources(page_size=page_size, filter_expr=filter_expr)
+
+        if path.startswith("/api/sources/"):
+            source_id = path.split("/api/sources/")[-1]
+            return self.client.get_source(source_id)
+
+        if path == "/api/sessions":
+            page_size = int(query.get("pageSize", [30])[0])
+            page_token = query.get("pageToken", [None])[0]
+            return self.client.list_sessions(page_size=page_size, page_token=page_token)
+
+        if path.startswith("/api/sessions/") and path.endswith("/activities"):
+            session_id = path.split("/api/sessions/")[-1].split("/activities")[0]
+            page_size = int(query.get("pageSize", [50])[0])
+            page_token = query.get("pageToken", [None])[0]
+            create_time = query.get("createTime", [None])[0]
+            return self.client.list_activities(
+                session_id=session_id,
+                page_size=page_size,
+                page_token=page_token,
+                create_time=create_time,
+            )
+
+        if path.startswith("/api/sessions/"):
+            session_id = path.split("/api/sessions/")[-1]
+            return self.client.get_session(session_id)
+
+        return None
+
     def do_GET(self):
         try:
             parsed = urlparse(self.path)
             path = parsed.path
             query = parse_qs(parsed.query)
 
-            self._send_cors()
-
             # Serve HTML from root
             if path == "/" or path == "/gui.html":
-                script_dir = os.path.dirname(os.path.abspath(__file__))
-                html_path = os.path.join(script_dir, "gui.html")
-                with open(html_path, "r") as f:
-                    self._send_html(f.read())
-                return
+                return self._send_asset(self.page)
 
             if path == "/api/health":
                 return self._send_json({"status": "ok"})
 
+            if path == "/metrics":
+                return self._send_text(METRICS.render_prometheus(), "text/plain; version=0.0.4; charset=utf-8")
+
             if path == "/api/config":
                 return self._send_json({"hasApiKey": self.client is not None})
 
             self._require_client()
 
-            if path == "/api/sources":
-                page_size = int(query.get("pageSize", [30])[0])
-                filter_expr = query.get("filter", [None])[0]
-                data = self.client.list_sources(page_size=page_size, filter_expr=filter_expr)
-                return self._send_json(data)
-
-            if path.startswith("/api/sources/"):
-                source_id = path.split("/api/sources/")[-1]
-                data = self.client.get_source(source_id)
-                return self._send_json(data)
-
-            if path == "/api/sessions":
-                page_size = int(query.get("pageSize", [30])[0])
-                page_token = query.get("pageToken", [None])[0]
-                data = self.client.list_sessions(page_size=page_size, page_token=page_token)
-                return self._send_json(data)
-
-            if path.startswith("/api/sessions/") and path.endswith("/activities"):
-                session_id = path.split("/api/sessions/")[-1].split("/activities")[0]
-                page_size = int(query.get("pageSize", [50])[0])
-                page_token = query.get("pageToken", [None])[0]
-                create_time = query.get("createTime", [None])[0]
-                data = self.client.list_activities(
-                    session_id=session_id,
-                    page_size=page_size,
-                    page_token=page_token,
-                    create_time=create_time,
-                )
-                return self._send_json(data)
-
-            if path.startswith("/api/sessions/"):
-                session_id = path.split("/api/sessions/")[-1]
-                data = self.client.get_session(session_id)
-                return self._send_json(data)
+            if path.startswith("/api/sessions/") and path.endswith("/stream"):
+                session_id = path.split("/api/sessions/")[-1].split("/stream")[0]
+                return self._stream_session(session_id)
 
-            return self._send_json({"error": "Not found"}, status=404)
+            # Identical reads share one cached/in-flight upstream call
+            data = self.cache.get_or_fetch((path, parsed.query), lambda: self._read_api(path, query))
+            if data is None:
+                return self._send_json({"error": "Not found"}, status=404)
+            return self._send_json(data)
         except Exception as exc:
             self._handle_error(exc)
 
@@ -118,13 +564,15 @@ class JulesGuiHandler(BaseHTTPRequestHandler):
             path = parsed.path
             payload = self._read_json()
 
-            self._send_cors()
-
             if path == "/api/init":
                 api_key = payload.get("apiKey") or os.getenv("JULES_API_KEY")
                 if not api_key:
                     return self._send_json({"error": "API key required"}, status=400)
-                JulesGuiHandler.client = JulesClient(api_key)
+                # Swap in a new client sized like create_server's. The old one isn't closed:
+                # in-flight requests and session feeds still use it, and its pool is
+                # released when the last of them drops it
+                type(self).client = JulesClient(api_key, pool_maxsize=self.server.max_workers)
+                self.cache.invalidate()
                 return self._send_json({"status": "initialized"})
 
             self._require_client()
@@ -138,22 +586,26 @@ class JulesGuiHandler(BaseHTTPRequestHandler):
                     require_plan_approval=payload.get("requirePlanApproval", False),
                     automation_mode=payload.get("automationMode", "AUTOMATION_MODE_UNSPECIFIED"),
                 )
+                self.cache.invalidate(_session_paths())
                 return self._send_json(data)
 
             if path.startswith("/api/sessions/") and path.endswith("/delete"):
                 session_id = path.split("/api/sessions/")[-1].split("/delete")[0]
                 self.client.delete_session(session_id)
+                self.cache.invalidate(_session_paths(session_id))
                 return self._send_json({"status": "deleted"})
 
             if path.startswith("/api/sessions/") and path.endswith("/message"):
                 session_id = path.split("/api/sessions/")[-1].split("/message")[0]
                 message = payload.get("message", "")
                 data = self.client.send_message(session_id, message)
+                self.cache.invalidate(_session_paths(session_id))
                 return self._send_json(data or {"status": "sent"})
 
             if path.startswith("/api/sessions/") and path.endswith("/approve"):
                 session_id = path.split("/api/sessions/")[-1].split("/approve")[0]
                 data = self.client.approve_plan(session_id)
+                self.cache.invalidate(_session_paths(session_id))
                 return self._send_json(data or {"status": "approved"})
 
             return self._send_json({"error": "Not found"}, status=404)
@@ -161,18 +613,74 @@ class JulesGuiHandler(BaseHTTPRequestHandler):
             self._handle_error(exc)
 
 
-def create_server(host="127.0.0.1", port=5055):
+class PooledHTTPServer(HTTPServer):
+    """HTTPServer that handles each connection on a bounded worker pool.
+
+    A slow upstream call then only ties up one worker instead of blocking
+    every other browser request, including /api/health. SSE streams, which
+    stay open for a whole session, are detached from the pool onto their own
+    threads, at most ``max_streams`` at a time.
+    """
+
+    def __init__(self, server_address, handler_class, max_workers=16, max_streams=64):
+        super().__init__(server_address, handler_class)
+        self.pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="jules-gui")
+        self.max_workers = max_workers
+        self.max_streams = max_streams
+        self.streams = 0
+        self._detached = set()
+        self._lock = threading.Lock()
+
+    def acquire_stream(self) -> bool:
+        with self._lock:
+            if self.streams >= self.max_streams:
+                return False
+            self.streams += 1
+            return True
+
+    def release_stream(self):
+        with self._lock:
+            self.streams -= 1
+
+    def detach(self, request):
+        """Leaves ``request`` open after its handler returns; the caller must shut it down."""
+        with self._lock:
+            self._detached.add(request)
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self._process_request, request, client_address)
+
+    def _process_request(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            with self._lock:
+                detached = request in self._detached
+                self._detached.discard(request)
+            if not detached:
+                self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False)
+
+
+def create_server(host="127.0.0.1", port=5055, max_workers=16, cache_ttl=5.0, max_streams=64):
     # Load .env from the script's directory
     script_dir = os.path.dirname(os.path.abspath(__file__))
     env_path = os.path.join(script_dir, ".env")
     load_dotenv(env_path)
     
+    JulesGuiHandler.cache = ResponseCache(ttl=cache_ttl)
     api_key = os.getenv("JULES_API_KEY")
     if api_key:
-        JulesGuiHandler.client = JulesClient(api_key)
+        # Size the connection pool to the worker pool so concurrent requests don't queue on sockets
+        JulesGuiHandler.client = JulesClient(api_key, pool_maxsize=max_workers)
         print(f"Jules client initialized with API key from .env")
 
-    server = HTTPServer((host, port), JulesGuiHandler)
+    server = PooledHTTPServer((host, port), JulesGuiHandler, max_workers=max_workers, max_streams=max_streams)
     print(f"Jules GUI server running at http://{host}:{port}")
     return server
 
@@ -0,0 +1,271 @@
+"""Asyncio counterpart of JulesClient.
+
+Mirrors the synchronous API on top of a pooled ``httpx.AsyncClient`` so async
+orchestrators (and the GUI server) can call Jules without blocking or
+wrapping calls in threads. Request payloads and error messages come from
+``JulesApiBase``, shared with the sync client.
+"""
+import asyncio
+import time
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import httpx
+
+from jules_client import (
+    STOP_STATES,
+    ActivityCursor,
+    ApiRequest,
+    CircuitBreaker,
+    CircuitOpenError,
+    JulesApiBase,
+    PollState,
+    RetryPolicy,
+    _failure_reason,
+    retry_after_seconds,
+)
+from jules_metrics import METRICS
+
+
+class AsyncJulesClient(JulesApiBase):
+
+    def __init__(self, api_key: str, plain: bool = False, pool_maxsize: int = 16,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 source_cache_ttl: float = 3600, retry_policy: Optional[RetryPolicy] = None,
+                 requests_per_second: Optional[float] = 20.0, circuit_breaker: Optional[CircuitBreaker] = None):
+        super().__init__(api_key, plain, source_cache_ttl, retry_policy, requests_per_second, circuit_breaker)
+        self.http = httpx.AsyncClient(
+            headers=self.headers,
+            limits=httpx.Limits(max_connections=pool_maxsize, max_keepalive_connections=pool_maxsize),
+            timeout=httpx.Timeout(read_timeout, connect=connect_timeout),
+        )
+
+    async def aclose(self):
+        """Closes pooled connections held by the client."""
+        await self.http.aclose()
+
+    async def __aenter__(self):
+        return self
+
+    async def __aexit__(self, exc_type, exc, tb):
+        await self.aclose()
+
+    async def _send(self, request: ApiRequest, report: bool = True) -> httpx.Response:
+        """Sends a request over the pooled client, printing the API's error details on failure.
+
+        Shares the sync client's pacing, retry and circuit-breaker rules; while
+        the circuit is open this raises ``CircuitOpenError`` without a request.
+        """
+        attempt = 0
+        while True:
+            try:
+                trial = self.circuit_breaker.before_request()
+            except CircuitOpenError as e:
+                METRICS.record_failure(request.method, request.path, _failure_reason(e, None))
+                if report:
+                    self._report_error(request, e)
+                raise
+            try:
+                try:
+                    if self.limiter:
+                        delay = self.limiter.reserve()
+                        if delay:
+                            await asyncio.sleep(delay)
+                    start = time.perf_counter()
+                    try:
+                        response = await self.http.request(request.method, self._url(request), params=request.params,
+                                                           json=request.json)
+                    except httpx.TransportError as e:
+                        METRICS.record_request(request.method, request.path, time.perf_counter() - start, None,
+                                               attempt=attempt, error=type(e).__name__)
+                        self.circuit_breaker.record(False)
+                        raise
+                    METRICS.record_request(request.method, request.path, time.perf_counter() - start,
+                                           response.status_code, len(response.content), attempt)
+                    self.circuit_breaker.record(response.status_code not in RetryPolicy.RETRY_STATUSES)
+                finally:
+                    # A cancelled trial must not leave the circuit stuck open
+                    self.circuit_breaker.release(trial)
+                response.raise_for_status()
+                return response
+            except httpx.HTTPError as e:
+                response = e.response if isinstance(e, httpx.HTTPStatusError) else None
+                delay = self._retry_delay(request, attempt, response.status_code if response is not None else None,
+                                          isinstance(e, (httpx.ConnectError, httpx.ConnectTimeout)),
+                                          retry_after_seconds(response))
+                if delay is None:
+                    METRICS.record_failure(request.method, request.path, _failure_reason(e, response))
+                    if report:
+                        self._report_error(request, e, response.text if response is not None else None)
+                    raise
+                await asyncio.sleep(delay)
+                attempt += 1
+
+    async def list_sources(self, page_size: int = 30, page_token: Optional[str] = None,
+                           filter_expr: Optional[str] = None) -> Dict[str, Any]:
+        """Lists all sources (repositories) connected to your account."""
+        return (await self._send(self._list_sources_request(page_size, page_token, filter_expr))).json()
+
+    async def get_source(self, source_id: str) -> Dict[str, Any]:
+        """Retrieves a single source by ID."""
+        return (await self._send(self._get_source_request(source_id))).json()
+
+    async def get_source_id(self, repo_name: str) -> str:
+        """Finds the internal Source ID for a given GitHub repository name.
+
+        Uses the same on-disk source index as the sync client.
+        """
+        index = self.source_index
+        if index.is_fresh():
+            source_name = index.lookup(repo_name)
+            if source_name:
+                METRICS.cache("sources", True)
+                return source_name
+
+        METRICS.cache("sources", False)
+        index.replace([source async for source in self.iter_sources(page_size=100)])
+        source_name = index.lookup(repo_name)
+        if source_name:
+            return source_name
+        raise self._source_not_found(repo_name)
+
+    async def create_session(self, prompt: str, title: Optional[str] = None,
+                             source_id: Optional[str] = None, starting_branch: str = "main",
+                             require_plan_approval: bool = False,
+                             automation_mode: str = "AUTOMATION_MODE_UNSPECIFIED") -> Dict[str, Any]:
+        """Creates a new Jules session."""
+        request = self._create_session_request(prompt, title, source_id, starting_branch,
+                                               require_plan_approval, automation_mode)
+        return (await self._send(request)).json()
+
+    async def list_sessions(self, page_size: int = 30, page_token: Optional[str] = None) -> Dict[str, Any]:
+        """Lists all sessions for the authenticated user."""
+        return (await self._send(self._list_sessions_request(page_size, page_token))).json()
+
+    async def get_session(self, session_id: str) -> Dict[str, Any]:
+        """Retrieves a single session by ID."""
+        return (await self._send(self._get_session_request(session_id))).json()
+
+    async def delete_session(self, session_id: str) -> bool:
+        """Deletes a session."""
+        await self._send(self._delete_session_request(session_id))
+        return True
+
+    async def send_message(self, session_id: str, message: str) -> Dict[str, Any]:
+        """Sends a message from the user to an active session."""
+        return (await self._send(self._send_message_request(session_id, message))).json()
+
+    async def approve_plan(self, session_id: str) -> Dict[str, Any]:
+        """Approves a pending plan in a session."""
+        return (await self._send(self._approve_plan_request(session_id))).json()
+
+    async def list_activities(self, session_id: str, page_size: int = 50,
+                              page_token: Optional[str] = None,
+                              create_time: Optional[str] = None) -> Dict[str, Any]:
+        """Lists all activities for a session."""
+        request = self._list_activities_request(session_id, page_size, page_token, create_time)
+        return (await self._send(request)).json()
+
+    async def get_activity(self, session_id: str, activity_id: str) -> Dict[str, Any]:
+        """Retrieves a single activity by ID."""
+        return (await self._send(self._get_activity_request(session_id, activity_id))).json()
+
+    async def _iter_pages(self, build, key: str, page_token: Optional[str] = None, prefetch: bool = False,
+                          report: bool = True) -> AsyncIterator[Dict[str, Any]]:
+        """Yields items from every page, following nextPageToken lazily.
+
+        With ``prefetch`` the next page is requested in a task while the current
+        one is consumed, so at most two pages are held in memory.
+        """
+        fetch = lambda token: self._send(build(token), report=report)
+        if not prefetch:
+            while True:
+                data = (await fetch(page_token)).json()
+                for item in data.get(key, []):
+                    yield item
+                page_token = data.get("nextPageToken")
+                if not page_token:
+                    return
+
+        pending = asyncio.ensure_future(fetch(page_token))
+        try:
+            while pending is not None:
+                data = (await pending).json()
+                page_token = data.get("nextPageToken")
+                pending = asyncio.ensure_future(fetch(page_token)) if page_token else None
+                for item in data.get(key, []):
+                    yield item
+        finally:
+            if pending is not None:
+                pending.cancel() # The caller stopped early; the next page isn't needed
+
+    def iter_sessions(self, page_size: int = 30, page_token: Optional[str] = None,
+                      prefetch: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over all sessions, one page in memory at a time."""
+        return self._iter_pages(lambda token: self._list_sessions_request(page_size, token),
+                                "sessions", page_token, prefetch)
+
+    def iter_sources(self, page_size: int = 30, filter_expr: Optional[str] = None,
+                     page_token: Optional[str] = None, prefetch: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over all connected sources."""
+        return self._iter_pages(lambda token: self._list_sources_request(page_size, token, filter_expr),
+                                "sources", page_token, prefetch)
+
+    def iter_activities(self, session_id: str, page_size: int = 50, create_time: Optional[str] = None,
+                        page_token: Optional[str] = None, prefetch: bool = False) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over a session's activities."""
+        return self._iter_pages(
+            lambda token: self._list_activities_request(session_id, page_size, token, create_time),
+            "activities", page_token, prefetch)
+
+    async def fetch_new_activities(self, session_name: str, cursor: ActivityCursor,
+                                   page_size: int = 50) -> List[Dict[str, Any]]:
+        """Fetches only activities newer than ``cursor``, oldest first, and advances it."""
+        pages = self._iter_pages(
+            lambda token: self._list_activities_request(session_name, page_size, token, cursor.create_time),
+            "activities", report=False)
+        activities = [activity async for activity in pages]
+        return self._accept_new_activities(activities, cursor)
+
+    async def poll_session(self, session_name: str, timeout: int = 300, min_interval: float = 1.0,
+                           max_interval: float = 30.0,
+                           poll: Optional[PollState] = None) -> AsyncIterator[Dict[str, Any]]:
+        """Async iterator over new activities as they appear.
+
+        Makes the same decisions as the sync poller (``PollState``), and ends
+        when the session reaches a stop state or ``timeout`` elapses. Pass
+        ``poll`` to read its ``scheduler.stats`` and ``last_error``, or to
+        continue from its cursor. Call ``get_session`` afterwards for the final
+        state and outputs.
+        """
+        poll = poll or PollState(session_name, min_interval, max_interval)
+        start_time = time.time()
+
+        while time.time() - start_time <= timeout:
+            tick_start = time.perf_counter()
+            try:
+                session_data = (await self._send(self._get_session_request(poll.session_name), report=False)).json()
+            except httpx.HTTPStatusError as e:
+                if e.response.status_code != 429:
+                    raise
+                poll.session_throttled(e.response)
+                await asyncio.sleep(poll.scheduler.next_delay())
+                continue
+
+            new_activities = []
+            fetched = poll.should_fetch(session_data)
+            if fetched:
+                try:
+                    new_activities = await self.fetch_new_activities(poll.session_name, poll.cursor)
+                    poll.fetched()
+                except httpx.HTTPError as e:
+                    poll.fetch_failed(e, e.response if isinstance(e, httpx.HTTPStatusError) else None)
+            poll.finish(new_activities, fetched, time.perf_counter() - tick_start)
+
+            for activity in new_activities:
+                yield activity
+
+            if poll.state in STOP_STATES:
+                return
+
+            remaining = timeout - (time.time() - start_time)
+            await asyncio.sleep(max(0.0, min(poll.scheduler.next_delay(), remaining)))
@@ -0,0 +1,242 @@
+"""Bulk session operations: creation from a manifest and lifecycle fan-out.
+
+``batch-create`` reads one spec per JSONL line (or a YAML list), resolves
+every repo once up front and creates the sessions on a bounded worker pool
+under a shared request budget. Each outcome is appended to a JSONL results
+file as soon as it is known, so a rerun skips specs that already have a
+session and only retries the rest.
+
+``prune``, ``approve-all`` and ``broadcast`` select sessions by state, age,
+title or repo from one paginated listing and apply one request per session
+on the same kind of pool.
+"""
+import hashlib
+import json
+import os
+import re
+import threading
+import time
+from calendar import timegm
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from typing import Any, Callable, Dict, Iterable, Iterator, List, Optional, Set
+
+import requests
+
+from jules_client import ApiRequest, RateLimiter, RetryPolicy, timestamp_key
+from jules_metrics import in_scope
+
+def load_manifest(path: str) -> List[Dict[str, Any]]:
+    """Reads session specs from a JSONL file, or from a YAML list when the file ends in .yaml/.yml."""
+    with open(path, "r") as f:
+        if path.endswith((".yaml", ".yml")):
+            try:
+                import yaml
+            except ImportError:
+                raise ValueError("Reading YAML manifests requires PyYAML (pip install pyyaml).") from None
+            specs = yaml.safe_load(f) or []
+            if not isinstance(specs, list):
+                raise ValueError(f"{path}: expected a list of session specs.")
+        else:
+            specs = []
+            for line_number, line in enumerate(f, 1):
+                if not line.strip():
+                    continue
+                try:
+                    specs.append(json.loads(line))
+                except ValueError as e:
+                    raise ValueError(f"{path}:{line_number}: invalid JSON ({e})") from None
+    for index, spec in enumerate(specs):
+        # Same rule as the prompt that will be sent, so a title-only backlog entry is accepted
+        if not isinstance(spec, dict) or not spec_prompt(spec):
+            raise ValueError(f"{path}: spec {index + 1} needs a 'prompt' (or 'title'/'body').")
+    return specs
+
+
+def spec_key(spec: Dict[str, Any]) -> str:
+    """Stable identity of a spec for checkpointing: its ``id``/``request_id``, else a content hash."""
+    explicit = spec.get("id") or spec.get("request_id")
+    if explicit:
+        return str(explicit)
+    return hashlib.sha256(json.dumps(spec, sort_keys=True).encode("utf-8")).hexdigest()[:12]
+
+
+def spec_prompt(spec: Dict[str, Any]) -> str:
+    """The prompt to send; backlog entries without one use their title and body."""
+    if spec.get("prompt"):
+        return spec["prompt"]
+    return "\n\n".join(part for part in (spec.get("title"), spec.get("body")) if part)
+
+
+def completed_keys(results_path: str) -> Set[str]:
+    """Keys already recorded as created in a results file from an earlier run."""
+    keys = set()
+    try:
+        with open(results_path, "r") as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except ValueError:
+                    continue # A run killed mid-write can leave a partial last line
+                if result.get("status") == "created":
+                    keys.add(result.get("key"))
+    except OSError:
+        pass
+    return keys
+
+
+def create_sessions(client, specs: Iterable[Dict[str, Any]], max_workers: int = 4,
+                    requests_per_second: float = 2.0, retries: int = 2,
+                    defaults: Optional[Dict[str, Any]] = None, skip: Optional[Set[str]] = None,
+                    on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> List[Dict[str, Any]]:
+    """Creates one session per spec and returns a result per spec, in manifest order.
+
+    Spec fields: ``prompt`` (or ``title``/``body``), ``title``, ``repo``,
+    ``branch``, ``require_approval``, ``auto_pr`` and an optional ``id``;
+    missing fields come from ``defaults``. Specs whose key is in ``skip`` are
+    reported as ``skipped``. Creates are retried up to ``retries`` times, but
+    only when the API cannot have acted on them (429 or no connection), so a
+    retry never duplicates a session; other failures land in the results file
+    for the next run. ``on_result`` is called (serialized) as each result lands.
+    Keys come from the manifest spec before ``defaults`` are applied, so a rerun
+    with different default flags still recognises the sessions it created.
+    """
+    defaults = defaults or {}
+    retry_policy = RetryPolicy(max_retries=retries)
+    specs = list(specs)
+    keys = [spec_key(spec) for spec in specs]
+    specs = [dict(defaults, **spec) for spec in specs]
+    skip = skip or set()
+    limiter = RateLimiter(requests_per_second, burst=max(1, max_workers))
+    report_lock = threading.Lock()
+
+    def report(result):
+        if on_result:
+            with report_lock:
+                on_result(result)
+        return result
+
+    # Resolve each distinct repo once; one index refresh covers all misses
+    sources: Dict[str, Any] = {}
+    for repo in dict.fromkeys(spec["repo"] for spec in specs if spec.get("repo")):
+        try:
+            sources[repo] = client.get_source_id(repo)
+        except (ValueError, requests.exceptions.RequestException) as e:
+            sources[repo] = e
+
+    def create(index: int, spec: Dict[str, Any]) -> Dict[str, Any]:
+        key = keys[index]
+        result = {"index": index, "key": key, "title": spec.get("title"), "repo": spec.get("repo")}
+        if key in skip:
+            return report(dict(result, status="skipped"))
+        source = sources.get(spec.get("repo")) if spec.get("repo") else None
+        if isinstance(source, Exception):
+            return report(dict(result, status="failed", error=str(source)))
+
+        request = client._create_session_request(
+            spec_prompt(spec), spec.get("title"), source, spec.get("branch") or "main",
+            bool(spec.get("require_approval")),
+            "AUTO_CREATE_PR" if spec.get("auto_pr") else "AUTOMATION_MODE_UNSPECIFIED")
+        limiter.acquire()
+        try:
+            session = client._send(request, report=False, retry_policy=retry_policy).json()
+        except requests.exceptions.RequestException as e:
+            return report(dict(result, status="failed", error=str(e)))
+        return report(dict(result, status="created", session=session.get("name"), url=session.get("url")))
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        return list(pool.map(in_scope(create), range(len(specs)), specs))
+
+
+def append_result(path: str) -> Callable[[Dict[str, Any]], None]:
+    """Returns an ``on_result`` callback that appends each result to a JSONL checkpoint file."""
+    os.makedirs(os.path.dirname(os.path.abspath(path)), exist_ok=True)
+
+    def write(result: Dict[str, Any]):
+        if result["status"] == "skipped":
+            return
+        with open(path, "a") as f:
+            f.write(json.dumps(result) + "\n")
+    return write
+
+
+DURATION_RE = re.compile(r"^\s*(\d+(?:\.\d+)?)\s*([smhdw]?)\s*$")
+DURATION_UNITS = {"": 1, "s": 1, "m": 60, "h": 3600, "d": 86400, "w": 604800}
+
+
+def parse_duration(value: str) -> float:
+    """Parses ``90``, ``90s``, ``30m``, ``12h``, ``7d`` or ``2w`` into seconds."""
+    match = DURATION_RE.match(value)
+    if not match:
+        raise ValueError(f"Invalid duration {value!r}; use e.g. 3600, 30m, 12h or 7d.")
+    return float(match.group(1)) * DURATION_UNITS[match.group(2)]
+
+
+def _epoch(ts: str) -> Optional[float]:
+    """Seconds since the epoch for an RFC 3339 UTC timestamp, or None if it can't be parsed."""
+    try:
+        return timegm(time.strptime(timestamp_key(ts)[:19], "%Y-%m-%dT%H:%M:%S"))
+    except ValueError:
+        return None
+
+
+def select_sessions(client, states: Optional[Iterable[str]] = None,
+                    exclude_states: Optional[Iterable[str]] = None, older_than: Optional[float] = None,
+                    title: Optional[str] = None, repo: Optional[str] = None) -> Iterator[Dict[str, Any]]:
+    """Yields sessions matching every given filter, streaming the paginated listing.
+
+    ``older_than`` is in seconds since ``createTime``, ``title`` is a
+    case-insensitive regex and ``repo`` is resolved to its source once.
+    """
+    states = {state.upper() for state in states} if states else None
+    exclude_states = {state.upper() for state in exclude_states} if exclude_states else set()
+    title_re = re.compile(title, re.IGNORECASE) if title else None
+    source = client.get_source_id(repo) if repo else None
+    cutoff = time.time() - older_than if older_than is not None else None
+
+    for session in client.iter_sessions(page_size=100, prefetch=True):
+        state = session.get("state", "")
+        if (states is not None and state not in states) or state in exclude_states:
+            continue
+        if title_re and not title_re.search(session.get("title") or ""):
+            continue
+        if source and session.get("sourceContext", {}).get("source") != source:
+            continue
+        if cutoff is not None:
+            created = _epoch(session.get("createTime", ""))
+            if created is None or created > cutoff:
+                continue
+        yield session
+
+
+def run_bulk(client, session_names: List[str], build: Callable[[str], ApiRequest], max_workers: int = 8,
+             requests_per_second: float = 10.0,
+             on_result: Optional[Callable[[Dict[str, Any]], None]] = None) -> Dict[str, Any]:
+    """Sends ``build(session_name)`` for every session on a bounded pool and aggregates the outcome.
+
+    ``on_result`` is called from the calling thread with ``{"session", "ok",
+    "error", "done", "total"}`` as each request finishes, for progress reporting.
+    Returns ``{"total", "ok", "failed", "errors"}``, where ``errors`` maps
+    each failed session to its error.
+    """
+    limiter = RateLimiter(requests_per_second, burst=max(1, max_workers))
+    report = {"total": len(session_names), "ok": 0, "failed": 0, "errors": {}}
+
+    def send(session_name: str):
+        limiter.acquire()
+        client._send(build(session_name), report=False)
+
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        send = in_scope(send)
+        futures = {pool.submit(send, name): name for name in session_names}
+        for future in as_completed(futures):
+            name = futures[future]
+            error = future.exception()
+            if error is None:
+                report["ok"] += 1
+            else:
+                report["failed"] += 1
+                report["errors"][name] = str(error)
+            if on_result:
+                on_result({"session": name, "ok": error is None, "error": str(error) if error else None,
+                           "done": report["ok"] + report["failed"], "total": report["total"]})
+    return report
@@ -1,39 +1,647 @@
 import os
+import random
+import re
 import time
 import json
 import argparse
+import hashlib
 import sys
-from typing import Optional, Dict, Any, List
+from itertools import islice
+from typing import TYPE_CHECKING, Optional, Dict, Any, Iterator, List, NamedTuple
+import threading
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from contextlib import contextmanager
 from dotenv import load_dotenv
-import requests
-from rich.console import Console
-from rich.live import Live
-from rich.table import Table
-from rich.panel import Panel
-from rich.markdown import Markdown
-from rich.spinner import Spinner
-
-# Initialize Rich Console
-console = Console()
-
-class JulesClient:
+
+# requests is imported where a request is made (about two thirds of the import time),
+# and the daemon's socketserver/signal only by jules_daemon
+from jules_metrics import METRICS, in_scope
+from jules_shim import default_socket_path
+
+if TYPE_CHECKING:
+    import requests
+
+# Session states after which polling stops
+TERMINAL_STATES = ("COMPLETED", "FAILED", "CANCELLED")
+STOP_STATES = TERMINAL_STATES + ("AWAITING_USER_FEEDBACK",)
+
+# Matches rich markup tags such as [bold red] / [/bold red] for plain output
+RICH_TAG_RE = re.compile(r'\[/?[a-z ]+\]')
+
+
+def timestamp_key(ts: str) -> str:
+    """Normalizes an RFC 3339 timestamp so that plain string comparison orders it correctly.
+
+    The API omits or shortens fractional seconds ("...:05Z" vs "...:05.120Z"),
+    which breaks lexicographic ordering unless the fraction is padded.
+    """
+    if not ts:
+        return ""
+    ts = ts.rstrip("Z")
+    base, _, frac = ts.partition(".")
+    return f"{base}.{frac.ljust(9, '0')}"
+
+
+class ActivityCursor:
+    """High-water mark over a session's activity stream.
+
+    Remembers the newest ``createTime`` seen plus the IDs that share it, so
+    memory stays bounded however long the session runs while activities
+    landing on the same timestamp are still deduplicated.
+    """
+
+    def __init__(self, create_time: Optional[str] = None, boundary_ids: Optional[List[str]] = None):
+        self.create_time = create_time
+        self.boundary_ids = set(boundary_ids or [])
+
+    def is_new(self, activity: Dict[str, Any]) -> bool:
+        """True if the activity lies past the cursor; the cursor is left as it is."""
+        act_id = activity.get("id") or activity.get("name", "")
+        key = timestamp_key(activity.get("createTime", ""))
+        current = timestamp_key(self.create_time or "")
+        return key > current or (key == current and act_id not in self.boundary_ids)
+
+    def accept(self, activity: Dict[str, Any]) -> bool:
+        """Returns True if the activity is new, advancing the cursor past it."""
+        if not self.is_new(activity):
+            return False
+        act_id = activity.get("id") or activity.get("name", "")
+        key = timestamp_key(activity.get("createTime", ""))
+        if key > timestamp_key(self.create_time or ""):
+            self.create_time = activity.get("createTime")
+            self.boundary_ids = set()
+        self.boundary_ids.add(act_id)
+        return True
+
+
+def retry_after_seconds(response) -> Optional[float]:
+    """Parses a Retry-After header (delta-seconds or HTTP date) into seconds to wait."""
+    value = response.headers.get("Retry-After") if response is not None else None
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    from email.utils import parsedate_to_datetime  # rare path; email.utils costs ~20ms at startup
+    try:
+        return max(0.0, parsedate_to_datetime(value).timestamp() - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+class ClientDisconnected(KeyboardInterrupt):
+    """The daemon's caller went away (Ctrl-C on the shim, closed pipe).
+
+    Unwinds the running command like Ctrl-C does in a one-shot run, so
+    checkpoints are saved and nothing keeps polling for nobody.
+    """
+
+
+# Per-thread cancellation state; the daemon sets ``cancel`` (a threading.Event) for the command it runs,
+# and ``noticed`` records that the command has been told
+_command = threading.local()
+
+
+def _cancelled() -> ClientDisconnected:
+    _command.noticed = True
+    return ClientDisconnected()
+
+
+def _raise_if_cancelled():
+    cancel = getattr(_command, "cancel", None)
+    if cancel is not None and cancel.is_set():
+        raise _cancelled()
+
+
+def _pause(seconds: float):
+    """Sleeps ``seconds``, waking early with ``ClientDisconnected`` if the daemon cancels the command.
+
+    Daemon commands are stopped cooperatively: only these waits (polling,
+    retry backoff, rate limiting) and output writes check for cancellation,
+    so a command never stops halfway through saving state.
+    """
+    cancel = getattr(_command, "cancel", None)
+    if cancel is None:
+        if seconds > 0:
+            time.sleep(seconds)
+    elif cancel.wait(max(0.0, seconds)):
+        raise _cancelled()
+
+
+class PollScheduler:
+    """Adaptive poll interval for the session poller.
+
+    Drops to ``min_interval`` as soon as something changes, backs off
+    exponentially (with jitter, so parallel pollers don't synchronize) while
+    the session is idle, and honours Retry-After when the API throttles us.
+    """
+
+    def __init__(self, min_interval: float = 1.0, max_interval: float = 30.0,
+                 backoff: float = 2.0, jitter: float = 0.2):
+        self.min_interval = min_interval
+        self.max_interval = max(min_interval, max_interval)
+        self.backoff = backoff
+        self.jitter = jitter
+        self.interval = min_interval
+        self._throttled_until = 0.0
+        self.stats = {
+            "ticks": 0,
+            "activity_fetches": 0,
+            "activity_fetches_skipped": 0,
+            "throttled": 0,
+            "errors": 0,
+        }
+
+    def record(self, changed: bool):
+        """Updates the interval after a tick; ``changed`` means new activity or a state change."""
+        self.stats["ticks"] += 1
+        if changed:
+            self.interval = self.min_interval
+        else:
+            self.interval = min(self.max_interval, self.interval * self.backoff)
+
+    def throttle(self, retry_after: Optional[float] = None):
+        """Backs off after a 429, waiting at least as long as the server asked."""
+        self.stats["throttled"] += 1
+        self.interval = min(self.max_interval, self.interval * self.backoff)
+        wait = retry_after if retry_after is not None else self.interval
+        self._throttled_until = time.time() + wait
+
+    def next_delay(self) -> float:
+        """Seconds to sleep before the next tick."""
+        delay = self.interval * random.uniform(1 - self.jitter, 1 + self.jitter)
+        return max(delay, self._throttled_until - time.time(), 0.0)
+
+
+class RateLimiter:
+    """Thread-safe token bucket: ``rate`` requests per second with bursts up to ``burst``."""
+
+    def __init__(self, rate: float, burst: int = 1):
+        self.rate = rate
+        self.capacity = max(1, burst)
+        self.tokens = float(self.capacity)
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def reserve(self) -> float:
+        """Takes a token and returns how long to wait before using it (0 if one was free).
+
+        Tokens can go negative, so concurrent callers queue up in order instead
+        of all waking at once; the async client awaits this delay rather than sleeping.
+        """
+        with self._lock:
+            now = time.monotonic()
+            self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+            self.updated = now
+            self.tokens -= 1
+            return 0.0 if self.tokens >= 0 else -self.tokens / self.rate
+
+    def acquire(self):
+        """Blocks until a token is available."""
+        delay = self.reserve()
+        if delay:
+            _pause(delay)
+
+
+def _never_sent(exc: "requests.exceptions.RequestException") -> bool:
+    """True if the request failed before a connection was made, so the API never saw it."""
+    import requests
+    from urllib3.exceptions import ConnectTimeoutError
+
+    reason = getattr(exc.args[0], "reason", None) if exc.args else None
+    return isinstance(exc, requests.exceptions.ConnectTimeout) or isinstance(reason, ConnectTimeoutError)
+
+
+_circuit_open_error = None
+_circuit_open_error_lock = threading.Lock()
+
+
+def _circuit_open_error_class() -> type:
+    """``CircuitOpenError``, a requests ``ConnectionError`` raised without contacting the API while
+    the circuit breaker is open. Defined on first use, so importing this module doesn't import requests.
+    """
+    global _circuit_open_error
+    with _circuit_open_error_lock:
+        if _circuit_open_error is None:
+            import requests
+
+            class CircuitOpenError(requests.exceptions.ConnectionError):
+                """Raised without contacting the API while the circuit breaker is open."""
+
+                def __init__(self, retry_in: float):
+                    super().__init__(f"Jules API circuit open after repeated failures; retry in {retry_in:.0f}s")
+                    self.retry_in = retry_in
+
+            CircuitOpenError.__qualname__ = "CircuitOpenError"
+            _circuit_open_error = CircuitOpenError
+        return _circuit_open_error
+
+
+def __getattr__(name: str):
+    # ``from jules_client import CircuitOpenError`` works as if it were defined here
+    if name == "CircuitOpenError":
+        return _circuit_open_error_class()
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
+
+def _failure_reason(exc: Exception, response) -> str:
+    """Metrics label for why a call finally failed: ``http_<status>``, ``circuit_open`` or the exception type."""
+    if isinstance(exc, _circuit_open_error_class()):
+        return "circuit_open"
+    if response is not None:
+        return f"http_{response.status_code}"
+    return type(exc).__name__
+
+
+class CircuitBreaker:
+    """Fails fast while the API is degraded instead of piling more requests onto it.
+
+    Opens after ``failure_threshold`` consecutive failures (5xx, 429 or
+    connection errors). After ``reset_timeout`` seconds one trial request is
+    let through: success closes the circuit, failure re-opens it. A trial that
+    ends without an outcome (cancelled, interrupted) must be handed back with
+    ``release`` so the next caller can try.
+    """
+
+    def __init__(self, failure_threshold: int = 5, reset_timeout: float = 30.0):
+        self.failure_threshold = failure_threshold
+        self.reset_timeout = reset_timeout
+        self.failures = 0
+        self.opened_at: Optional[float] = None
+        self._trial_in_flight = False
+        self._trials = 0
+        self._lock = threading.Lock()
+
+    @property
+    def state(self) -> str:
+        if self.opened_at is None:
+            return "closed"
+        return "half-open" if time.monotonic() - self.opened_at >= self.reset_timeout else "open"
+
+    def before_request(self) -> Optional[int]:
+        """Raises CircuitOpenError unless a request may be sent now.
+
+        Returns a trial token when the request is the half-open trial, else None.
+        """
+        with self._lock:
+            if self.opened_at is None:
+                return None
+            remaining = self.reset_timeout - (time.monotonic() - self.opened_at)
+            if remaining > 0 or self._trial_in_flight:
+                raise _circuit_open_error_class()(max(remaining, 0.0))
+            self._trial_in_flight = True
+            self._trials += 1
+            return self._trials
+
+    def release(self, trial: Optional[int]):
+        """Frees the trial slot taken by ``before_request`` if no outcome was recorded for it."""
+        with self._lock:
+            if trial is not None and trial == self._trials:
+                self._trial_in_flight = False
+
+    def record(self, healthy: bool):
+        """Reports the outcome of a request let through by ``before_request``."""
+        with self._lock:
+            self._trial_in_flight = False
+            if healthy:
+                self.failures = 0
+                self.opened_at = None
+            else:
+                self.failures += 1
+                if self.opened_at is not None or self.failures >= self.failure_threshold:
+                    self.opened_at = time.monotonic()
+
+
+class RetryPolicy:
+    """Which failed requests to retry, and how long to wait between attempts.
+
+    Reads, deletes and requests marked idempotent are retried on 429, 5xx,
+    timeouts and connection errors. Other writes are only retried when the
+    API cannot have acted on them: a 429, or a connection that never opened.
+    Waits grow exponentially with full jitter, and Retry-After is honoured
+    up to ``max_delay``.
+    """
+    RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+    def __init__(self, max_retries: int = 3, base_delay: float = 0.5, max_delay: float = 30.0):
+        self.max_retries = max_retries
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+
+    def should_retry(self, request: "ApiRequest", attempt: int, status: Optional[int] = None,
+                     connect_failed: bool = False) -> bool:
+        """``status`` is the HTTP status, or None for a transport error (``connect_failed`` if no connection was made)."""
+        if attempt >= self.max_retries:
+            return False
+        idempotent = request.idempotent if request.idempotent is not None else request.method in ("GET", "DELETE")
+        if status is not None:
+            return status in self.RETRY_STATUSES and (idempotent or status == 429)
+        return idempotent or connect_failed
+
+    def delay(self, attempt: int, retry_after: Optional[float] = None) -> float:
+        if retry_after is not None:
+            return min(retry_after, self.max_delay)
+        return random.uniform(0, min(self.max_delay, self.base_delay * 2 ** attempt))
+
+
+# Activity payload keys, reported as the ``kind`` of an activity record
+ACTIVITY_KINDS = ("planGenerated", "planApproved", "userMessaged", "agentMessaged",
+                  "progressUpdated", "sessionCompleted", "sessionFailed")
+
+
+def _resource_id(name: Optional[str]) -> Optional[str]:
+    return name.rsplit("/", 1)[-1] if name else None
+
+
+def session_record(session: Dict[str, Any], full: bool = False) -> Dict[str, Any]:
+    """Compact session summary for JSON Lines output; ``full`` keeps every API field."""
+    keys = ("name", "title", "state", "createTime", "updateTime", "url")
+    record = dict(session) if full else {key: session.get(key) for key in keys}
+    record["id"] = _resource_id(session.get("name"))
+    return record
+
+
+def activity_record(activity: Dict[str, Any], full: bool = False) -> Dict[str, Any]:
+    """Compact activity summary for JSON Lines output; ``full`` keeps every API field."""
+    name = activity.get("name", "")
+    if full:
+        record = dict(activity)
+    else:
+        record = {key: activity.get(key) for key in ("description", "createTime")}
+        record["originator"] = (activity.get("originator") or "").lower() or None
+        record["kind"] = next((kind for kind in ACTIVITY_KINDS if kind in activity), None)
+    record["id"] = activity.get("id") or _resource_id(name)
+    record["session"] = name.split("/")[1] if name.startswith("sessions/") else None
+    return record
+
+
+def source_record(source: Dict[str, Any], full: bool = False) -> Dict[str, Any]:
+    """Compact source summary for JSON Lines output; ``full`` keeps every API field."""
+    if full:
+        return dict(source, id=source.get("id") or _resource_id(source.get("name")))
+    github_repo = source.get("githubRepo", {})
+    return {
+        "id": source.get("id") or _resource_id(source.get("name")),
+        "name": source.get("name"),
+        "repo": f"{github_repo.get('owner')}/{github_repo.get('repo')}" if github_repo else None,
+        "defaultBranch": github_repo.get("defaultBranch", {}).get("displayName"),
+        "private": github_repo.get("isPrivate"),
+    }
+
+
+def output_record(output: Dict[str, Any]) -> Dict[str, Any]:
+    """Flattens one session output (pull request, file change, ...) for JSON Lines output."""
+    if "pullRequest" in output:
+        pr = output["pullRequest"]
+        return {"kind": "pullRequest", "url": pr.get("url"), "title": pr.get("title")}
+    kind = next(iter(output), None)
+    return {"kind": kind, "details": output.get(kind) if kind else None}
+
+
+class RecordWriter:
+    """Streams ``--format jsonl`` output: one compact JSON object per line, flushed as written.
+
+    Every record carries a ``type`` (session, activity, source, output, state,
+    status, hit, ...). ``fields`` projects records onto those keys (except
+    ``error``, ``truncated`` and ``summary`` records). Once
+    ``max_records`` or ``max_bytes`` would be exceeded, a single
+    ``{"type": "truncated", ...}`` marker is written and ``emit`` returns
+    False so callers can stop fetching.
+    """
+
+    def __init__(self, fields: Optional[List[str]] = None, max_records: Optional[int] = None,
+                 max_bytes: Optional[int] = None):
+        self.fields = fields
+        self.max_records = max_records
+        self.max_bytes = max_bytes
+        self.records = 0
+        self.bytes = 0
+        self.truncated = False
+        self._lock = threading.Lock()
+
+    def emit(self, record_type: str, record: Dict[str, Any]) -> bool:
+        """Writes one record (None values dropped); returns False once output is truncated."""
+        record = {key: value for key, value in record.items() if value is not None}
+        # Errors, markers and end-of-command summaries don't share the listed records' keys
+        if self.fields and record_type not in ("error", "truncated", "summary"):
+            record = {key: record[key] for key in self.fields if key in record}
+        line = json.dumps({"type": record_type, **record}, separators=(",", ":"),
+                          ensure_ascii=False, default=str)
+        size = len(line.encode()) + 1
+        with self._lock:
+            if self.truncated:
+                return False
+            if self.max_records is not None and self.records >= self.max_records:
+                return self._truncate("max_records")
+            if self.max_bytes is not None and self.bytes + size > self.max_bytes:
+                return self._truncate("max_bytes")
+            self.records += 1
+            self.bytes += size
+            print(line, flush=True)
+        return True
+
+    def _truncate(self, reason: str) -> bool:
+        self.truncated = True
+        print(json.dumps({"type": "truncated", "reason": reason, "records": self.records,
+                          "bytes": self.bytes}, separators=(",", ":")), flush=True)
+        return False
+
+
+class _LazyConsole:
+    """Defers importing rich and building the Console until something is rendered.
+
+    ``--plain`` runs never touch it, so they skip the rich import cost entirely.
+    """
+
+    def __init__(self):
+        self._console = None
+
+    def __getattr__(self, name):
+        if self._console is None:
+            from rich.console import Console
+            self._console = Console()
+        return getattr(self._console, name)
+
+
+console = _LazyConsole()
+
+def cache_dir() -> str:
+    """Directory for the client's local caches (``JULES_CACHE_DIR``, default ~/.cache/jules)."""
+    return os.getenv("JULES_CACHE_DIR") or os.path.join(os.path.expanduser("~"), ".cache", "jules")
+
+
+@contextmanager
+def atomic_open(path: str, mode: str = "w", **kwargs):
+    """Opens a uniquely named temp file beside ``path`` and moves it into place when the block completes.
+
+    Concurrent writers (threads of the daemon share one pid) never touch each
+    other's temp file, readers never see a partial file, and nothing is left
+    behind if the block raises.
+    """
+    import tempfile # Only paid for by commands that write
+
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=f".{os.path.basename(path)}.", suffix=".tmp")
+    try:
+        with os.fdopen(fd, mode, **kwargs) as f:
+            yield f
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+def atomic_write_json(path: str, data: Any) -> bool:
+    """Writes ``data`` to ``path`` with ``atomic_open``; returns False instead of raising on OSError.
+
+    For caches and checkpoints, which only save work: a failed write costs a
+    refetch later and must not fail the command.
+    """
+    try:
+        with atomic_open(path) as f:
+            json.dump(data, f)
+        return True
+    except OSError:
+        return False
+
+
+def account_key(api_key: str) -> str:
+    """Short, non-reversible tag for the API key so per-account caches never mix."""
+    return hashlib.sha256(api_key.encode("utf-8")).hexdigest()[:12]
+
+
+class SourceIndex:
+    """Local repo -> source name index persisted to a small JSON file with a TTL.
+
+    Keys are lower-cased ``owner/repo`` strings and source names (with and
+    without the ``sources/`` prefix), so resolving a repo is a dict lookup
+    instead of an API round-trip while the index is fresh. Source names are
+    also kept in API order, so partial names resolve the same way every run.
+    """
+
+    def __init__(self, path: str, ttl: float = 3600):
+        self.path = path
+        self.ttl = ttl
+        self.fetched_at = 0.0
+        self.names: Dict[str, str] = {}
+        self.order: List[str] = []
+        self._load()
+
+    def _load(self):
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            self.fetched_at = float(data.get("fetchedAt", 0))
+            self.names = dict(data.get("sources", {}))
+            # Indexes written before "order" existed still list names in API order
+            self.order = list(data.get("order") or dict.fromkeys(self.names.values()))
+        except (OSError, ValueError):
+            pass # Missing or corrupt cache just means a refresh on first use
+
+    def is_fresh(self) -> bool:
+        return bool(self.names) and time.time() - self.fetched_at < self.ttl
+
+    def lookup(self, repo_name: str) -> Optional[str]:
+        key = repo_name.strip().lower()
+        name = self.names.get(key)
+        if name:
+            return name
+        # Then a name ending in the given repo or owner/repo, then the historical substring match
+        tail = "/" + key
+        for candidate in self.order:
+            if candidate.lower().endswith(tail):
+                return candidate
+        for candidate in self.order:
+            if key in candidate.lower():
+                return candidate
+        return None
+
+    def replace(self, sources: List[Dict[str, Any]]):
+        """Rebuilds the index from a full source listing and persists it."""
+        names = {}
+        order = []
+        for source in sources:
+            name = source.get("name")
+            if not name:
+                continue
+            order.append(name)
+            github_repo = source.get("githubRepo", {})
+            if github_repo.get("owner") and github_repo.get("repo"):
+                names[f"{github_repo['owner']}/{github_repo['repo']}".lower()] = name
+            names[name.lower()] = name
+            names[name.split("sources/", 1)[-1].lower()] = name
+        self.names = names
+        self.order = order
+        self.fetched_at = time.time()
+        self._save()
+
+    def _save(self):
+        atomic_write_json(self.path, {"fetchedAt": self.fetched_at, "sources": self.names, "order": self.order})
+
+
+class ApiRequest(NamedTuple):
+    """A Jules API call described independently of the HTTP stack that sends it."""
+    method: str
+    path: str
+    error: str  # Prefix for the error message printed when the call fails
+    params: Optional[Dict[str, Any]] = None
+    json: Optional[Dict[str, Any]] = None
+    idempotent: Optional[bool] = None  # Safe to repeat; None means "only if GET/DELETE"
+
+
+def session_path(session_id: str) -> str:
+    """Accepts either ``123`` or ``sessions/123`` and returns the resource path."""
+    return session_id if session_id.startswith("sessions/") else f"sessions/{session_id}"
+
+
+class JulesApiBase:
+    """Request building and error reporting shared by JulesClient and AsyncJulesClient.
+
+    Subclasses only supply the transport, so payloads and error messages
+    can't drift apart between the sync and async clients.
+    """
     BASE_URL = "https://jules.googleapis.com/v1alpha"
 
-    def __init__(self, api_key: str, plain: bool = False):
+    def __init__(self, api_key: str, plain: bool = False, source_cache_ttl: float = 3600,
+                 retry_policy: Optional[RetryPolicy] = None, requests_per_second: Optional[float] = 20.0,
+                 circuit_breaker: Optional[CircuitBreaker] = None):
         if not api_key:
             raise ValueError("Jules API Key is required. Set JULES_API_KEY env var or pass it explicitly.")
         self.api_key = api_key
         self.plain = plain
+        # Overridable so benchmarks and offline runs can target mock_jules_api.py
+        self.base_url = os.getenv("JULES_API_BASE_URL") or self.BASE_URL
         self.headers = {
             "x-goog-api-key": self.api_key,
             "Content-Type": "application/json"
         }
+        self.source_cache_ttl = source_cache_ttl
+        self._source_index: Optional[SourceIndex] = None
+        # Set for --format jsonl so error details don't interleave with records on stdout
+        self.errors_to_stderr = False
+        # Every request goes through these, whichever thread or method sends it
+        self.retry_policy = retry_policy or RetryPolicy()
+        self.limiter = RateLimiter(requests_per_second, burst=max(1, int(requests_per_second))) \
+            if requests_per_second else None
+        self.circuit_breaker = circuit_breaker or CircuitBreaker()
+
+    @property
+    def source_index(self) -> SourceIndex:
+        """The repo -> source index, loaded from disk on first use."""
+        if self._source_index is None:
+            path = os.path.join(cache_dir(), f"sources-{account_key(self.api_key)}.json")
+            self._source_index = SourceIndex(path, ttl=self.source_cache_ttl)
+        return self._source_index
 
     def _print(self, message, style=None):
         if self.plain:
             # Strip rich tags if any
-            import re
-            clean_msg = re.sub(r'\[/?[a-z ]+\]', '', str(message))
+            clean_msg = RICH_TAG_RE.sub('', str(message))
             print(clean_msg)
         else:
             if style:
@@ -41,66 +649,48 @@ class JulesClient:
             else:
                 console.print(message)
 
-    def list_sources(self, page_size: int = 30, page_token: Optional[str] = None, 
-                     filter_expr: Optional[str] = None) -> Dict[str, Any]:
-        """Lists all sources (repositories) connected to your account."""
-        url = f"{self.BASE_URL}/sources"
+    def _report_error(self, request: ApiRequest, exc: Exception, details: Optional[str] = None):
+        if self.errors_to_stderr:
+            print(f"{request.error}: {exc}", file=sys.stderr)
+            if details is not None:
+                print(f"Details: {details}", file=sys.stderr)
+            return
+        self._print(f"[bold red]{request.error}:[/bold red] {exc}")
+        if details is not None:
+            self._print(f"Details: {details}")
+
+    def _url(self, request: ApiRequest) -> str:
+        return f"{self.base_url}/{request.path}"
+
+    def _retry_delay(self, request: ApiRequest, attempt: int, status: Optional[int], connect_failed: bool,
+                     retry_after: Optional[float], policy: Optional[RetryPolicy] = None) -> Optional[float]:
+        """Seconds to wait before retrying a failed attempt, or None to give up."""
+        policy = policy or self.retry_policy
+        if not policy.should_retry(request, attempt, status, connect_failed):
+            return None
+        return policy.delay(attempt, retry_after)
+
+    @staticmethod
+    def _page_params(page_size: int, page_token: Optional[str]) -> Dict[str, Any]:
         params = {"pageSize": page_size}
         if page_token:
             params["pageToken"] = page_token
+        return params
+
+    def _list_sources_request(self, page_size: int = 30, page_token: Optional[str] = None,
+                              filter_expr: Optional[str] = None) -> ApiRequest:
+        params = self._page_params(page_size, page_token)
         if filter_expr:
             params["filter"] = filter_expr
-            
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error listing sources:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
-
-    def get_source(self, source_id: str) -> Dict[str, Any]:
-        """Retrieves a single source by ID."""
-        url = f"{self.BASE_URL}/sources/{source_id}"
-        try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error getting source:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        return ApiRequest("GET", "sources", "Error listing sources", params=params)
 
-    def get_source_id(self, repo_name: str) -> str:
-        """Finds the internal Source ID for a given GitHub repository name."""
-        try:
-            sources_data = self.list_sources(page_size=100)
-            sources = sources_data.get("sources", [])
-            
-            for source in sources:
-                github_repo = source.get("githubRepo", {})
-                owner = github_repo.get("owner", "")
-                repo = github_repo.get("repo", "")
-                full_name = f"{owner}/{repo}"
-                
-                if full_name == repo_name or repo_name in source.get("name", ""):
-                    return source["name"]
-            
-            raise ValueError(f"Repository '{repo_name}' not found in connected sources. Please connect it in the Jules web UI first.")
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error fetching sources:[/bold red] {e}")
-            sys.exit(1)
+    def _get_source_request(self, source_id: str) -> ApiRequest:
+        return ApiRequest("GET", f"sources/{source_id}", "Error getting source")
 
-    def create_session(self, prompt: str, title: Optional[str] = None, 
-                      source_id: Optional[str] = None, starting_branch: str = "main",
-                      require_plan_approval: bool = False, 
-                      automation_mode: str = "AUTOMATION_MODE_UNSPECIFIED") -> Dict[str, Any]:
-        """Creates a new Jules session."""
-        url = f"{self.BASE_URL}/sessions"
-        
+    def _create_session_request(self, prompt: str, title: Optional[str] = None,
+                                source_id: Optional[str] = None, starting_branch: str = "main",
+                                require_plan_approval: bool = False,
+                                automation_mode: str = "AUTOMATION_MODE_UNSPECIFIED") -> ApiRequest:
         payload = {
             "prompt": prompt,
             "automationMode": automation_mode
@@ -124,180 +714,366 @@ class JulesClient:
         
         if require_plan_approval:
             payload["requirePlanApproval"] = True
+        return ApiRequest("POST", "sessions", "Error creating session", json=payload)
 
-        try:
-            response = requests.post(url, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error creating session:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+    def _list_sessions_request(self, page_size: int = 30, page_token: Optional[str] = None) -> ApiRequest:
+        return ApiRequest("GET", "sessions", "Error listing sessions",
+                          params=self._page_params(page_size, page_token))
+
+    def _get_session_request(self, session_id: str) -> ApiRequest:
+        return ApiRequest("GET", session_path(session_id), "Error getting session")
+
+    def _delete_session_request(self, session_id: str) -> ApiRequest:
+        return ApiRequest("DELETE", session_path(session_id), "Error deleting session")
+
+    def _send_message_request(self, session_id: str, message: str) -> ApiRequest:
+        return ApiRequest("POST", f"{session_path(session_id)}:sendMessage", "Error sending message",
+                          json={"prompt": message})
+
+    def _approve_plan_request(self, session_id: str) -> ApiRequest:
+        return ApiRequest("POST", f"{session_path(session_id)}:approvePlan", "Error approving plan", json={},
+                          idempotent=True)
+
+    def _list_activities_request(self, session_id: str, page_size: int = 50,
+                                 page_token: Optional[str] = None,
+                                 create_time: Optional[str] = None) -> ApiRequest:
+        params = self._page_params(page_size, page_token)
+        if create_time:
+            params["createTime"] = create_time
+        return ApiRequest("GET", f"{session_path(session_id)}/activities", "Error listing activities",
+                          params=params)
+
+    def _get_activity_request(self, session_id: str, activity_id: str) -> ApiRequest:
+        return ApiRequest("GET", f"{session_path(session_id)}/activities/{activity_id}",
+                          "Error getting activity")
+
+    @staticmethod
+    def _source_not_found(repo_name: str) -> ValueError:
+        return ValueError(f"Repository '{repo_name}' not found in connected sources. Please connect it in the Jules web UI first.")
+
+    @staticmethod
+    def _accept_new_activities(activities: List[Dict[str, Any]],
+                               cursor: ActivityCursor) -> List[Dict[str, Any]]:
+        activities.sort(key=lambda x: timestamp_key(x.get("createTime", "")))
+        return [activity for activity in activities if cursor.accept(activity)]
+
+
+class JulesClient(JulesApiBase):
+
+    def __init__(self, api_key: str, plain: bool = False, pool_connections: int = 4,
+                 pool_maxsize: int = 16, pool_block: bool = False,
+                 connect_timeout: float = 5.0, read_timeout: float = 60.0,
+                 source_cache_ttl: float = 3600, retry_policy: Optional[RetryPolicy] = None,
+                 requests_per_second: Optional[float] = 20.0, circuit_breaker: Optional[CircuitBreaker] = None):
+        super().__init__(api_key, plain, source_cache_ttl, retry_policy, requests_per_second, circuit_breaker)
+        self.timeout = (connect_timeout, read_timeout)
+
+        # One keep-alive session per client so repeated calls reuse the same
+        # TCP/TLS connection instead of handshaking on every request.
+        # pool_maxsize caps connections kept per host; pool_block makes it a hard limit.
+        import requests
+        from requests.adapters import HTTPAdapter
+
+        self.session = requests.Session()
+        self.session.headers.update(self.headers)
+        adapter = HTTPAdapter(pool_connections=pool_connections, pool_maxsize=pool_maxsize,
+                              pool_block=pool_block)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+    def close(self):
+        """Closes pooled connections held by the client."""
+        self.session.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    def _send(self, request: ApiRequest, report: bool = True,
+              retry_policy: Optional[RetryPolicy] = None) -> "requests.Response":
+        """Sends a request over the pooled session, printing the API's error details on failure.
+
+        Every call is paced by the client's rate limiter, refused up front
+        while the circuit breaker is open, and retried per the retry policy.
+        """
+        import requests
+
+        attempt = 0
+        while True:
+            try:
+                trial = self.circuit_breaker.before_request()
+                try:
+                    if self.limiter:
+                        self.limiter.acquire()
+                    start = time.perf_counter()
+                    try:
+                        response = self.session.request(request.method, self._url(request), params=request.params,
+                                                        json=request.json, timeout=self.timeout)
+                    except requests.exceptions.RequestException as e:
+                        METRICS.record_request(request.method, request.path, time.perf_counter() - start, None,
+                                               attempt=attempt, error=type(e).__name__)
+                        self.circuit_breaker.record(False)
+                        raise
+                    METRICS.record_request(request.method, request.path, time.perf_counter() - start,
+                                           response.status_code, len(response.content), attempt)
+                    self.circuit_breaker.record(response.status_code not in RetryPolicy.RETRY_STATUSES)
+                finally:
+                    # An interrupt between admission and outcome must not leave the circuit stuck open
+                    self.circuit_breaker.release(trial)
+                response.raise_for_status()
+                return response
+            except requests.exceptions.RequestException as e:
+                circuit_open = isinstance(e, _circuit_open_error_class())
+                response = e.response if not circuit_open else None
+                delay = None
+                if not circuit_open:
+                    delay = self._retry_delay(request, attempt, response.status_code if response is not None else None,
+                                              _never_sent(e), retry_after_seconds(response), retry_policy)
+                if delay is None:
+                    METRICS.record_failure(request.method, request.path, _failure_reason(e, response))
+                    if report:
+                        details = response.content.decode() if response is not None else None
+                        self._report_error(request, e, details)
+                    raise
+                _pause(delay)
+                attempt += 1
+
+    def list_sources(self, page_size: int = 30, page_token: Optional[str] = None, 
+                     filter_expr: Optional[str] = None) -> Dict[str, Any]:
+        """Lists all sources (repositories) connected to your account."""
+        return self._send(self._list_sources_request(page_size, page_token, filter_expr)).json()
+
+    def get_source(self, source_id: str) -> Dict[str, Any]:
+        """Retrieves a single source by ID."""
+        return self._send(self._get_source_request(source_id)).json()
+
+    def get_source_id(self, repo_name: str) -> str:
+        """Finds the internal Source ID for a given GitHub repository name.
+
+        Answers from the local source index while it is fresh; a stale index
+        or a miss triggers one refresh across every page of sources.
+        """
+        index = self.source_index
+        if index.is_fresh():
+            source_name = index.lookup(repo_name)
+            if source_name:
+                METRICS.cache("sources", True)
+                return source_name
+
+        METRICS.cache("sources", False)
+        index.replace(list(self.iter_sources(page_size=100)))
+        source_name = index.lookup(repo_name)
+        if source_name:
+            return source_name
+        raise self._source_not_found(repo_name)
+
+    def create_session(self, prompt: str, title: Optional[str] = None, 
+                      source_id: Optional[str] = None, starting_branch: str = "main",
+                      require_plan_approval: bool = False, 
+                      automation_mode: str = "AUTOMATION_MODE_UNSPECIFIED") -> Dict[str, Any]:
+        """Creates a new Jules session."""
+        request = self._create_session_request(prompt, title, source_id, starting_branch,
+                                               require_plan_approval, automation_mode)
+        return self._send(request).json()
+
+    def create_sessions(self, specs: List[Dict[str, Any]], max_workers: int = 4,
+                        requests_per_second: float = 2.0, retries: int = 2,
+                        defaults: Optional[Dict[str, Any]] = None, skip: Optional[set] = None,
+                        on_result=None) -> List[Dict[str, Any]]:
+        """Creates many sessions concurrently, resolving each repo once (see ``jules_batch``)."""
+        from jules_batch import create_sessions
+        return create_sessions(self, specs, max_workers=max_workers, requests_per_second=requests_per_second,
+                               retries=retries, defaults=defaults, skip=skip, on_result=on_result)
 
     def list_sessions(self, page_size: int = 30, page_token: Optional[str] = None) -> Dict[str, Any]:
         """Lists all sessions for the authenticated user."""
-        url = f"{self.BASE_URL}/sessions"
-        params = {"pageSize": page_size}
-        if page_token:
-            params["pageToken"] = page_token
-            
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error listing sessions:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        return self._send(self._list_sessions_request(page_size, page_token)).json()
 
     def get_session(self, session_id: str) -> Dict[str, Any]:
         """Retrieves a single session by ID."""
-        url = f"{self.BASE_URL}/sessions/{session_id}"
-        try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error getting session:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        return self._send(self._get_session_request(session_id)).json()
 
     def delete_session(self, session_id: str) -> bool:
         """Deletes a session."""
-        url = f"{self.BASE_URL}/sessions/{session_id}"
-        try:
-            response = requests.delete(url, headers=self.headers)
-            response.raise_for_status()
-            return True
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error deleting session:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        self._send(self._delete_session_request(session_id))
+        return True
 
     def send_message(self, session_id: str, message: str) -> Dict[str, Any]:
         """Sends a message from the user to an active session."""
-        url = f"{self.BASE_URL}/sessions/{session_id}:sendMessage"
-        payload = {"prompt": message}
-        
-        try:
-            response = requests.post(url, headers=self.headers, json=payload)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error sending message:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        return self._send(self._send_message_request(session_id, message)).json()
 
     def approve_plan(self, session_id: str) -> Dict[str, Any]:
         """Approves a pending plan in a session."""
-        url = f"{self.BASE_URL}/sessions/{session_id}:approvePlan"
-        
-        try:
-            response = requests.post(url, headers=self.headers, json={})
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error approving plan:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        return self._send(self._approve_plan_request(session_id)).json()
 
     def list_activities(self, session_id: str, page_size: int = 50, 
                        page_token: Optional[str] = None,
                        create_time: Optional[str] = None) -> Dict[str, Any]:
         """Lists all activities for a session."""
-        url = f"{self.BASE_URL}/sessions/{session_id}/activities"
-        params = {"pageSize": page_size}
-        if page_token:
-            params["pageToken"] = page_token
-        if create_time:
-            params["createTime"] = create_time
-            
-        try:
-            response = requests.get(url, headers=self.headers, params=params)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error listing activities:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        request = self._list_activities_request(session_id, page_size, page_token, create_time)
+        return self._send(request).json()
 
     def get_activity(self, session_id: str, activity_id: str) -> Dict[str, Any]:
         """Retrieves a single activity by ID."""
-        url = f"{self.BASE_URL}/sessions/{session_id}/activities/{activity_id}"
-        try:
-            response = requests.get(url, headers=self.headers)
-            response.raise_for_status()
-            return response.json()
-        except requests.exceptions.RequestException as e:
-            self._print(f"[bold red]Error getting activity:[/bold red] {e}")
-            if hasattr(e, 'response') and e.response is not None:
-                self._print(f"Details: {e.response.content.decode()}")
-            raise
+        return self._send(self._get_activity_request(session_id, activity_id)).json()
 
-    def poll_session(self, session_name: str, plain: bool = False, timeout: int = 300):
-        """Polls the session for activities and status updates."""
-        activities_url = f"{self.BASE_URL}/{session_name}/activities"
-        session_url = f"{self.BASE_URL}/{session_name}"
-        
-        seen_activities = set()
+    def _iter_pages(self, build, key: str, page_token: Optional[str] = None,
+                    prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Yields items from every page, following nextPageToken lazily.
+
+        With ``prefetch`` the next page is requested in the background while
+        the current one is consumed, so at most two pages are held in memory.
+        """
+        fetch = in_scope(lambda token: self._send(build(token)).json())
+        if not prefetch:
+            while True:
+                data = fetch(page_token)
+                yield from data.get(key, [])
+                page_token = data.get("nextPageToken")
+                if not page_token:
+                    return
+
+        with ThreadPoolExecutor(max_workers=1) as pool:
+            pending = pool.submit(fetch, page_token)
+            while pending is not None:
+                data = pending.result()
+                page_token = data.get("nextPageToken")
+                pending = pool.submit(fetch, page_token) if page_token else None
+                yield from data.get(key, [])
+
+    def iter_sessions(self, page_size: int = 30, page_token: Optional[str] = None,
+                      prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Iterates over all sessions, fetching pages lazily."""
+        return self._iter_pages(lambda token: self._list_sessions_request(page_size, token),
+                                "sessions", page_token, prefetch)
+
+    def iter_sources(self, page_size: int = 30, filter_expr: Optional[str] = None,
+                     page_token: Optional[str] = None, prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Iterates over all connected sources, fetching pages lazily."""
+        return self._iter_pages(lambda token: self._list_sources_request(page_size, token, filter_expr),
+                                "sources", page_token, prefetch)
+
+    def iter_activities(self, session_id: str, page_size: int = 50, create_time: Optional[str] = None,
+                        page_token: Optional[str] = None, prefetch: bool = False) -> Iterator[Dict[str, Any]]:
+        """Iterates over a session's activities, fetching pages lazily."""
+        return self._iter_pages(
+            lambda token: self._list_activities_request(session_id, page_size, token, create_time),
+            "activities", page_token, prefetch)
+
+    def fetch_new_activities(self, session_name: str, cursor: ActivityCursor, page_size: int = 50,
+                             limiter: Optional["RateLimiter"] = None) -> List[Dict[str, Any]]:
+        """Fetches only activities newer than ``cursor``, oldest first, and advances it.
+
+        Asks the API for activities after the cursor's ``createTime`` and follows
+        ``nextPageToken`` when a burst spans several pages. Errors propagate to the caller.
+        """
+        activities = []
+        page_token = None
+        while True:
+            if limiter:
+                limiter.acquire()
+            request = self._list_activities_request(session_name, page_size, page_token, cursor.create_time)
+            data = self._send(request, report=False).json()
+            activities.extend(data.get("activities", []))
+            page_token = data.get("nextPageToken")
+            if not page_token:
+                break
+
+        return self._accept_new_activities(activities, cursor)
+
+    def poll_session(self, session_name: str, plain: bool = False, timeout: int = 300,
+                     min_interval: float = 1.0, max_interval: float = 30.0,
+                     records: Optional[RecordWriter] = None,
+                     checkpoint: Optional["PollCheckpoint"] = None, store=None) -> Dict[str, int]:
+        """Polls the session for activities and status updates.
+
+        The activities list is only fetched when the session's state or
+        ``updateTime`` changed since the last tick. With ``records`` set,
+        activities, the final state and outputs are streamed as JSON Lines
+        instead. With ``checkpoint`` set, polling starts after the activities
+        it records and it is saved after every tick and on interrupt, so a
+        later call continues without replaying anything. With ``store`` (a
+        ``JulesStore``) set, new activities are also written to it, so search
+        sees them before the next sync. Returns the scheduler's counters
+        (ticks, fetches made/skipped, throttled responses).
+        """
+        poller = SessionPoller(self, session_name, min_interval, max_interval)
+        session_id = _resource_id(poller.session_name)
         start_time = time.time()
+        if checkpoint:
+            checkpoint.resume(poller)
+
+        def emitted(activity):
+            if checkpoint:
+                checkpoint.cursor.accept(activity)
+
+        def save_checkpoint(drained: bool):
+            if checkpoint:
+                checkpoint.state = poller.state
+                # The marker may only skip a fetch if everything fetched was also emitted
+                checkpoint.marker = poller._last_marker if drained else None
+                checkpoint.save()
         
-        def run_polling(live_ctx=None):
+        def run_polling(live_ctx=None, view=None):
             while True:
                 if time.time() - start_time > timeout:
                     msg = f"Polling timed out after {timeout}s."
-                    if live_ctx: live_ctx.update(f"[red]{msg}[/red]")
+                    if checkpoint:
+                        msg += f" Continue with: jules_client.py follow --session-id {session_id}"
+                    if records: records.emit("timeout", {"session": session_id, "seconds": timeout})
+                    elif view: view.notice(msg, "red")
                     else: print(msg)
                     break
 
-                # 1. Check Session Status
+                # 1. Check session status, then fetch only activities newer than the cursor
                 try:
-                    sess_resp = requests.get(session_url, headers=self.headers)
-                    sess_resp.raise_for_status()
-                    session_data = sess_resp.json()
-                    state = session_data.get("state", "STATE_UNSPECIFIED")
+                    new_activities = poller.tick()
                 except Exception as e:
-                    if live_ctx: live_ctx.update(f"[red]Error checking status: {e}[/red]")
+                    if records: records.emit("error", {"session": session_id, "message": f"Error checking status: {e}"})
+                    elif view: view.notice(f"Error checking status: {e}", "red")
                     else: print(f"Error checking status: {e}")
                     break
+                session_data = poller.session_data
+                state = poller.state
+                if store and new_activities:
+                    store.upsert_activities(poller.session_name, new_activities)
+                if view:
+                    view.set_state(state)
+                if poller.last_error:
+                    warning = f"Activity fetch failed, retrying next poll: {poller.last_error}"
+                    if records: records.emit("error", {"session": session_id, "message": warning})
+                    elif view: view.notice(warning)
+                    else: print(warning)
 
-                # 2. Fetch Activities
-                try:
-                    act_resp = requests.get(activities_url, headers=self.headers)
-                    act_resp.raise_for_status()
-                    activities = act_resp.json().get("activities", [])
+                # 2. Show new activities
+                for activity in new_activities:
+                    description = activity.get("description", "No description")
+                    originator = activity.get("originator", "SYSTEM")
                     
-                    # Sort by creation time if available
-                    activities.sort(key=lambda x: x.get("createTime", ""), reverse=False)
-
-                    for activity in activities:
-                        act_id = activity.get("id", "unknown")
-                        if act_id not in seen_activities:
-                            description = activity.get("description", "No description")
-                            originator = activity.get("originator", "SYSTEM")
-                            
-                            if live_ctx:
-                                # Update the live display with the latest activity
-                                live_ctx.update(Panel(Markdown(description), title=f"[bold {('green' if originator == 'AGENT' else 'blue')}]{originator}[/bold]"))
-                                console.print(f"[{time.strftime('%H:%M:%S')}] {description}")
-                            else:
-                                print(f"[{time.strftime('%H:%M:%S')}] {originator}: {description}")
-
-                            seen_activities.add(act_id)
-
-                except Exception:
-                    pass # Transient network errors shouldn't crash the loop immediately
+                    if records:
+                        if not records.emit("activity", activity_record(activity)):
+                            save_checkpoint(False)
+                            return
+                    elif view:
+                        # Drawn by the next frame; a burst costs one redraw, not one per activity
+                        view.add(activity)
+                    else:
+                        print(f"[{time.strftime('%H:%M:%S')}] {originator}: {description}")
+                    emitted(activity)
+                save_checkpoint(not poller.last_error)
+
+                if records and state in STOP_STATES:
+                    records.emit("state", {"session": session_id, "state": state, "url": session_data.get("url")})
+                    if state == "COMPLETED" and "outputs" in session_data:
+                        self.display_outputs(session_data["outputs"], records=records, session_id=session_id)
+                    break
 
                 # 3. Handle Terminal States
-                if state in ["COMPLETED", "FAILED", "CANCELLED"]:
+                if state in TERMINAL_STATES:
                     if live_ctx:
+                        from rich.panel import Panel
                         live_ctx.stop()
                         console.print(Panel(f"Session finished with state: [bold]{state}[/bold]", style="green" if state == "COMPLETED" else "red"))
                     else:
@@ -318,27 +1094,144 @@ class JulesClient:
                         print(f"Please visit the web URL to interact: {session_data.get('url', 'URL not found')}")
                     break
 
-                time.sleep(2) # Poll interval
+                remaining = timeout - (time.time() - start_time)
+                _pause(max(0.0, min(poller.scheduler.next_delay(), remaining)))
 
-        if plain:
-            run_polling()
-        else:
-            with Live(Spinner("dots", text="Jules is thinking...", style="cyan"), refresh_per_second=4) as live:
-                run_polling(live)
+        try:
+            if plain or records:
+                run_polling()
+            else:
+                from rich.live import Live
+                from jules_live import FRAMES_PER_SECOND, ActivityView
+                view = ActivityView(session_id)
+                with Live(view, refresh_per_second=FRAMES_PER_SECOND) as live:
+                    run_polling(live, view)
+        except KeyboardInterrupt:
+            # Ctrl-C can land between fetching and emitting; keep only what was shown
+            save_checkpoint(False)
+            raise
+        return poller.scheduler.stats
+
+    def watch_sessions(self, session_ids: List[str], plain: bool = False, timeout: int = 300,
+                       max_workers: int = 8, requests_per_second: float = 5.0,
+                       min_interval: float = 1.0, max_interval: float = 30.0,
+                       records: Optional[RecordWriter] = None) -> Dict[str, Optional[str]]:
+        """Polls many sessions from one process and prints a single merged activity stream.
+
+        Due sessions are ticked on a bounded thread pool sharing this client's
+        connection pool, and every request draws from one global rate budget.
+        Each session drops out once it reaches a stop state. With ``records``
+        set the stream is JSON Lines, and watching stops once it is truncated.
+        Returns the last known state per session (None if it never answered),
+        keyed by full session name; an ID given twice in any form is polled once.
+        """
+        limiter = RateLimiter(requests_per_second, burst=max(1, max_workers))
+        pollers = {sid: SessionPoller(self, sid, min_interval, max_interval, limiter=limiter)
+                   for sid in dict.fromkeys(session_path(sid) for sid in session_ids)}
+        due = {sid: 0.0 for sid in pollers}
+        start_time = time.time()
+
+        def emit(sid, text, style=None):
+            label = sid.split("/")[-1]
+            line = f"[{time.strftime('%H:%M:%S')}] {label} {text}"
+            if plain: print(line)
+            else: console.print(line, style=style, markup=False, highlight=False)
+
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            running = {}
+            while due or running:
+                now = time.time()
+                if now - start_time > timeout or (records and records.truncated):
+                    if records and not records.truncated:
+                        records.emit("timeout", {"seconds": timeout, "active": len(due) + len(running)})
+                    elif not records:
+                        emit("watch", f"timed out after {timeout}s with {len(due) + len(running)} session(s) still active.", "red")
+                    for future in running:
+                        future.cancel()
+                    break
+
+                for sid in [sid for sid, at in due.items() if at <= now]:
+                    del due[sid]
+                    running[pool.submit(in_scope(pollers[sid].tick))] = sid
 
-    def display_outputs(self, outputs: List[Dict[str, Any]], plain: bool = False):
+                wait_for = min(due.values(), default=now + 1.0) - now
+                done, _ = wait(list(running), timeout=max(0.05, wait_for), return_when=FIRST_COMPLETED)
+                _raise_if_cancelled()
+                for future in done:
+                    sid = running.pop(future)
+                    poller = pollers[sid]
+                    try:
+                        new_activities = future.result()
+                    except Exception as e:
+                        if records: records.emit("error", {"session": _resource_id(sid), "message": f"error checking status: {e}"})
+                        else: emit(sid, f"error checking status: {e}", "red")
+                        continue
+
+                    if poller.last_error:
+                        warning = f"activity fetch failed, retrying next poll: {poller.last_error}"
+                        if records: records.emit("error", {"session": _resource_id(sid), "message": warning})
+                        else: emit(sid, warning, "yellow")
+
+                    for activity in new_activities:
+                        if records:
+                            records.emit("activity", dict(activity_record(activity), session=_resource_id(sid)))
+                            continue
+                        originator = activity.get("originator", "SYSTEM")
+                        emit(sid, f"{originator}: {activity.get('description', 'No description')}",
+                             "green" if originator.upper() == "AGENT" else None)
+
+                    if poller.state in STOP_STATES and records:
+                        records.emit("state", {"session": _resource_id(sid), "state": poller.state})
+                    elif poller.state in STOP_STATES:
+                        emit(sid, f"finished with state: {poller.state}",
+                             "yellow" if poller.state == "AWAITING_USER_FEEDBACK" else
+                             "green" if poller.state == "COMPLETED" else "red")
+                    else:
+                        due[sid] = time.time() + poller.scheduler.next_delay()
+
+        return {sid: poller.state for sid, poller in pollers.items()}
+
+    def digest_session(self, session_id: str, max_chars: int = 2000, messages: int = 3, store=None) -> str:
+        """Summarizes a session within ``max_chars``: state, plan progress, outputs,
+        the last ``messages`` agent messages and collapsed runs of repeated activity.
+
+        Folded state is cached on disk, so unchanged sessions cost one GET and
+        changed ones only fetch their new activities (see ``jules_digest``). Fetched
+        activities are also written to ``store`` when one is given.
+        """
+        from jules_digest import digest_session
+        return digest_session(self, session_id, max_chars=max_chars, messages=messages, store=store)
+
+    def download_outputs(self, session_id: str, directory: Optional[str] = None, reset: bool = False):
+        """Writes the session's changesets to ``directory`` as patch files, with an
+        ``index.json`` of per-file change stats and pull request metadata.
+
+        Only activities newer than the previous download are fetched (see ``jules_outputs``).
+        """
+        from jules_outputs import download_outputs
+        return download_outputs(self, session_id, directory, reset=reset)
+
+    def display_outputs(self, outputs: List[Dict[str, Any]], plain: bool = False,
+                        records: Optional[RecordWriter] = None, session_id: Optional[str] = None):
         """Displays output artifacts or diffs."""
+        if records:
+            for output in outputs:
+                if not records.emit("output", dict(output_record(output), session=session_id)):
+                    return
+            return
+
         if plain:
             print("\n--- Session Outputs ---")
             for output in outputs:
                 if "pullRequest" in output:
                     print(f"Type: Pull Request | URL: {output['pullRequest'].get('url', 'No URL')}")
                 elif "fileChange" in output:
-                    print(f"Type: File Change | Details: Modified files available in session context")
+                    print("Type: File Change | Details: Download as patch files with the outputs command")
                 else:
                     print(f"Type: Unknown | Details: {output}")
             return
 
+        from rich.table import Table
         table = Table(title="Session Outputs")
         table.add_column("Type", style="cyan")
         table.add_column("Details", style="white")
@@ -353,13 +1246,240 @@ class JulesClient:
                 details = output["pullRequest"].get("url", "No URL")
             elif "fileChange" in output:
                 output_type = "File Change"
-                details = f"Modified files available in session context"
+                details = "Download as patch files with the outputs command"
 
             table.add_row(output_type, details)
 
         console.print(table)
 
-def main():
+def default_checkpoint_path(api_key: str, session_name: str) -> str:
+    return os.path.join(cache_dir(), f"checkpoints-{account_key(api_key)}",
+                        f"{_resource_id(session_path(session_name))}.json")
+
+
+class PollCheckpoint:
+    """On-disk resume point for following one session.
+
+    Holds a cursor over the activities already emitted (not merely fetched),
+    the last seen state, and the ``(state, updateTime)`` marker of the last
+    fully emitted tick, which lets a resumed poll skip the activities fetch
+    when nothing changed.
+    """
+
+    def __init__(self, path: str, cursor: Optional[ActivityCursor] = None, state: Optional[str] = None,
+                 marker: Optional[List[Optional[str]]] = None):
+        self.path = path
+        self.cursor = cursor or ActivityCursor()
+        self.state = state
+        self.marker = tuple(marker) if marker else None
+        self._saved = None
+
+    @classmethod
+    def load(cls, path: str) -> "PollCheckpoint":
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return cls(path) # Missing or corrupt: start from the beginning
+        checkpoint = cls(path, ActivityCursor(data.get("createTime"), data.get("boundaryIds")),
+                         data.get("state"), data.get("marker"))
+        checkpoint._saved = data
+        return checkpoint
+
+    def save(self):
+        """Writes the checkpoint atomically, skipping the write if nothing changed."""
+        data = {
+            "createTime": self.cursor.create_time,
+            "boundaryIds": sorted(self.cursor.boundary_ids),
+            "state": self.state,
+            "marker": list(self.marker) if self.marker else None,
+        }
+        if data != self._saved and atomic_write_json(self.path, data):
+            self._saved = data
+
+    def resume(self, poller: "PollState"):
+        """Starts ``poller`` where this checkpoint left off."""
+        poller.cursor = ActivityCursor(self.cursor.create_time, list(self.cursor.boundary_ids))
+        poller.state = self.state
+        poller._last_marker = self.marker
+
+
+class PollState:
+    """Transport-agnostic decisions of one session's poll loop: cursor, change marker and schedule.
+
+    ``SessionPoller.tick`` and ``AsyncJulesClient.poll_session`` do the I/O and
+    report each step here, so both pollers skip, count and back off the same way.
+    """
+
+    def __init__(self, session_name: str, min_interval: float = 1.0, max_interval: float = 30.0,
+                 cursor: Optional[ActivityCursor] = None):
+        self.session_name = session_path(session_name)
+        self.cursor = cursor or ActivityCursor()
+        self.scheduler = PollScheduler(min_interval, max_interval)
+        self.session_data: Optional[Dict[str, Any]] = None
+        self.state: Optional[str] = None
+        self.last_error: Optional[Exception] = None
+        self._last_marker = None
+        self._marker = None
+        self._previous_state = None
+
+    def session_throttled(self, response):
+        """The session fetch got a 429: nothing else happens this tick."""
+        self.scheduler.throttle(retry_after_seconds(response))
+
+    def should_fetch(self, session_data: Dict[str, Any]) -> bool:
+        """Takes the tick's session; True if its activities may have changed since the last successful fetch."""
+        self.session_data = session_data
+        self._previous_state = self.state
+        self.state = session_data.get("state", "STATE_UNSPECIFIED")
+        self._marker = (self.state, session_data.get("updateTime"))
+        self.last_error = None
+        fetch = self._marker != self._last_marker or self._marker[1] is None
+        self.scheduler.stats["activity_fetches" if fetch else "activity_fetches_skipped"] += 1
+        return fetch
+
+    def fetched(self):
+        """The activities fetch succeeded; the next one waits for the session to change."""
+        self._last_marker = self._marker
+
+    def fetch_failed(self, error: Exception, response=None):
+        """The activities fetch failed after retries: kept in ``last_error``, counted, and repeated next tick."""
+        self.last_error = error
+        self.scheduler.stats["errors"] += 1
+        if response is not None and response.status_code == 429:
+            self.scheduler.throttle(retry_after_seconds(response))
+
+    def finish(self, new_activities: List[Dict[str, Any]], fetched: bool, seconds: float):
+        """Records the tick and picks the next interval."""
+        METRICS.record_poll_tick(self.session_name, seconds, len(new_activities), fetched)
+        self.scheduler.record(bool(new_activities) or self.state != self._previous_state)
+
+
+class SessionPoller(PollState):
+    """Polling state for one session, polled with the sync client.
+
+    Shared by ``poll_session`` and ``watch_sessions``; callers own the loop and
+    sleep ``scheduler.next_delay()`` between ticks.
+    """
+
+    def __init__(self, client: JulesClient, session_name: str, min_interval: float = 1.0,
+                 max_interval: float = 30.0, cursor: Optional[ActivityCursor] = None,
+                 limiter: Optional[RateLimiter] = None):
+        super().__init__(session_name, min_interval, max_interval, cursor)
+        self.client = client
+        self.limiter = limiter
+
+    def tick(self) -> List[Dict[str, Any]]:
+        """Runs one poll step and returns the new activities, oldest first.
+
+        Raises if the session itself can't be fetched. If the activities fetch
+        still fails after the client's retries, the error is kept in
+        ``last_error`` (and counted) and the fetch is repeated on the next tick.
+        """
+        import requests
+
+        client = self.client
+        if self.limiter:
+            self.limiter.acquire()
+        start = time.perf_counter()
+        try:
+            session_data = client._send(client._get_session_request(self.session_name), report=False).json()
+        except requests.exceptions.HTTPError as e:
+            if e.response is not None and e.response.status_code == 429:
+                self.session_throttled(e.response)
+                return []
+            raise
+
+        # Only list activities when the session changed since the last successful fetch
+        new_activities = []
+        fetched = self.should_fetch(session_data)
+        if fetched:
+            try:
+                new_activities = client.fetch_new_activities(self.session_name, self.cursor,
+                                                             limiter=self.limiter)
+                self.fetched()
+            except requests.exceptions.RequestException as e:
+                self.fetch_failed(e, getattr(e, "response", None))
+
+        self.finish(new_activities, fetched, time.perf_counter() - start)
+        return new_activities
+
+
+def _detect_command(argv: List[str]) -> Optional[str]:
+    """Returns the subcommand named in argv, skipping values of global options."""
+    skip = False
+    for token in argv:
+        if skip:
+            skip = False
+        elif token in ("--api-key", "--timeout", "--poll-min", "--poll-max",
+                       "--format", "--fields", "--max-records", "--max-bytes", "--trace"):
+            skip = True
+        elif not token.startswith("-"):
+            return token
+    return None
+
+
+def _add_paging_args(subparser: argparse.ArgumentParser):
+    subparser.add_argument("--page-token", help="Start from this page token")
+    subparser.add_argument("--all", action="store_true", help="Follow every page, streaming results")
+    subparser.add_argument("--limit", type=int, help="Stop after this many results (implies paging)")
+
+
+def _add_store_args(subparser: argparse.ArgumentParser):
+    subparser.add_argument("--local", action="store_true", help="Answer only from the local store (see sync)")
+    subparser.add_argument("--max-age", type=float,
+                           help="Use the local store if synced within this many seconds, else the API")
+
+
+def _add_selection_args(subparser: argparse.ArgumentParser):
+    subparser.add_argument("--state", dest="states", action="append",
+                           help="Only sessions in this state (repeatable)")
+    subparser.add_argument("--older-than", help="Only sessions created at least this long ago (e.g. 3600, 12h, 7d)")
+    subparser.add_argument("--title", help="Only sessions whose title matches this regex (case-insensitive)")
+    subparser.add_argument("--repo", help="Only sessions on this repository (owner/repo)")
+    subparser.add_argument("--workers", type=int, default=8, help="Max concurrent requests (default: 8)")
+    subparser.add_argument("--rps", type=float, default=10.0, help="Global request budget per second (default: 10)")
+    subparser.add_argument("--dry-run", action="store_true", help="List the selected sessions without changing them")
+
+
+# Bulk lifecycle commands: (verb for the report, default states, default excluded states)
+BULK_COMMANDS = {
+    "prune": ("Deleted", TERMINAL_STATES, None),
+    "approve-all": ("Approved", ("AWAITING_PLAN_APPROVAL",), None),
+    "broadcast": ("Messaged", None, TERMINAL_STATES),
+}
+
+
+def build_parser(command: Optional[str] = None) -> argparse.ArgumentParser:
+    """Builds the CLI parser. With ``command`` set, only that subcommand's arguments are registered."""
+    def wanted(name: str) -> bool:
+        return command is None or name == command
+
+    # Global options are also accepted after the subcommand (e.g. ``create --plain``).
+    # SUPPRESS keeps a subcommand's unset copy from overwriting a value given before it.
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument("--api-key", default=argparse.SUPPRESS, help="Jules API Key")
+    common.add_argument("--plain", action="store_true", default=argparse.SUPPRESS,
+                        help="Output plain text instead of Rich-formatted UI")
+    common.add_argument("--timeout", type=int, default=argparse.SUPPRESS,
+                        help="Max polling time in seconds (default: 300)")
+    common.add_argument("--poll-min", type=float, default=argparse.SUPPRESS,
+                        help="Shortest poll interval in seconds (default: 1)")
+    common.add_argument("--poll-max", type=float, default=argparse.SUPPRESS,
+                        help="Longest idle poll interval in seconds (default: 30)")
+    common.add_argument("--format", choices=("text", "jsonl"), default=argparse.SUPPRESS,
+                        help="Output format; jsonl streams one JSON record per line (default: text)")
+    common.add_argument("--fields", default=argparse.SUPPRESS,
+                        help="Comma-separated fields to keep in each jsonl record (e.g. id,state,title)")
+    common.add_argument("--max-records", type=int, default=argparse.SUPPRESS,
+                        help="Stop jsonl output after this many records")
+    common.add_argument("--max-bytes", type=int, default=argparse.SUPPRESS,
+                        help="Stop jsonl output before exceeding this many bytes")
+    common.add_argument("--stats", action="store_true", default=argparse.SUPPRESS,
+                        help="Print per-endpoint latency, retry and cache statistics to stderr on exit")
+    common.add_argument("--trace", default=argparse.SUPPRESS,
+                        help="Append one JSON line per API request and poll tick to this file")
+
     parser = argparse.ArgumentParser(
         description="Jules Terminal Client - Comprehensive API Interface",
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -374,104 +1494,300 @@ Examples:
     subparsers = parser.add_subparsers(dest="command", help="Command to execute")
     
     # Create session command
-    create_parser = subparsers.add_parser("create", help="Create a new session")
-    create_parser.add_argument("--prompt", required=True, help="Instruction for Jules")
-    create_parser.add_argument("--title", help="Optional session title")
-    create_parser.add_argument("--repo", help="Repository name (owner/repo)")
-    create_parser.add_argument("--branch", default="main", help="Starting branch (default: main)")
-    create_parser.add_argument("--context-file", help="Path to a file to include as context")
-    create_parser.add_argument("--require-approval", action="store_true", help="Require plan approval")
-    create_parser.add_argument("--auto-pr", action="store_true", help="Automatically create PR")
-    create_parser.add_argument("--no-poll", action="store_true", help="Don't poll for updates")
+    create_parser = subparsers.add_parser("create", help="Create a new session", parents=[common])
+    if wanted("create"):
+        create_parser.add_argument("--prompt", required=True, help="Instruction for Jules")
+        create_parser.add_argument("--title", help="Optional session title")
+        create_parser.add_argument("--repo", help="Repository name (owner/repo)")
+        create_parser.add_argument("--branch", default="main", help="Starting branch (default: main)")
+        create_parser.add_argument("--context-file", action="append",
+                                   help="File, directory or glob to include as context (repeatable; earlier ones win the budget)")
+        context_budget = create_parser.add_mutually_exclusive_group()
+        context_budget.add_argument("--context-max-bytes", type=int, default=100_000,
+                                    help="Byte budget for packed context (default: 100000)")
+        context_budget.add_argument("--context-max-tokens", type=int,
+                                    help="Approximate token budget for packed context (4 characters per token)")
+        create_parser.add_argument("--require-approval", action="store_true", help="Require plan approval")
+        create_parser.add_argument("--auto-pr", action="store_true", help="Automatically create PR")
+        create_parser.add_argument("--no-poll", action="store_true", help="Don't poll for updates")
+    
+    # Batch create command
+    batch_parser = subparsers.add_parser("batch-create", help="Create sessions from a JSONL/YAML manifest", parents=[common])
+    if wanted("batch-create"):
+        batch_parser.add_argument("--manifest", required=True, help="JSONL (one spec per line) or YAML list of session specs")
+        batch_parser.add_argument("--results", help="JSONL results/checkpoint file (default: <manifest>.results.jsonl)")
+        batch_parser.add_argument("--workers", type=int, default=4, help="Max concurrent creates (default: 4)")
+        batch_parser.add_argument("--rps", type=float, default=2.0, help="Create requests per second (default: 2)")
+        batch_parser.add_argument("--retries", type=int, default=2, help="Retries per spec on throttling/5xx (default: 2)")
+        batch_parser.add_argument("--repo", help="Repository for specs that don't name one")
+        batch_parser.add_argument("--branch", help="Starting branch for specs that don't name one (default: main)")
+        batch_parser.add_argument("--require-approval", action="store_true", help="Require plan approval by default")
+        batch_parser.add_argument("--auto-pr", action="store_true", help="Automatically create PRs by default")
+        batch_parser.add_argument("--no-resume", action="store_true",
+                                  help="Create every spec even if the results file already records a session for it")
     
     # List sessions command
-    list_sessions_parser = subparsers.add_parser("list-sessions", help="List all sessions")
-    list_sessions_parser.add_argument("--page-size", type=int, default=30, help="Number of sessions to return")
+    list_sessions_parser = subparsers.add_parser("list-sessions", help="List all sessions", parents=[common])
+    if wanted("list-sessions"):
+        list_sessions_parser.add_argument("--page-size", type=int, default=30, help="Number of sessions to return")
+        _add_paging_args(list_sessions_parser)
+        _add_store_args(list_sessions_parser)
+    
+    # Bulk lifecycle commands
+    prune_parser = subparsers.add_parser("prune", help="Delete every matching session (default: finished ones)", parents=[common])
+    if wanted("prune"):
+        _add_selection_args(prune_parser)
+        prune_parser.add_argument("--yes", action="store_true",
+                                  help="Confirm pruning every finished session when no filter is given")
+    approve_all_parser = subparsers.add_parser("approve-all", help="Approve every pending plan that matches", parents=[common])
+    if wanted("approve-all"):
+        _add_selection_args(approve_all_parser)
+    broadcast_parser = subparsers.add_parser("broadcast", help="Send a message to every matching active session", parents=[common])
+    if wanted("broadcast"):
+        broadcast_parser.add_argument("--message", required=True, help="Message to send")
+        _add_selection_args(broadcast_parser)
     
     # Get session command
-    get_session_parser = subparsers.add_parser("get-session", help="Get session details")
-    get_session_parser.add_argument("--session-id", required=True, help="Session ID")
+    get_session_parser = subparsers.add_parser("get-session", help="Get session details", parents=[common])
+    if wanted("get-session"):
+        get_session_parser.add_argument("--session-id", required=True, help="Session ID")
+        _add_store_args(get_session_parser)
     
     # Delete session command
-    delete_session_parser = subparsers.add_parser("delete-session", help="Delete a session")
-    delete_session_parser.add_argument("--session-id", required=True, help="Session ID")
+    delete_session_parser = subparsers.add_parser("delete-session", help="Delete a session", parents=[common])
+    if wanted("delete-session"):
+        delete_session_parser.add_argument("--session-id", required=True, help="Session ID")
     
     # Send message command
-    send_message_parser = subparsers.add_parser("send-message", help="Send a message to a session")
-    send_message_parser.add_argument("--session-id", required=True, help="Session ID")
-    send_message_parser.add_argument("--message", required=True, help="Message to send")
+    send_message_parser = subparsers.add_parser("send-message", help="Send a message to a session", parents=[common])
+    if wanted("send-message"):
+        send_message_parser.add_argument("--session-id", required=True, help="Session ID")
+        send_message_parser.add_argument("--message", required=True, help="Message to send")
     
     # Approve plan command
-    approve_plan_parser = subparsers.add_parser("approve-plan", help="Approve a pending plan")
-    approve_plan_parser.add_argument("--session-id", required=True, help="Session ID")
+    approve_plan_parser = subparsers.add_parser("approve-plan", help="Approve a pending plan", parents=[common])
+    if wanted("approve-plan"):
+        approve_plan_parser.add_argument("--session-id", required=True, help="Session ID")
     
     # List activities command
-    list_activities_parser = subparsers.add_parser("list-activities", help="List session activities")
-    list_activities_parser.add_argument("--session-id", required=True, help="Session ID")
-    list_activities_parser.add_argument("--page-size", type=int, default=50, help="Number of activities to return")
+    list_activities_parser = subparsers.add_parser("list-activities", help="List session activities", parents=[common])
+    if wanted("list-activities"):
+        list_activities_parser.add_argument("--session-id", required=True, help="Session ID")
+        list_activities_parser.add_argument("--page-size", type=int, default=50, help="Number of activities to return")
+        _add_paging_args(list_activities_parser)
+        _add_store_args(list_activities_parser)
+    
+    # Digest command
+    digest_parser = subparsers.add_parser("digest", help="Bounded summary of a (long) session", parents=[common])
+    if wanted("digest"):
+        digest_parser.add_argument("--session-id", required=True, help="Session ID")
+        budget = digest_parser.add_mutually_exclusive_group()
+        budget.add_argument("--max-chars", type=int, default=2000, help="Character budget (default: 2000)")
+        budget.add_argument("--max-tokens", type=int, help="Approximate token budget (4 characters per token)")
+        digest_parser.add_argument("--messages", type=int, default=3, help="Latest agent messages to include (default: 3)")
+
+    # Outputs command
+    outputs_parser = subparsers.add_parser("outputs", parents=[common],
+                                           help="Download a session's changesets as patch files with per-file stats")
+    if wanted("outputs"):
+        outputs_parser.add_argument("--session-id", required=True, help="Session ID")
+        outputs_parser.add_argument("--output-dir", help="Directory for the patches and index.json (default: one per session in the cache dir)")
+        outputs_parser.add_argument("--files", action="store_true", help="List per-file stats of each patch")
+        outputs_parser.add_argument("--reset", action="store_true", help="Ignore the saved index and download everything again")
     
     # Get activity command
-    get_activity_parser = subparsers.add_parser("get-activity", help="Get activity details")
-    get_activity_parser.add_argument("--session-id", required=True, help="Session ID")
-    get_activity_parser.add_argument("--activity-id", required=True, help="Activity ID")
+    get_activity_parser = subparsers.add_parser("get-activity", help="Get activity details", parents=[common])
+    if wanted("get-activity"):
+        get_activity_parser.add_argument("--session-id", required=True, help="Session ID")
+        get_activity_parser.add_argument("--activity-id", required=True, help="Activity ID")
     
     # List sources command
-    list_sources_parser = subparsers.add_parser("list-sources", help="List all connected sources")
-    list_sources_parser.add_argument("--page-size", type=int, default=30, help="Number of sources to return")
-    list_sources_parser.add_argument("--filter", help="Filter expression")
+    list_sources_parser = subparsers.add_parser("list-sources", help="List all connected sources", parents=[common])
+    if wanted("list-sources"):
+        list_sources_parser.add_argument("--page-size", type=int, default=30, help="Number of sources to return")
+        list_sources_parser.add_argument("--filter", help="Filter expression")
+        _add_paging_args(list_sources_parser)
     
     # Get source command
-    get_source_parser = subparsers.add_parser("get-source", help="Get source details")
-    get_source_parser.add_argument("--source-id", required=True, help="Source ID")
+    get_source_parser = subparsers.add_parser("get-source", help="Get source details", parents=[common])
+    if wanted("get-source"):
+        get_source_parser.add_argument("--source-id", required=True, help="Source ID")
+    
+    # Sync command
+    sync_parser = subparsers.add_parser("sync", help="Incrementally sync sessions and activities into the local store", parents=[common])
+    if wanted("sync"):
+        sync_parser.add_argument("--session-id", dest="session_ids", action="append",
+                                 help="Only sync this session (repeatable; default: all sessions)")
+        sync_parser.add_argument("--sources", action="store_true", help="Also sync connected sources")
+    
+    # Search command
+    search_parser = subparsers.add_parser("search", help="Full-text search over locally synced sessions and activities", parents=[common])
+    if wanted("search"):
+        search_parser.add_argument("query", help="Words to search for")
+        search_parser.add_argument("--session-id", help="Only search within this session")
+        search_parser.add_argument("--limit", type=int, default=20, help="Max hits to return (default: 20)")
+        search_parser.add_argument("--raw", action="store_true", help="Treat the query as FTS5 syntax")
+        search_parser.add_argument("--sync", action="store_true", help="Sync the local store before searching")
+    
+    # Follow command
+    follow_parser = subparsers.add_parser("follow", aliases=["resume"], parents=[common],
+                                          help="Keep polling a session from its saved checkpoint, emitting only unseen activities")
+    if wanted("follow") or wanted("resume"):
+        follow_parser.add_argument("--session-id", required=True, help="Session ID")
+        follow_parser.add_argument("--checkpoint", help="Checkpoint file (default: one per session in the cache dir)")
+        follow_parser.add_argument("--reset", action="store_true", help="Ignore the saved checkpoint and start from the beginning")
+
+    # Watch command
+    watch_parser = subparsers.add_parser("watch", help="Stream activities from several sessions at once", parents=[common])
+    if wanted("watch"):
+        watch_parser.add_argument("--session-id", dest="session_ids", action="append", required=True,
+                                  help="Session ID (repeat for each session)")
+        watch_parser.add_argument("--workers", type=int, default=8, help="Max concurrent requests (default: 8)")
+        watch_parser.add_argument("--rps", type=float, default=5.0, help="Global request budget per second (default: 5)")
+    
+    # Daemon command
+    daemon_parser = subparsers.add_parser("daemon", help="Serve commands over a Unix socket (see jules_shim.py)", parents=[common])
+    if wanted("daemon"):
+        daemon_parser.add_argument("--socket", default=default_socket_path(), help="Unix socket path")
     
     # Global arguments
     parser.add_argument("--api-key", help="Jules API Key")
     parser.add_argument("--plain", action="store_true", help="Output plain text instead of Rich-formatted UI")
     parser.add_argument("--timeout", type=int, default=300, help="Max polling time in seconds (default: 300)")
-    
-    args = parser.parse_args()
+    parser.add_argument("--poll-min", type=float, default=1.0, help="Shortest poll interval in seconds (default: 1)")
+    parser.add_argument("--poll-max", type=float, default=30.0, help="Longest idle poll interval in seconds (default: 30)")
+    parser.add_argument("--format", choices=("text", "jsonl"), default="text",
+                        help="Output format; jsonl streams one JSON record per line (default: text)")
+    parser.add_argument("--fields", help="Comma-separated fields to keep in each jsonl record (e.g. id,state,title)")
+    parser.add_argument("--max-records", type=int, help="Stop jsonl output after this many records")
+    parser.add_argument("--max-bytes", type=int, help="Stop jsonl output before exceeding this many bytes")
+    parser.add_argument("--stats", action="store_true",
+                        help="Print per-endpoint latency, retry and cache statistics to stderr on exit")
+    parser.add_argument("--trace", help="Append one JSON line per API request and poll tick to this file")
+    return parser
+
+
+# Arguments holding file paths; the daemon resolves them against the caller's cwd
+PATH_ARGS = ("manifest", "results", "trace", "checkpoint", "output_dir")
+# Commands that write the activities they fetch through to the local store, once sync has created it
+STORE_WRITE_THROUGH = ("create", "follow", "resume", "list-activities", "digest")
+
+
+def main(argv: Optional[List[str]] = None, clients: Optional[Dict[Any, "JulesClient"]] = None,
+         cwd: Optional[str] = None, default_api_key: Optional[str] = None):
+    """Runs one CLI command.
+
+    The daemon passes its client cache in ``clients`` so connections and
+    parsed configuration survive across requests.
+    """
+    if argv is None:
+        argv = sys.argv[1:]
+    parser = build_parser(_detect_command(argv))
+    args = parser.parse_args(argv)
     
     if not args.command:
         parser.print_help()
         return
 
-    # Load environment variables
-    load_dotenv()
-    api_key = args.api_key or os.getenv("JULES_API_KEY")
+    if args.command == "daemon":
+        if clients is not None:
+            print("Error: already running inside the daemon.")
+            return
+        from jules_daemon import serve_daemon
+        serve_daemon(args.socket)
+        return
+
+    # --format jsonl: stream records instead of text, and never render rich output
+    records = None
+    if args.format == "jsonl":
+        fields = [field.strip() for field in args.fields.split(",") if field.strip()] if args.fields else None
+        records = RecordWriter(fields, args.max_records, args.max_bytes)
+        args.plain = True
+
+    if cwd:
+        for name in PATH_ARGS:
+            value = getattr(args, name, None)
+            if value and not os.path.isabs(value):
+                setattr(args, name, os.path.join(cwd, value))
+
+    # Load environment variables (the daemon already did this at startup)
+    if clients is None:
+        load_dotenv()
+    api_key = args.api_key or default_api_key or os.getenv("JULES_API_KEY")
 
     if not api_key:
-        if args.plain: print("Error: JULES_API_KEY not found in environment or arguments.")
+        if records: records.emit("error", {"message": "JULES_API_KEY not found in environment or arguments."})
+        elif args.plain: print("Error: JULES_API_KEY not found in environment or arguments.")
         else: console.print("[bold red]Error:[/bold red] JULES_API_KEY not found in environment or arguments.")
         return
 
-    client = JulesClient(api_key, plain=args.plain)
+    if clients is None:
+        client = JulesClient(api_key, plain=args.plain)
+    else:
+        key = (api_key, args.plain, records is not None)
+        client = clients.get(key)
+        if client is None:
+            client = clients.setdefault(key, JulesClient(api_key, plain=args.plain))
+    client.errors_to_stderr = records is not None
+
+    trace = METRICS.start_trace(args.trace) if args.trace else None
+    # A daemon runs many commands at once against one METRICS; --stats reports only this command's
+    command_metrics = METRICS.start_scope() if args.stats else None
+
+    # The local store is only opened when a command asks for it, or to write through once sync created it
+    store = None
+    from_store = False
+    if args.command in ("sync", "search") or getattr(args, "local", False) or getattr(args, "max_age", None) is not None:
+        from jules_store import JulesStore, default_store_path
+        store = JulesStore(default_store_path(api_key))
+        if args.command == "list-sessions":
+            from_store = args.local or store.synced_within("sessions", args.max_age)
+        elif args.command == "list-activities":
+            from_store = args.local or store.synced_within(session_path(args.session_id), args.max_age)
+    elif args.command in STORE_WRITE_THROUGH:
+        from jules_store import JulesStore, default_store_path
+        if os.path.exists(default_store_path(api_key)):
+            store = JulesStore(default_store_path(api_key))
 
     try:
         if args.command == "create":
             # Prepare Prompt
             full_prompt = args.prompt
             if args.context_file:
+                from jules_context import describe, pack_context
+                from jules_digest import CHARS_PER_TOKEN
+                max_bytes = args.context_max_tokens * CHARS_PER_TOKEN if args.context_max_tokens else args.context_max_bytes
                 try:
-                    with open(args.context_file, 'r') as f:
-                        context_content = f.read()
-                        full_prompt += f"\n\nContext from {args.context_file}:\n{context_content}"
-                except FileNotFoundError:
-                    if args.plain: print(f"Error: Context file {args.context_file} not found.")
-                    else: console.print(f"[bold red]Error:[/bold red] Context file {args.context_file} not found.")
+                    packed = pack_context(args.context_file, max_bytes=max_bytes, base=cwd)
+                except FileNotFoundError as e:
+                    if records: records.emit("error", {"message": str(e)})
+                    elif args.plain: print(f"Error: {e}")
+                    else: console.print(f"[bold red]Error:[/bold red] {e}")
                     return
+                if packed.text:
+                    full_prompt += f"\n\nContext:\n{packed.text}"
+                if records:
+                    # Everything but the text itself, which would defeat the point of capped output
+                    summary = {key: value for key, value in packed._asdict().items() if key != "text"}
+                    records.emit("context", dict(summary, bytes=len(packed.text.encode("utf-8"))))
+                elif args.plain: print(f"Context: {describe(packed)}")
+                else: console.print(f"[blue]Context: {describe(packed)}[/blue]", highlight=False)
 
             source_id = None
             if args.repo:
-                if args.plain: print(f"Resolving source for repo: {args.repo}...")
-                else: console.print(f"[blue]Resolving source for repo: {args.repo}...[/blue]")
+                if not records:
+                    if args.plain: print(f"Resolving source for repo: {args.repo}...")
+                    else: console.print(f"[blue]Resolving source for repo: {args.repo}...[/blue]")
                 source_id = client.get_source_id(args.repo)
-                if args.plain: print(f"Found source ID: {source_id}")
-                else: console.print(f"[green]Found source ID: {source_id}[/green]")
+                if not records:
+                    if args.plain: print(f"Found source ID: {source_id}")
+                    else: console.print(f"[green]Found source ID: {source_id}[/green]")
 
             automation_mode = "AUTO_CREATE_PR" if args.auto_pr else "AUTOMATION_MODE_UNSPECIFIED"
             
-            if args.plain: print("Initiating Jules session...")
-            else: console.print("[blue]Initiating Jules session...[/blue]")
+            if not records:
+                if args.plain: print("Initiating Jules session...")
+                else: console.print("[blue]Initiating Jules session...[/blue]")
             session = client.create_session(
                 prompt=full_prompt,
                 title=args.title,
@@ -484,7 +1800,9 @@ Examples:
             session_name = session.get("name")
             session_url = session.get("url")
 
-            if args.plain:
+            if records:
+                records.emit("session", session_record(session))
+            elif args.plain:
                 print(f"Session Created! ID: {session_name}")
                 if session_url: print(f"Web URL: {session_url}")
             else:
@@ -492,15 +1810,146 @@ Examples:
                 if session_url: console.print(f"Web URL: {session_url}")
             
             if not args.no_poll:
-                if args.plain: print("Streaming activities...")
-                else: console.print("[blue]Streaming activities...[/blue]")
-                client.poll_session(session_name, plain=args.plain, timeout=args.timeout)
+                if not records:
+                    if args.plain: print("Streaming activities...")
+                    else: console.print("[blue]Streaming activities...[/blue]")
+                client.poll_session(session_name, plain=args.plain, timeout=args.timeout,
+                                    min_interval=args.poll_min, max_interval=args.poll_max, records=records,
+                                    checkpoint=PollCheckpoint(default_checkpoint_path(api_key, session_name)),
+                                    store=store)
             
+        elif args.command == "batch-create":
+            from jules_batch import append_result, completed_keys, load_manifest
+            specs = load_manifest(args.manifest)
+            results_path = args.results or f"{args.manifest}.results.jsonl"
+            skip = set() if args.no_resume else completed_keys(results_path)
+            defaults = {key: value for key, value in (("repo", args.repo), ("branch", args.branch),
+                                                      ("require_approval", args.require_approval),
+                                                      ("auto_pr", args.auto_pr)) if value}
+            checkpoint = append_result(results_path)
+
+            def on_result(result):
+                checkpoint(result)
+                if records: records.emit("result", result)
+                elif result["status"] == "created":
+                    message = f"[created] {result['key']} -> {result['session']}"
+                    if args.plain: print(message)
+                    else: console.print(f"[green]{message}[/green]", highlight=False)
+                elif result["status"] == "failed":
+                    message = f"[failed] {result['key']}: {result['error']}"
+                    if args.plain: print(message)
+                    else: console.print(f"[red]{message}[/red]", highlight=False)
+
+            results = client.create_sessions(specs, max_workers=args.workers, requests_per_second=args.rps,
+                                             retries=args.retries, defaults=defaults, skip=skip,
+                                             on_result=on_result)
+            totals = {status: sum(1 for result in results if result["status"] == status)
+                      for status in ("created", "failed", "skipped")}
+            summary = (f"{totals['created']} created, {totals['failed']} failed, "
+                       f"{totals['skipped']} already done. Results: {results_path}")
+            if records: records.emit("summary", dict(totals, results=results_path))
+            elif args.plain: print(summary)
+            else: console.print(f"[bold]Batch finished:[/bold] {summary}")
+
+        elif args.command in BULK_COMMANDS:
+            from jules_batch import parse_duration, run_bulk, select_sessions
+            verb, default_states, default_excluded = BULK_COMMANDS[args.command]
+            if (args.command == "prune" and not (args.states or args.older_than or args.title or args.repo)
+                    and not (args.yes or args.dry_run)):
+                raise ValueError("prune without a filter deletes every finished session; "
+                                 "pass --older-than (or another filter), or --yes to confirm")
+            selected = [session["name"] for session in select_sessions(
+                client, states=args.states or default_states, exclude_states=None if args.states else default_excluded,
+                older_than=parse_duration(args.older_than) if args.older_than else None,
+                title=args.title, repo=args.repo)]
+
+            if args.dry_run or not selected:
+                for name in selected:
+                    if records: records.emit("session", {"name": name, "id": _resource_id(name)})
+                    else: print(name)
+                message = f"{len(selected)} session(s) selected" + (" (dry run, nothing changed)." if selected else ".")
+                if records: records.emit("summary", {"selected": len(selected), "dryRun": args.dry_run})
+                elif args.plain: print(message)
+                else: console.print(f"[yellow]{message}[/yellow]")
+                return
+
+            builders = {
+                "prune": client._delete_session_request,
+                "approve-all": client._approve_plan_request,
+                "broadcast": lambda name: client._send_message_request(name, args.message),
+            }
+
+            def on_result(result):
+                if records:
+                    records.emit("result", result)
+                    return
+                line = f"[{result['done']}/{result['total']}] {'ok' if result['ok'] else 'failed'} {result['session']}"
+                if result["error"]: line += f": {result['error']}"
+                if args.plain: print(line)
+                else: console.print(line, style=None if result["ok"] else "red", markup=False, highlight=False)
+
+            report = run_bulk(client, selected, builders[args.command], max_workers=args.workers,
+                              requests_per_second=args.rps, on_result=on_result)
+            summary = f"{verb} {report['ok']}/{report['total']} session(s), {report['failed']} failed."
+            if records: records.emit("summary", report)
+            elif args.plain: print(summary)
+            else: console.print(f"[bold]{summary}[/bold]")
+
+        elif args.command == "sync":
+            from jules_store import sync
+            stats = sync(client, store, session_ids=args.session_ids, include_sources=args.sources)
+            summary = (f"{stats['sessions']} sessions ({stats['sessions_synced']} updated, "
+                       f"{stats['sessions_unchanged']} unchanged), {stats['activities']} new activities"
+                       + (f", {stats['sources']} sources" if args.sources else ""))
+            if records: records.emit("sync", dict(stats, path=store.path))
+            elif args.plain: print(f"Synced {summary} into {store.path}")
+            else: console.print(f"[green]Synced[/green] {summary} into {store.path}")
+
+        elif args.command == "search":
+            if args.sync:
+                from jules_store import sync
+                sync(client, store, session_ids=[args.session_id] if args.session_id else None)
+            hits = store.search(args.query, limit=args.limit, session_name=args.session_id, raw=args.raw)
+            if not hits and not records:
+                if args.plain: print("No matches found.")
+                else: console.print("[yellow]No matches found.[/yellow]")
+            for hit in hits:
+                if records:
+                    hit["session"] = _resource_id(hit.pop("sessionName"))
+                    if not records.emit("hit", hit): break
+                    continue
+                location = hit["name"] if hit["kind"] == "activity" else hit["sessionName"]
+                text = hit["snippet"] if hit["kind"] == "activity" else f"{hit['title']}: {hit['snippet']}"
+                if args.plain: print(f"[{hit['score']}] {location} ({hit['kind']}): {text}")
+                else: console.print(f"[cyan]{location}[/cyan] [dim]({hit['kind']}, {hit['score']})[/dim] {text}",
+                                    highlight=False)
+
+        elif args.command == "list-sessions" and (args.all or args.limit) and not from_store:
+            count = 0
+            for s in islice(client.iter_sessions(args.page_size, args.page_token, prefetch=True), args.limit):
+                if records:
+                    if not records.emit("session", session_record(s)): break
+                elif args.plain: print(f"ID: {s.get('name')} | Title: {s.get('title')} | State: {s.get('state')}")
+                else: console.print(f"[cyan]{s.get('name')}[/cyan] {s.get('title')} [green]{s.get('state')}[/green]")
+                count += 1
+            if not count and not records:
+                if args.plain: print("No sessions found.")
+                else: console.print("[yellow]No sessions found.[/yellow]")
+
         elif args.command == "list-sessions":
-            result = client.list_sessions(page_size=args.page_size)
+            if from_store:
+                result = {"sessions": store.list_sessions(limit=args.limit or args.page_size)}
+            else:
+                result = client.list_sessions(page_size=args.page_size, page_token=args.page_token)
+                if store: store.upsert_sessions(result.get("sessions", []))
             sessions = result.get("sessions", [])
             
-            if not sessions:
+            if records:
+                for s in sessions:
+                    if not records.emit("session", session_record(s)): break
+                if "nextPageToken" in result:
+                    records.emit("page", {"nextPageToken": result["nextPageToken"]})
+            elif not sessions:
                 if args.plain: print("No sessions found.")
                 else: console.print("[yellow]No sessions found.[/yellow]")
             else:
@@ -509,6 +1958,7 @@ Examples:
                     for s in sessions:
                         print(f"ID: {s.get('name')} | Title: {s.get('title')} | State: {s.get('state')}")
                 else:
+                    from rich.table import Table
                     table = Table(title="Sessions")
                     table.add_column("ID", style="cyan")
                     table.add_column("Title", style="white")
@@ -526,56 +1976,150 @@ Examples:
                     console.print(table)
                 
                 if "nextPageToken" in result:
-                    if args.plain: print(f"\nMore results available. Use next page token: {result['nextPageToken']}")
+                    if args.plain: print(f"\nMore results available. Use --page-token={result['nextPageToken']} or --all")
                     else: console.print(f"\n[yellow]More results available. Use --page-token={result['nextPageToken']}[/yellow]")
         
         elif args.command == "get-session":
-            session = client.get_session(args.session_id)
-            print(json.dumps(session, indent=2))
+            session = None
+            if store:
+                session = store.get_session(args.session_id, max_age=None if args.local else args.max_age)
+            if session is None and args.local:
+                if records: records.emit("error", {"message": f"Session {args.session_id} not found in local store. Run sync first."})
+                elif args.plain: print(f"Session {args.session_id} not found in local store. Run sync first.")
+                else: console.print(f"[yellow]Session {args.session_id} not found in local store. Run sync first.[/yellow]")
+                return
+            if session is None:
+                session = client.get_session(args.session_id)
+                if store: store.upsert_sessions([session])
+            if records: records.emit("session", session_record(session, full=True))
+            else: print(json.dumps(session, indent=2))
         
         elif args.command == "delete-session":
             client.delete_session(args.session_id)
-            if args.plain: print(f"Session {args.session_id} deleted successfully.")
+            if records: records.emit("status", {"session": args.session_id, "event": "deleted"})
+            elif args.plain: print(f"Session {args.session_id} deleted successfully.")
             else: console.print(f"[green]Session {args.session_id} deleted successfully.[/green]")
         
         elif args.command == "send-message":
             client.send_message(args.session_id, args.message)
-            if args.plain: print(f"Message sent to session {args.session_id}")
+            if records: records.emit("status", {"session": args.session_id, "event": "message_sent"})
+            elif args.plain: print(f"Message sent to session {args.session_id}")
             else: console.print(f"[green]Message sent to session {args.session_id}[/green]")
         
         elif args.command == "approve-plan":
             client.approve_plan(args.session_id)
-            if args.plain: print(f"Plan approved for session {args.session_id}")
+            if records: records.emit("status", {"session": args.session_id, "event": "plan_approved"})
+            elif args.plain: print(f"Plan approved for session {args.session_id}")
             else: console.print(f"[green]Plan approved for session {args.session_id}[/green]")
         
         elif args.command == "list-activities":
-            result = client.list_activities(args.session_id, page_size=args.page_size)
-            activities = result.get("activities", [])
+            if from_store:
+                activities = store.list_activities(args.session_id, limit=args.limit)
+            elif args.all or args.limit:
+                activities = islice(client.iter_activities(args.session_id, args.page_size,
+                                                           page_token=args.page_token, prefetch=True), args.limit)
+            else:
+                result = client.list_activities(args.session_id, page_size=args.page_size, page_token=args.page_token)
+                activities = result.get("activities", [])
+            
+            count = 0
+            fetched = [] # Written through to the store in batches
+            for activity in activities:
+                if store and not from_store:
+                    fetched.append(activity)
+                    if len(fetched) >= 100:
+                        store.upsert_activities(args.session_id, fetched)
+                        fetched = []
+                if records:
+                    if not records.emit("activity", activity_record(activity)): break
+                    count += 1
+                    continue
+                originator = activity.get("originator", "system")
+                description = activity.get("description", "No description")
+                create_time = activity.get("createTime", "")
+                
+                if args.plain:
+                    print(f"[{create_time}] {originator.upper()}: {description}")
+                else:
+                    color = "green" if originator == "agent" else "blue" if originator == "user" else "white"
+                    console.print(f"[{color}][{create_time}] {originator.upper()}: {description}[/{color}]")
+                count += 1
             
-            if not activities:
+            if fetched:
+                store.upsert_activities(args.session_id, fetched)
+            if not count and not records:
                 if args.plain: print("No activities found.")
                 else: console.print("[yellow]No activities found.[/yellow]")
-            else:
-                for activity in activities:
-                    originator = activity.get("originator", "system")
-                    description = activity.get("description", "No description")
-                    create_time = activity.get("createTime", "")
-                    
-                    if args.plain:
-                        print(f"[{create_time}] {originator.upper()}: {description}")
-                    else:
-                        color = "green" if originator == "agent" else "blue" if originator == "user" else "white"
-                        console.print(f"[{color}][{create_time}] {originator.upper()}: {description}[/{color}]")
         
+        elif args.command == "digest":
+            from jules_digest import CHARS_PER_TOKEN
+            max_chars = args.max_tokens * CHARS_PER_TOKEN if args.max_tokens else args.max_chars
+            digest = client.digest_session(args.session_id, max_chars=max_chars, messages=args.messages, store=store)
+            if records: records.emit("digest", {"session": _resource_id(session_path(args.session_id)), "text": digest})
+            elif args.plain: print(digest)
+            else: console.print(digest, markup=False, highlight=False)
+        
+        elif args.command == "outputs":
+            index = client.download_outputs(args.session_id, args.output_dir, reset=args.reset)
+            summary = {"session": index.session, "state": index.state, "dir": index.directory,
+                       "patches": len(index.patches), "new": len(index.new), "latest": index.latest_patch(),
+                       "added": sum(p["added"] for p in index.patches),
+                       "removed": sum(p["removed"] for p in index.patches)}
+            if records:
+                for patch in index.new:
+                    fields = patch if args.files else {k: v for k, v in patch.items() if k != "files"}
+                    if not records.emit("patch", dict(fields, session=index.session, filesChanged=len(patch["files"]))):
+                        break
+                else:
+                    for pr in index.pull_requests:
+                        records.emit("output", dict(output_record({"pullRequest": pr}), session=index.session))
+                    records.emit("outputs", summary)
+            else:
+                lines = [f"Session {index.session}: {len(index.patches)} patch(es), {len(index.new)} new, "
+                         f"+{summary['added']} -{summary['removed']} in {index.directory}"]
+                for patch in index.new:
+                    lines.append(f"  {patch['file']}  +{patch['added']} -{patch['removed']}  "
+                                 f"{len(patch['files'])} file(s)  {patch['subject']}")
+                    if args.files:
+                        lines.extend(f"    {f['path']}  +{f['added']} -{f['removed']}"
+                                     f"{'' if f['status'] == 'modified' else '  (' + f['status'] + ')'}"
+                                     for f in patch["files"])
+                lines.extend(f"Pull Request: {pr.get('url', 'No URL')}" for pr in index.pull_requests)
+                if index.patches:
+                    lines.append(f"Apply the latest with: git apply {index.latest_patch()}")
+                if args.plain: print("\n".join(lines))
+                else: console.print("\n".join(lines), markup=False, highlight=False)
+
         elif args.command == "get-activity":
             activity = client.get_activity(args.session_id, args.activity_id)
-            print(json.dumps(activity, indent=2))
+            if records: records.emit("activity", activity_record(activity, full=True))
+            else: print(json.dumps(activity, indent=2))
         
+        elif args.command == "list-sources" and (args.all or args.limit):
+            count = 0
+            sources = client.iter_sources(args.page_size, args.filter, args.page_token, prefetch=True)
+            for s in islice(sources, args.limit):
+                github_repo = s.get("githubRepo", {})
+                if records:
+                    if not records.emit("source", source_record(s)): break
+                elif args.plain: print(f"Name: {s.get('name')} | Repo: {github_repo.get('owner')}/{github_repo.get('repo')}")
+                else: console.print(f"[cyan]{s.get('name')}[/cyan] {github_repo.get('owner')}/{github_repo.get('repo')}")
+                count += 1
+            if not count and not records:
+                if args.plain: print("No sources found.")
+                else: console.print("[yellow]No sources found.[/yellow]")
+
         elif args.command == "list-sources":
-            result = client.list_sources(page_size=args.page_size, filter_expr=args.filter)
+            result = client.list_sources(page_size=args.page_size, page_token=args.page_token,
+                                         filter_expr=args.filter)
             sources = result.get("sources", [])
             
-            if not sources:
+            if records:
+                for s in sources:
+                    if not records.emit("source", source_record(s)): break
+                if "nextPageToken" in result:
+                    records.emit("page", {"nextPageToken": result["nextPageToken"]})
+            elif not sources:
                 if args.plain: print("No sources found.")
                 else: console.print("[yellow]No sources found.[/yellow]")
             else:
@@ -585,6 +2129,7 @@ Examples:
                         github_repo = s.get("githubRepo", {})
                         print(f"Name: {s.get('name')} | Repo: {github_repo.get('owner')}/{github_repo.get('repo')}")
                 else:
+                    from rich.table import Table
                     table = Table(title="Connected Sources")
                     table.add_column("Name", style="cyan")
                     table.add_column("Owner/Repo", style="white")
@@ -607,16 +2152,51 @@ Examples:
 
                     console.print(table)
         
+        elif args.command in ("follow", "resume"):
+            path = args.checkpoint or default_checkpoint_path(api_key, args.session_id)
+            checkpoint = PollCheckpoint(path) if args.reset else PollCheckpoint.load(path)
+            if not records:
+                since = checkpoint.cursor.create_time or "the beginning"
+                if args.plain: print(f"Following session {args.session_id} from {since}...")
+                else: console.print(f"[blue]Following session {args.session_id} from {since}...[/blue]")
+            client.poll_session(session_path(args.session_id), plain=args.plain, timeout=args.timeout,
+                                min_interval=args.poll_min, max_interval=args.poll_max, records=records,
+                                checkpoint=checkpoint, store=store)
+
+        elif args.command == "watch":
+            states = client.watch_sessions(args.session_ids, plain=args.plain, timeout=args.timeout,
+                                           max_workers=args.workers, requests_per_second=args.rps,
+                                           min_interval=args.poll_min, max_interval=args.poll_max,
+                                           records=records)
+            summary = ", ".join(f"{_resource_id(sid)}={state or 'UNKNOWN'}" for sid, state in states.items())
+            if records: records.emit("summary", {"states": {_resource_id(sid): state for sid, state in states.items()}})
+            elif args.plain: print(f"Final states: {summary}")
+            else: console.print(f"[bold]Final states:[/bold] {summary}")
+        
         elif args.command == "get-source":
             source = client.get_source(args.source_id)
-            print(json.dumps(source, indent=2))
+            if records: records.emit("source", source_record(source, full=True))
+            else: print(json.dumps(source, indent=2))
 
     except KeyboardInterrupt:
-        if args.plain: print("\nOperation cancelled by user.")
+        if records: records.emit("error", {"message": "Operation cancelled by user."})
+        elif args.plain: print("\nOperation cancelled by user.")
         else: console.print("\n[bold yellow]Operation cancelled by user.[/bold yellow]")
     except Exception as e:
-        if args.plain: print(f"Error: {e}")
+        if records: records.emit("error", {"message": str(e)})
+        elif args.plain: print(f"Error: {e}")
         else: console.print(f"[bold red]Error:[/bold red] {e}")
+    finally:
+        if store:
+            store.close()
+        if trace:
+            METRICS.stop_trace(trace)
+        if command_metrics:
+            METRICS.stop_scope(command_metrics)
+            # stderr, so jsonl consumers of stdout never see it
+            for line in command_metrics.summary() or ["No API requests made."]:
+                print(f"[stats] {line}", file=sys.stderr)
+
 
 if __name__ == "__main__":
     main()
@@ -0,0 +1,309 @@
+"""Context packing for ``create --context-file``.
+
+Expands files, directories and glob patterns into one prompt section that
+fits a byte budget. Earlier arguments take priority, and inside a directory
+shallower and smaller files come first. Files are read in chunks, and
+reading stops once the budget is spent. Binary files are skipped. Trailing
+whitespace and runs of blank lines are squeezed. Blocks repeated across
+files (license headers, vendored copies) are sent once.
+
+A packed bundle is cached under its inputs' fingerprint (path, size and mtime
+of every file, plus the options), so dispatching the same context again
+reuses the stored text without reading anything. Only the most recently
+used ``MAX_CACHED_PACKS`` bundles are kept.
+"""
+import glob
+import hashlib
+import json
+import os
+import re
+from typing import Dict, Iterator, List, NamedTuple, Optional, Tuple
+
+from jules_client import atomic_write_json, cache_dir
+
+# Default budget for the packed context, in bytes of UTF-8
+DEFAULT_MAX_BYTES = 100_000
+# Bytes read per chunk, and the prefix sniffed for binary content
+CHUNK_SIZE = 64 * 1024
+SNIFF_BYTES = 8192
+# Blocks shorter than this are too generic to be worth deduplicating
+MIN_DEDUP_CHARS = 120
+# A file cut to less than this is dropped instead
+MIN_PARTIAL_BYTES = 512
+# Directories never worth sending
+SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".mypy_cache",
+             ".pytest_cache", ".tox", "dist", "build"}
+# Packed bundles kept in the cache; the least recently used are removed beyond this
+MAX_CACHED_PACKS = 32
+
+TRUNCATED_NOTE = "\n[... truncated to fit the context budget ...]"
+
+BLANK_RUN_RE = re.compile(r"\n{3,}")
+TRAILING_WS_RE = re.compile(r"[ \t]+\n")
+BLOCK_SPLIT_RE = re.compile(r"\n\n")
+
+
+class PackedContext(NamedTuple):
+    text: str
+    included: List[str]
+    truncated: List[str]
+    omitted: List[str] # Over budget
+    skipped: List[str] # Binary or unreadable
+    cached: bool
+
+
+def expand_paths(specs: List[str], base: Optional[str] = None) -> Tuple[List[str], List[str]]:
+    """Resolves files, directories and globs into files in priority order; returns (files, unmatched specs)."""
+    base = base or os.getcwd()
+    files: List[str] = []
+    unmatched: List[str] = []
+    seen = set()
+
+    def add(path: str):
+        real = os.path.realpath(path)
+        if real not in seen:
+            seen.add(real)
+            files.append(path)
+
+    for spec in specs:
+        path = spec if os.path.isabs(spec) else os.path.join(base, spec)
+        if glob.has_magic(spec):
+            matches = _glob_files(path)
+        elif os.path.isdir(path):
+            matches = []
+            for root, dirs, names in os.walk(path):
+                dirs[:] = sorted(d for d in dirs if d not in SKIP_DIRS and not d.startswith("."))
+                matches.extend(os.path.join(root, name) for name in names if not name.startswith("."))
+        elif os.path.isfile(path):
+            matches = [path]
+        else:
+            matches = []
+        if not matches:
+            unmatched.append(spec)
+        # Within one spec: shallow, small files first (READMEs and configs before deep modules)
+        for match in sorted(matches, key=lambda m: (m.count(os.sep), _size(m), m)):
+            add(match)
+    return files, unmatched
+
+
+def _glob_files(pattern: str) -> List[str]:
+    """Files matching ``pattern``, except those a wildcard found inside one of ``SKIP_DIRS``.
+
+    Directories spelled out in the pattern itself (``node_modules/pkg/*.js``) are allowed.
+    """
+    parts = pattern.split(os.sep)
+    fixed = next(index for index, part in enumerate(parts) if glob.has_magic(part))
+    return [match for match in glob.glob(pattern, recursive=True)
+            if os.path.isfile(match) and not SKIP_DIRS.intersection(match.split(os.sep)[fixed:-1])]
+
+
+def _size(path: str) -> int:
+    try:
+        return os.path.getsize(path)
+    except OSError:
+        return 0
+
+
+def _read_text(path: str, limit: int) -> Tuple[Optional[str], bool]:
+    """Reads at most ``limit`` bytes in chunks; returns (text, hit_limit), or (None, False) for binaries."""
+    chunks: List[bytes] = []
+    total = 0
+    with open(path, "rb") as f:
+        head = f.read(SNIFF_BYTES)
+        if b"\0" in head:
+            return None, False
+        chunks.append(head)
+        total = len(head)
+        while total <= limit:
+            chunk = f.read(CHUNK_SIZE)
+            if not chunk:
+                break
+            chunks.append(chunk)
+            total += len(chunk)
+    data = b"".join(chunks)
+    hit_limit = len(data) > limit
+    data = data[:limit]
+    try:
+        return data.decode("utf-8"), hit_limit
+    except UnicodeDecodeError as e:
+        # Cutting at the limit can split a multi-byte character; anything else isn't UTF-8 text
+        if hit_limit and e.start >= len(data) - 3:
+            return data[:e.start].decode("utf-8"), hit_limit
+        return None, False
+
+
+def squeeze(text: str) -> str:
+    """Drops trailing whitespace and collapses runs of blank lines; indentation is left alone."""
+    text = TRAILING_WS_RE.sub("\n", text.replace("\r\n", "\n").rstrip() + "\n")
+    return BLANK_RUN_RE.sub("\n\n", text)
+
+
+def _fingerprint(files: List[str], max_bytes: int, base: str) -> str:
+    digest = hashlib.sha256(json.dumps([max_bytes, base]).encode("utf-8"))
+    for path in files:
+        try:
+            stat = os.stat(path)
+            digest.update(f"{path}\0{stat.st_size}\0{stat.st_mtime_ns}\n".encode("utf-8"))
+        except OSError:
+            digest.update(f"{path}\0missing\n".encode("utf-8"))
+    return digest.hexdigest()[:24]
+
+
+def _cache_path(key: str) -> str:
+    return os.path.join(cache_dir(), "context", f"{key}.json")
+
+
+def _load_cached(key: str) -> Optional[PackedContext]:
+    path = _cache_path(key)
+    try:
+        with open(path, "r") as f:
+            data = json.load(f)
+        packed = PackedContext(cached=True, **data)
+        os.utime(path)  # Marks it recently used for eviction
+        return packed
+    except (OSError, ValueError, TypeError):
+        return None
+
+
+def _store_cached(key: str, packed: PackedContext):
+    atomic_write_json(_cache_path(key), {field: value for field, value in packed._asdict().items() if field != "cached"})
+    _evict_cached(MAX_CACHED_PACKS)
+
+
+def _evict_cached(keep: int):
+    """Removes all but the ``keep`` most recently used bundles."""
+    directory = os.path.dirname(_cache_path(""))
+    entries = []
+    try:
+        for entry in os.scandir(directory):
+            if entry.name.endswith(".json"):
+                try:
+                    entries.append((entry.stat().st_mtime_ns, entry.path))
+                except OSError:
+                    pass # Removed by a concurrent run
+    except OSError:
+        return
+    for _, path in sorted(entries, reverse=True)[keep:]:
+        try:
+            os.remove(path)
+        except OSError:
+            pass
+
+
+def _blocks(text: str) -> Iterator[str]:
+    for block in BLOCK_SPLIT_RE.split(text):
+        if block:
+            yield block
+
+
+def pack_context(specs: List[str], max_bytes: int = DEFAULT_MAX_BYTES, base: Optional[str] = None,
+                 use_cache: bool = True) -> PackedContext:
+    """Packs the files named by ``specs`` into a prompt section of at most ``max_bytes`` bytes.
+
+    Raises FileNotFoundError if a spec matches nothing.
+    """
+    base = base or os.getcwd()
+    files, unmatched = expand_paths(specs, base)
+    if unmatched:
+        raise FileNotFoundError(f"Context path(s) not found: {', '.join(unmatched)}")
+
+    key = _fingerprint(files, max_bytes, base)
+    if use_cache:
+        cached = _load_cached(key)
+        if cached is not None:
+            return cached
+
+    sections: List[str] = []
+    included: List[str] = []
+    truncated: List[str] = []
+    omitted: List[str] = []
+    skipped: List[str] = []
+    seen_blocks: Dict[str, str] = {}
+    seen_files: Dict[str, str] = {}
+    used = 0
+
+    for path in files:
+        name = os.path.relpath(path, base) if path.startswith(base + os.sep) else path
+        header = f"--- {name} ---\n"
+        # Each section is followed by a one-byte separator
+        remaining = max_bytes - used - len(header.encode("utf-8")) - 1
+        if remaining < MIN_PARTIAL_BYTES:
+            omitted.append(name)
+            continue
+        try:
+            # Read a little past the budget, since squeezing and dedup usually shrink the text
+            text, hit_limit = _read_text(path, remaining * 2)
+        except OSError:
+            skipped.append(name)
+            continue
+        if text is None:
+            skipped.append(name)
+            continue
+
+        text = squeeze(text)
+        file_key = hashlib.sha1(text.encode("utf-8")).hexdigest()
+        first = seen_files.get(file_key)
+        if first is not None:
+            section = f"{header}[identical to {first}]\n"
+            if len(section.encode("utf-8")) < max_bytes - used:
+                sections.append(section)
+                used += len(section.encode("utf-8")) + 1
+                included.append(name)
+            else:
+                omitted.append(name)
+            continue
+
+        # Blocks are only registered for dedup once they are known to be in the output,
+        # so a marker never points at text that was truncated away
+        kept = []
+        block_ends: Dict[str, int] = {} # First occurrence in this file -> byte offset where it ends
+        length = 0
+        for block in _blocks(text):
+            if len(block) >= MIN_DEDUP_CHARS:
+                block_key = hashlib.sha1(block.encode("utf-8")).hexdigest()
+                first = seen_blocks.get(block_key)
+                if first is not None:
+                    block = f"[... same block as in {first} ...]"
+                else:
+                    block_ends.setdefault(block_key, length + (2 if kept else 0) + len(block.encode("utf-8")))
+            length += (2 if kept else 0) + len(block.encode("utf-8"))
+            kept.append(block)
+        body = "\n\n".join(kept)
+        if not body.strip():
+            continue
+
+        encoded = body.encode("utf-8")
+        cut = hit_limit or len(encoded) + 1 > remaining
+        if cut:
+            encoded = encoded[:remaining - len(TRUNCATED_NOTE) - 1]
+            body = encoded.decode("utf-8", errors="ignore").rstrip() + TRUNCATED_NOTE
+        section = header + body.rstrip("\n") + "\n"
+        sections.append(section)
+        used += len(section.encode("utf-8")) + 1
+        included.append(name)
+        if cut:
+            truncated.append(name)
+        else:
+            seen_files[file_key] = name
+        for block_key, end in block_ends.items():
+            if end <= len(encoded):
+                seen_blocks[block_key] = name
+
+    packed = PackedContext("\n".join(sections), included, truncated, omitted, skipped, False)
+    if use_cache:
+        _store_cached(key, packed)
+    return packed
+
+
+def describe(packed: PackedContext) -> str:
+    """One-line summary of what went into the packed context."""
+    parts = [f"{len(packed.included)} file(s), {len(packed.text.encode('utf-8'))} bytes"]
+    if packed.truncated:
+        parts.append(f"truncated: {', '.join(packed.truncated)}")
+    if packed.omitted:
+        parts.append(f"over budget: {', '.join(packed.omitted)}")
+    if packed.skipped:
+        parts.append(f"skipped binary/unreadable: {', '.join(packed.skipped)}")
+    if packed.cached:
+        parts.append("from cache")
+    return "; ".join(parts)
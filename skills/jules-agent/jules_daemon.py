@@ -0,0 +1,200 @@
+"""The ``jules_client.py daemon`` server.
+
+Keeps one warm process (imports, ``.env``, HTTP connection pools) listening
+on a Unix socket. ``jules_shim.py`` sends each command's argv as one JSON
+line; output comes back as ``{"out": ...}`` / ``{"err": ...}`` lines and a
+final ``{"exit": code}``. Only imported when the daemon starts, so one-shot
+runs don't pay for socketserver and signal.
+"""
+import json
+import os
+import select
+import signal
+import socket
+import socketserver
+import sys
+import threading
+from typing import Any, Dict
+
+from dotenv import load_dotenv
+
+from jules_client import JulesClient, _cancelled, _command, main
+
+
+class _SocketStream:
+    """Write-only text stream that frames output as JSON lines on a daemon connection."""
+
+    encoding = "utf-8"
+
+    def __init__(self, wfile, channel: str, peer: "_PeerWatch"):
+        self.wfile = wfile
+        self.channel = channel
+        self.peer = peer
+
+    def write(self, data: str) -> int:
+        if data and not self.peer.gone:
+            try:
+                self.wfile.write((json.dumps({self.channel: data}) + "\n").encode("utf-8"))
+                self.wfile.flush()
+            except OSError:
+                self.peer.hang_up()
+        if self.peer.cancel.is_set() and not getattr(_command, "noticed", False):
+            # A command that only writes (no waits) stops at its first write after the
+            # caller left; once it knows, later output (e.g. "cancelled") is just dropped
+            raise _cancelled()
+        return len(data)
+
+    def flush(self):
+        pass
+
+    def isatty(self) -> bool:
+        return False
+
+
+class _StreamRouter:
+    """Stand-in for sys.stdout/sys.stderr that sends each daemon thread's output to its own connection."""
+
+    def __init__(self, default):
+        self._default = default
+        self._local = threading.local()
+
+    def bind(self, stream):
+        self._local.stream = stream
+
+    def _target(self):
+        return getattr(self._local, "stream", None) or self._default
+
+    def write(self, data):
+        return self._target().write(data)
+
+    def flush(self):
+        self._target().flush()
+
+    def __getattr__(self, name):
+        return getattr(self._target(), name)
+
+
+class _PeerWatch:
+    """Watches a daemon connection while a command runs and cancels the command if the caller hangs up.
+
+    The caller sends nothing after its request, so the socket turning
+    readable means EOF. Cancelling only sets ``cancel``; the command stops
+    at its next wait or write (see ``_pause``), so a command sleeping
+    between polls stops at once.
+    """
+
+    def __init__(self, connection, interval: float = 0.5):
+        self.connection = connection
+        self.interval = interval
+        self.gone = False
+        self.cancel = threading.Event()
+        self._done = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="jules-daemon-peer", daemon=True)
+
+    def start(self):
+        self._thread.start()
+
+    def hang_up(self):
+        self.gone = True
+        self.cancel.set()
+
+    def _run(self):
+        while not self._done.is_set():
+            try:
+                readable, _, _ = select.select([self.connection], [], [], self.interval)
+                if not readable or self.connection.recv(4096):
+                    continue
+            except (OSError, ValueError):
+                pass
+            # EOF or a dead socket: the caller is gone
+            self.hang_up()
+            return
+
+    def stop(self):
+        """Called by the command thread once the command returned."""
+        self._done.set()
+
+
+class _DaemonHandler(socketserver.StreamRequestHandler):
+    def handle(self):
+        line = self.rfile.readline()
+        if not line:
+            return
+        exit_code = 0
+        peer = _PeerWatch(self.connection)
+        sys.stdout.bind(_SocketStream(self.wfile, "out", peer))
+        sys.stderr.bind(_SocketStream(self.wfile, "err", peer))
+        _command.cancel = peer.cancel
+        _command.noticed = False
+        try:
+            try:
+                request = json.loads(line)
+                peer.start()
+                main(request.get("argv", []), clients=self.server.clients,
+                     cwd=request.get("cwd"), default_api_key=request.get("apiKey"))
+            finally:
+                peer.stop()
+        except SystemExit as e:
+            exit_code = e.code if isinstance(e.code, int) else (0 if e.code is None else 1)
+        except KeyboardInterrupt:
+            exit_code = 130
+        except Exception as e:
+            print(f"Error: {e}")
+            exit_code = 1
+        finally:
+            _command.cancel = None
+            sys.stdout.bind(None)
+            sys.stderr.bind(None)
+        if peer.gone:
+            return
+        try:
+            self.wfile.write((json.dumps({"exit": exit_code}) + "\n").encode("utf-8"))
+        except OSError:
+            pass  # Caller went away before the command finished
+
+
+class _DaemonServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+    daemon_threads = True
+
+    def __init__(self, socket_path: str):
+        super().__init__(socket_path, _DaemonHandler)
+        self.clients: Dict[Any, JulesClient] = {}
+
+
+def serve_daemon(socket_path: str):
+    """Runs the long-lived daemon, keeping imports, config and HTTP pools warm between commands."""
+    load_dotenv()
+    if os.path.exists(socket_path):
+        probe = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        try:
+            probe.connect(socket_path)
+        except ConnectionRefusedError:
+            os.unlink(socket_path)  # Stale socket left behind by a daemon that died
+        except FileNotFoundError:
+            pass
+        else:
+            print(f"Error: a Jules daemon is already listening on {socket_path}")
+            sys.exit(1)
+        finally:
+            probe.close()
+
+    sys.stdout = _StreamRouter(sys.stdout)
+    sys.stderr = _StreamRouter(sys.stderr)
+    # Created owner-only from the start: a chmod after bind() leaves a window where anyone could connect
+    umask = os.umask(0o177)
+    try:
+        server = _DaemonServer(socket_path)
+    finally:
+        os.umask(umask)
+    signal.signal(signal.SIGTERM, lambda *_: sys.exit(0))
+    print(f"Jules daemon listening on {socket_path}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+        for client in server.clients.values():
+            client.close()
+        if os.path.exists(socket_path):
+            os.unlink(socket_path)
@@ -0,0 +1,241 @@
+"""Token-budgeted digests of long-running Jules sessions.
+
+A digest folds a session's activity stream into a small running summary
+(plan, latest agent messages, collapsed runs of repetitive steps) and renders
+it within a character budget. The folded state is cached on disk with its
+activity cursor, so a refresh only pulls activities newer than the last call
+and an unchanged session costs one GET.
+"""
+import json
+import os
+import re
+from typing import Any, Dict, List, Optional
+
+from jules_client import ACTIVITY_KINDS, ActivityCursor, account_key, atomic_write_json, cache_dir, session_path
+from jules_metrics import METRICS
+
+# Rough characters per token, for callers that think in token budgets
+CHARS_PER_TOKEN = 4
+# Runs and agent messages kept in the folded state; older ones are only counted
+MAX_RUNS = 200
+MAX_MESSAGES = 20
+# Longest single line a digest will print before clipping it
+MAX_LINE = 240
+
+# Step numbers, counts and ids make otherwise identical progress lines differ
+DIGITS_RE = re.compile(r"\d+")
+WHITESPACE_RE = re.compile(r"\s+")
+
+
+def default_digest_path(api_key: str, session_name: str) -> str:
+    return os.path.join(cache_dir(), f"digests-{account_key(api_key)}",
+                        f"{session_path(session_name).split('/', 1)[1]}.json")
+
+
+def _clip(text: str, limit: int = MAX_LINE) -> str:
+    text = WHITESPACE_RE.sub(" ", text or "").strip()
+    return text if len(text) <= limit else text[:limit - 3].rstrip() + "..."
+
+
+def activity_text(activity: Dict[str, Any]) -> str:
+    """The most informative one-line text for an activity."""
+    if activity.get("description"):
+        return activity["description"]
+    if "agentMessaged" in activity:
+        return activity["agentMessaged"].get("agentMessage", "")
+    if "userMessaged" in activity:
+        return activity["userMessaged"].get("userMessage", "")
+    if "progressUpdated" in activity:
+        progress = activity["progressUpdated"]
+        return progress.get("title") or progress.get("description", "")
+    if "planGenerated" in activity:
+        steps = activity["planGenerated"].get("plan", {}).get("steps", [])
+        return f"Generated a plan with {len(steps)} steps"
+    if "sessionFailed" in activity:
+        return f"Session failed: {activity['sessionFailed'].get('reason', '')}"
+    return ""
+
+
+class SessionDigest:
+    """Folded summary of one session's activities, serializable to JSON."""
+
+    def __init__(self, session_name: str):
+        self.session_name = session_path(session_name)
+        self.cursor = ActivityCursor()
+        self.session: Dict[str, Any] = {}
+        self.last_activity_id: Optional[str] = None
+        self.total = 0
+        self.by_originator: Dict[str, int] = {}
+        self.plan_steps: List[str] = []
+        self.plan_approved = False
+        self.progress_updates = 0
+        self.latest_progress: Optional[str] = None
+        self.agent_messages: List[str] = []
+        self.runs: List[Dict[str, Any]] = []
+        self.dropped_runs = 0
+        self.rendered: Dict[str, str] = {}
+
+    @classmethod
+    def load(cls, path: str, session_name: str) -> "SessionDigest":
+        digest = cls(session_name)
+        try:
+            with open(path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return digest # Missing or corrupt cache just means a full rebuild
+        cursor = data.pop("cursor", {})
+        digest.cursor = ActivityCursor(cursor.get("createTime"), cursor.get("boundaryIds"))
+        for key, value in data.items():
+            if hasattr(digest, key) and key != "session_name":
+                setattr(digest, key, value)
+        return digest
+
+    def save(self, path: str):
+        data = {key: value for key, value in vars(self).items() if key not in ("session_name", "cursor")}
+        data["cursor"] = {"createTime": self.cursor.create_time, "boundaryIds": sorted(self.cursor.boundary_ids)}
+        atomic_write_json(path, data)
+
+    def update_session(self, session: Dict[str, Any]) -> bool:
+        """Records the session's latest metadata; returns True if its state or updateTime moved."""
+        summary = {
+            "title": session.get("title"),
+            "state": session.get("state"),
+            "url": session.get("url"),
+            "updateTime": session.get("updateTime"),
+            "outputs": session.get("outputs", []),
+        }
+        changed = (summary["state"], summary["updateTime"]) != (self.session.get("state"), self.session.get("updateTime"))
+        self.session = summary
+        return changed or summary["updateTime"] is None
+
+    def add(self, activity: Dict[str, Any]):
+        """Folds one new activity into the summary."""
+        self.total += 1
+        self.last_activity_id = activity.get("id") or activity.get("name")
+        originator = (activity.get("originator") or "system").lower()
+        self.by_originator[originator] = self.by_originator.get(originator, 0) + 1
+        kind = next((kind for kind in ACTIVITY_KINDS if kind in activity), "activity")
+        text = _clip(activity_text(activity))
+
+        if kind == "planGenerated":
+            steps = activity["planGenerated"].get("plan", {}).get("steps", [])
+            self.plan_steps = [_clip(step.get("title", ""), 120) for step in steps]
+            self.plan_approved = False
+        elif kind == "planApproved":
+            self.plan_approved = True
+        elif kind == "progressUpdated":
+            self.progress_updates += 1
+            self.latest_progress = text
+        if originator == "agent" and kind in ("agentMessaged", "activity") and text:
+            self.agent_messages = (self.agent_messages + [text])[-MAX_MESSAGES:]
+
+        # Consecutive activities that only differ in numbers collapse into one run
+        key = f"{originator}|{kind}|{DIGITS_RE.sub('#', text)}"
+        if self.runs and self.runs[-1]["key"] == key:
+            run = self.runs[-1]
+            run["count"] += 1
+            run["text"] = text
+        else:
+            self.runs.append({"key": key, "originator": originator, "kind": kind, "text": text, "count": 1})
+            if len(self.runs) > MAX_RUNS:
+                self.runs.pop(0)
+                self.dropped_runs += 1
+
+    def render(self, max_chars: int = 2000, messages: int = 3) -> str:
+        """Renders the digest, dropping the least important detail first to stay within ``max_chars``."""
+        session = self.session
+        counts = ", ".join(f"{originator} {count}" for originator, count in sorted(self.by_originator.items()))
+        lines = [
+            f"Session {self.session_name.split('/', 1)[1]}: {_clip(session.get('title') or '', 120)} "
+            f"[{session.get('state', 'UNKNOWN')}]",
+            f"Activities: {self.total}" + (f" ({counts})" if counts else "")
+            + (f"; updated {session['updateTime']}" if session.get("updateTime") else ""),
+        ]
+        if session.get("url"):
+            lines.append(f"URL: {session['url']}")
+        used = sum(len(line) + 1 for line in lines)
+
+        def section(header: str, items: List[str]):
+            """Appends a section with as many items as fit; skipped entirely if none do."""
+            nonlocal used
+            if not items or used + len(header) + len(items[0]) + 2 > max_chars:
+                return
+            lines.append(header)
+            used += len(header) + 1
+            for item in items:
+                if used + len(item) + 1 > max_chars:
+                    return
+                lines.append(item)
+                used += len(item) + 1
+
+        outputs = []
+        for output in session.get("outputs", []):
+            if "pullRequest" in output:
+                outputs.append(f"- PR: {output['pullRequest'].get('url', 'No URL')}")
+            else:
+                outputs.append(f"- {next(iter(output), 'output')}")
+        section("Outputs:", outputs)
+
+        if self.plan_steps:
+            status = "approved" if self.plan_approved else "awaiting approval"
+            section(f"Plan ({len(self.plan_steps)} steps, {status}):",
+                    [f"{index}. {step}" for index, step in enumerate(self.plan_steps, 1)])
+        if self.latest_progress:
+            section(f"Progress ({self.progress_updates} updates):", [f"- latest: {self.latest_progress}"])
+        if messages:
+            section("Last agent messages:", [f"- {text}" for text in self.agent_messages[-messages:]])
+
+        # Newest runs first until the budget runs out, then printed oldest first
+        header = "Recent activity:"
+        recent = []
+        budget = max_chars - used - len(header) - 1
+        for run in reversed(self.runs):
+            repeat = f" x{run['count']}" if run["count"] > 1 else ""
+            line = f"- {run['originator'].upper()} {run['kind']}{repeat}" + (f": {run['text']}" if run["text"] else "")
+            if len(line) + 1 > budget:
+                break
+            recent.append(line)
+            budget -= len(line) + 1
+        if recent:
+            omitted = len(self.runs) - len(recent) + self.dropped_runs
+            note = f"- ({omitted} earlier runs omitted)"
+            if omitted and len(note) + 1 <= budget:
+                recent.append(note)
+            lines.append(header)
+            lines.extend(reversed(recent))
+
+        return "\n".join(lines)[:max_chars]
+
+
+def digest_session(client, session_id: str, max_chars: int = 2000, messages: int = 3,
+                   path: Optional[str] = None, store=None) -> str:
+    """Returns a digest of the session no longer than ``max_chars``.
+
+    Activities are only fetched when the session's state or updateTime moved,
+    and then only past the cached cursor; the rendered text is reused while
+    the last activity ID and budget are unchanged. Fetched activities are also
+    written to ``store`` (a ``JulesStore``) when one is given.
+    """
+    session_name = session_path(session_id)
+    path = path or default_digest_path(client.api_key, session_name)
+    digest = SessionDigest.load(path, session_name)
+    dirty = False
+
+    if digest.update_session(client.get_session(session_name)):
+        activities = client.fetch_new_activities(session_name, digest.cursor, page_size=100)
+        for activity in activities:
+            digest.add(activity)
+        if store and activities:
+            store.upsert_activities(session_name, activities)
+        dirty = True
+
+    key = f"{digest.last_activity_id}|{digest.session.get('state')}|{digest.session.get('updateTime')}|{max_chars}|{messages}"
+    text = digest.rendered.get(key)
+    METRICS.cache("digest", text is not None)
+    if text is None:
+        text = digest.render(max_chars, messages)
+        digest.rendered = {key: text}
+        dirty = True
+    if dirty:
+        digest.save(path)
+    return text
@@ -0,0 +1,120 @@
+"""Live view for ``poll_session`` in rich mode.
+
+New activities only go into a bounded ring buffer. Rich's ``Live`` refresh
+thread draws the view at a fixed frame rate, so a burst of activities costs
+a few appends instead of one redraw each. Markdown is parsed only for the
+activity shown in the detail panel, once per activity. Every frame shows the
+session state, the elapsed time, the recent activity rate and the last
+``scrollback`` one-line summaries, so each frame costs the same however busy
+the session is.
+"""
+import threading
+import time
+from collections import deque
+from typing import Any, Dict, Optional
+
+# Redraws per second (rich's Live default is 4)
+FRAMES_PER_SECOND = 4
+# One-line summaries kept for the scrollback
+SCROLLBACK = 12
+# Longer descriptions are cut before the Markdown parse
+MAX_MARKDOWN_CHARS = 4000
+MAX_LINE_CHARS = 160
+# Seconds covered by the activity rate
+RATE_WINDOW = 60
+
+
+class ActivityView:
+    """Rich renderable holding a session's recent activities; safe to update while ``Live`` draws it."""
+
+    def __init__(self, session_id: str, scrollback: int = SCROLLBACK):
+        from rich.spinner import Spinner
+
+        self.session_id = session_id
+        self.state: Optional[str] = None
+        self.total = 0
+        self.frames = 0
+        self.started = time.monotonic()
+        self.lines = deque(maxlen=scrollback)
+        # (second, count) buckets, so the rate costs O(window) memory whatever the volume
+        self._arrivals = deque(maxlen=RATE_WINDOW)
+        self._latest: Optional[Dict[str, Any]] = None
+        self._detail = None # (activity key, rendered panel)
+        self._notice = None # (text, style)
+        self._spinner = Spinner("dots", style="cyan")
+        self._lock = threading.Lock()
+
+    def add(self, activity: Dict[str, Any]):
+        """Queues an activity for the next frame; nothing is parsed or drawn here."""
+        description = activity.get("description") or "No description"
+        summary = description.strip().split("\n", 1)[0]
+        if len(summary) > MAX_LINE_CHARS:
+            summary = summary[:MAX_LINE_CHARS - 3] + "..."
+        second = int(time.monotonic())
+        with self._lock:
+            self.total += 1
+            self.lines.append((time.strftime("%H:%M:%S"), activity.get("originator", "SYSTEM"), summary))
+            if self._arrivals and self._arrivals[-1][0] == second:
+                self._arrivals[-1][1] += 1
+            else:
+                self._arrivals.append([second, 1])
+            self._latest = activity
+
+    def set_state(self, state: Optional[str]):
+        self.state = state
+
+    def notice(self, text: str, style: str = "yellow"):
+        """Shows ``text`` under the scrollback until replaced."""
+        self._notice = (text, style)
+
+    def rate(self) -> float:
+        """Activities per minute over the last RATE_WINDOW seconds."""
+        now = time.monotonic()
+        with self._lock:
+            recent = sum(count for second, count in self._arrivals if second > now - RATE_WINDOW)
+        return recent * 60 / max(1.0, min(RATE_WINDOW, now - self.started))
+
+    def _detail_panel(self, activity: Dict[str, Any], key: int):
+        if self._detail is None or self._detail[0] != key:
+            from rich.markdown import Markdown
+            from rich.panel import Panel
+
+            description = activity.get("description") or "No description"
+            if len(description) > MAX_MARKDOWN_CHARS:
+                description = description[:MAX_MARKDOWN_CHARS] + "\n\n*[... truncated ...]*"
+            originator = activity.get("originator", "SYSTEM")
+            color = "green" if originator.upper() == "AGENT" else "blue"
+            self._detail = (key, Panel(Markdown(description), title=f"[bold {color}]{originator}[/bold {color}]"))
+        return self._detail[1]
+
+    def __rich__(self):
+        from rich.console import Group
+        from rich.text import Text
+
+        self.frames += 1
+        with self._lock:
+            lines = list(self.lines)
+            latest = self._latest
+            total = self.total
+        elapsed = int(time.monotonic() - self.started)
+        status = (f"Session {self.session_id} | {self.state or 'waiting'} | {elapsed // 60}:{elapsed % 60:02d} "
+                  f"| {total} activities | {self.rate():.1f}/min")
+        self._spinner.update(text=Text(status, style="bold"))
+
+        parts = [self._spinner]
+        if lines:
+            scrollback = Text()
+            hidden = total - len(lines)
+            if hidden:
+                scrollback.append(f"... {hidden} earlier\n", style="dim")
+            for index, (stamp, originator, summary) in enumerate(lines):
+                scrollback.append(f"[{stamp}] ", style="dim")
+                scrollback.append(f"{originator.upper()}: ",
+                                  style="green" if originator.upper() == "AGENT" else "blue")
+                scrollback.append(summary + ("\n" if index < len(lines) - 1 else ""))
+            parts.append(scrollback)
+        if latest is not None:
+            parts.append(self._detail_panel(latest, total))
+        if self._notice:
+            parts.append(Text(*self._notice))
+        return Group(*parts)
@@ -0,0 +1,315 @@
+"""Process-wide request, poll and cache metrics for the Jules client and GUI server.
+
+Every API attempt, poll tick and cache lookup is recorded in ``METRICS``:
+latency histograms per endpoint, request/byte/error/retry counters and cache
+hit/miss counts. ``render_prometheus`` serves them on the GUI server's
+``/metrics``, ``summary`` prints them for ``--stats``, and ``start_trace``
+additionally appends one JSON line per event for offline analysis.
+
+A command run with ``--stats`` also gets its own ``Metrics`` via
+``start_scope``: what it records is copied there, so concurrent daemon
+commands don't show up in each other's summaries. Work handed to a thread
+pool joins the caller's scope when wrapped with ``in_scope``.
+Keep this module stdlib-only; jules_client imports it at startup.
+"""
+import contextvars
+import json
+import re
+import threading
+import time
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+# Upper bounds in seconds, Prometheus-style (each bucket counts observations <= bound)
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+# IDs in API paths become placeholders so each endpoint is one label value
+_ENDPOINT_PATTERNS = (
+    (re.compile(r"^sources/.+"), "sources/{id}"),
+    (re.compile(r"^sessions/[^/:]+"), "sessions/{id}"),
+    (re.compile(r"/activities/[^/]+$"), "/activities/{id}"),
+)
+_GUI_ROUTE_PATTERNS = (
+    (re.compile(r"^/api/sources/.+"), "/api/sources/{id}"),
+    (re.compile(r"^/api/sessions/[^/]+"), "/api/sessions/{id}"),
+)
+
+HELP = {
+    "jules_api_request_duration_seconds": "Latency of each API attempt, by endpoint",
+    "jules_api_requests_total": "API attempts, by endpoint and HTTP status (or transport error)",
+    "jules_api_response_bytes_total": "Response body bytes received, by endpoint",
+    "jules_api_errors_total": "API calls that failed after retries, by endpoint and reason",
+    "jules_api_retries_total": "Retried API attempts, by endpoint",
+    "jules_poll_tick_duration_seconds": "Duration of one poll tick (session fetch plus any activity fetch)",
+    "jules_poll_activities_total": "Activities delivered by poll ticks",
+    "jules_cache_requests_total": "Cache lookups, by cache and result (hit or miss)",
+    "jules_gui_request_duration_seconds": "GUI server request handling time, by method, route and status",
+}
+
+
+def endpoint_name(method: str, path: str) -> str:
+    """``GET sessions/{id}/activities`` style label for a request path."""
+    for pattern, replacement in _ENDPOINT_PATTERNS:
+        path = pattern.sub(replacement, path)
+    return f"{method} {path}"
+
+
+def gui_route(path: str) -> str:
+    """Route label for a GUI server path, with session and source IDs collapsed."""
+    path = path.split("?", 1)[0]
+    for pattern, replacement in _GUI_ROUTE_PATTERNS:
+        path = pattern.sub(replacement, path)
+    # Arbitrary paths (scanners, typos) would each become a new time series
+    return path if path.startswith("/api/") or path in ("/", "/gui.html", "/metrics") else "other"
+
+
+class Histogram:
+    def __init__(self):
+        self.counts = [0] * len(LATENCY_BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+
+    def observe(self, seconds: float):
+        self.count += 1
+        self.sum += seconds
+        for index, bound in enumerate(LATENCY_BUCKETS):
+            if seconds <= bound:
+                self.counts[index] += 1
+                break
+
+    def copy(self) -> "Histogram":
+        histogram = Histogram()
+        histogram.counts, histogram.count, histogram.sum = list(self.counts), self.count, self.sum
+        return histogram
+
+    def minus(self, earlier: Optional["Histogram"]) -> "Histogram":
+        """Observations made since ``earlier`` (a copy of this histogram taken before)."""
+        histogram = self.copy()
+        if earlier is not None:
+            histogram.counts = [now - then for now, then in zip(self.counts, earlier.counts)]
+            histogram.count -= earlier.count
+            histogram.sum -= earlier.sum
+        return histogram
+
+    def quantile(self, q: float) -> Optional[float]:
+        """Upper bound of the bucket holding the ``q`` quantile (None above the last bucket)."""
+        target = q * self.count
+        seen = 0
+        for bound, count in zip(LATENCY_BUCKETS, self.counts):
+            seen += count
+            if seen >= target:
+                return bound
+        return None
+
+
+Labels = Tuple[Tuple[str, str], ...]
+
+# The per-command Metrics of the code running in this context, if any (see ``Metrics.start_scope``)
+_scope: contextvars.ContextVar = contextvars.ContextVar("jules_metrics_scope", default=None)
+
+
+class Metrics:
+    """Thread-safe registry of labelled counters and latency histograms."""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.counters: Dict[Tuple[str, Labels], float] = {}
+        self.histograms: Dict[Tuple[str, Labels], Histogram] = {}
+        self._traces = []
+
+    def inc(self, name: str, value: float = 1, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            self.counters[key] = self.counters.get(key, 0) + value
+        scoped = _scope.get()
+        if scoped is not None and scoped is not self:
+            scoped.inc(name, value, **labels)
+
+    def observe(self, name: str, seconds: float, **labels: str):
+        key = (name, tuple(sorted(labels.items())))
+        with self._lock:
+            histogram = self.histograms.get(key)
+            if histogram is None:
+                histogram = self.histograms[key] = Histogram()
+            histogram.observe(seconds)
+        scoped = _scope.get()
+        if scoped is not None and scoped is not self:
+            scoped.observe(name, seconds, **labels)
+
+    def cache(self, cache: str, hit: bool):
+        self.inc("jules_cache_requests_total", cache=cache, result="hit" if hit else "miss")
+
+    def snapshot(self) -> Tuple[Dict[Tuple[str, Labels], float], Dict[Tuple[str, Labels], Histogram]]:
+        """Copy of the current values, for a ``summary`` of what happens afterwards."""
+        with self._lock:
+            return dict(self.counters), {key: h.copy() for key, h in self.histograms.items()}
+
+    def reset(self):
+        with self._lock:
+            self.counters.clear()
+            self.histograms.clear()
+
+    # --- Per-command scope ---
+
+    def start_scope(self) -> "Metrics":
+        """Returns a fresh ``Metrics`` that also receives everything recorded in this context.
+
+        Give it to ``stop_scope`` when the command ends.
+        """
+        scoped = Metrics()
+        scoped._token = _scope.set(scoped)
+        return scoped
+
+    def stop_scope(self, scoped: "Metrics"):
+        _scope.reset(scoped._token)
+
+    # --- Trace ---
+
+    def start_trace(self, path: str):
+        """Appends one JSON line per recorded event to ``path`` until ``stop_trace`` is given the returned handle.
+
+        Several traces may be active at once (e.g. concurrent daemon commands); each sees every event.
+        """
+        trace = open(path, "a", buffering=1)
+        with self._lock:
+            self._traces.append(trace)
+        return trace
+
+    def stop_trace(self, trace):
+        with self._lock:
+            if trace in self._traces:
+                self._traces.remove(trace)
+        trace.close()
+
+    def trace(self, event: str, **fields: Any):
+        if not self._traces:
+            return
+        line = json.dumps(dict(ts=round(time.time(), 6), event=event, **fields), separators=(",", ":"))
+        with self._lock:
+            for trace in self._traces:
+                trace.write(line + "\n")
+
+    # --- Recording helpers used by the client ---
+
+    def record_request(self, method: str, path: str, seconds: float, status: Optional[int],
+                       size: int = 0, attempt: int = 0, error: Optional[str] = None):
+        """Records one API attempt; ``status`` is None when no response came back."""
+        endpoint = endpoint_name(method, path)
+        self.observe("jules_api_request_duration_seconds", seconds, endpoint=endpoint)
+        self.inc("jules_api_requests_total", endpoint=endpoint, status=str(status) if status else "error")
+        if size:
+            self.inc("jules_api_response_bytes_total", size, endpoint=endpoint)
+        if attempt:
+            self.inc("jules_api_retries_total", endpoint=endpoint)
+        self.trace("request", endpoint=endpoint, path=path, status=status, ms=round(seconds * 1000, 2),
+                   bytes=size, attempt=attempt, error=error)
+
+    def record_failure(self, method: str, path: str, reason: str):
+        """Records an API call that gave up (after any retries)."""
+        self.inc("jules_api_errors_total", endpoint=endpoint_name(method, path), reason=reason)
+
+    def record_poll_tick(self, session: str, seconds: float, new_activities: int, fetched: bool):
+        """Records one poll tick; a tick that skipped the activities fetch counts as a cache hit."""
+        self.observe("jules_poll_tick_duration_seconds", seconds)
+        if new_activities:
+            self.inc("jules_poll_activities_total", new_activities)
+        self.cache("poll_activities", not fetched)
+        self.trace("poll_tick", session=session, ms=round(seconds * 1000, 2), new=new_activities, fetched=fetched)
+
+    # --- Output ---
+
+    def render_prometheus(self) -> str:
+        """All metrics in the Prometheus text exposition format."""
+        with self._lock:
+            counters = sorted(self.counters.items())
+            histograms = sorted(self.histograms.items(), key=lambda item: item[0])
+            snapshot = [(key, list(h.counts), h.count, h.sum) for key, h in histograms]
+
+        lines: List[str] = []
+        described = set()
+
+        def describe(name: str, kind: str):
+            if name not in described:
+                described.add(name)
+                lines.append(f"# HELP {name} {HELP.get(name, name)}")
+                lines.append(f"# TYPE {name} {kind}")
+
+        def fmt(labels: Labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+            pairs = list(labels) + list(extra)
+            if not pairs:
+                return ""
+            escaped = (value.replace("\\", "\\\\").replace('"', '\\"') for _, value in pairs)
+            return "{" + ",".join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + "}"
+
+        for (name, labels), value in counters:
+            describe(name, "counter")
+            lines.append(f"{name}{fmt(labels)} {value:g}")
+        for (name, labels), counts, count, total in snapshot:
+            describe(name, "histogram")
+            cumulative = 0
+            for bound, bucket in zip(LATENCY_BUCKETS, counts):
+                cumulative += bucket
+                lines.append(f"{name}_bucket{fmt(labels, (('le', f'{bound:g}'),))} {cumulative}")
+            lines.append(f"{name}_bucket{fmt(labels, (('le', '+Inf'),))} {count}")
+            lines.append(f"{name}_sum{fmt(labels)} {total:.6f}")
+            lines.append(f"{name}_count{fmt(labels)} {count}")
+        return "\n".join(lines) + "\n"
+
+    def summary(self, since=None) -> List[str]:
+        """Human-readable lines: per-endpoint latency and counts, poll ticks and cache hit ratios.
+
+        With ``since`` (a ``snapshot``), only what was recorded after it is summarised.
+        """
+        counters_then, histograms_then = since or ({}, {})
+        with self._lock:
+            counters = {key: value - counters_then.get(key, 0) for key, value in self.counters.items()}
+            histograms = {key: h.minus(histograms_then.get(key)) for key, h in self.histograms.items()}
+        counters = {key: value for key, value in counters.items() if value}
+        histograms = {key: (h.count, h.sum, h.quantile(0.5), h.quantile(0.95))
+                      for key, h in histograms.items() if h.count}
+
+        def total(name: str, **match: str) -> float:
+            return sum(value for (counter, labels), value in counters.items()
+                       if counter == name and all(dict(labels).get(k) == v for k, v in match.items()))
+
+        def bound(seconds: Optional[float]) -> str:
+            return f"<={seconds * 1000:g}ms" if seconds is not None else f">{LATENCY_BUCKETS[-1]:g}s"
+
+        lines = []
+        for (name, labels), (count, seconds, p50, p95) in sorted(histograms.items()):
+            if name != "jules_api_request_duration_seconds":
+                continue
+            endpoint = dict(labels)["endpoint"]
+            errors = total("jules_api_errors_total", endpoint=endpoint)
+            retries = total("jules_api_retries_total", endpoint=endpoint)
+            size = total("jules_api_response_bytes_total", endpoint=endpoint)
+            lines.append(f"{endpoint}: {count} requests, avg {seconds / count * 1000:.1f}ms, "
+                         f"p50 {bound(p50)}, p95 {bound(p95)}, {size / 1024:.1f} KiB, "
+                         f"{retries:g} retries, {errors:g} errors")
+        ticks = histograms.get(("jules_poll_tick_duration_seconds", ()))
+        if ticks:
+            lines.append(f"poll ticks: {ticks[0]}, avg {ticks[1] / ticks[0] * 1000:.1f}ms, "
+                         f"{total('jules_poll_activities_total'):g} activities")
+        caches = sorted({dict(labels)["cache"] for (name, labels) in counters if name == "jules_cache_requests_total"})
+        for cache in caches:
+            hits = total("jules_cache_requests_total", cache=cache, result="hit")
+            misses = total("jules_cache_requests_total", cache=cache, result="miss")
+            lines.append(f"cache {cache}: {hits:g} hits, {misses:g} misses ({hits / (hits + misses):.0%} hit ratio)")
+        return lines
+
+
+def in_scope(fn: Callable) -> Callable:
+    """Wraps ``fn`` so that, run on a pool thread, it records into the caller's scope too."""
+    scoped = _scope.get()
+    if scoped is None:
+        return fn
+
+    def run(*args, **kwargs):
+        token = _scope.set(scoped)
+        try:
+            return fn(*args, **kwargs)
+        finally:
+            _scope.reset(token)
+    return run
+
+
+METRICS = Metrics()
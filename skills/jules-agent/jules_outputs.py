@@ -0,0 +1,293 @@
+"""Session artifacts on disk for ``outputs``.
+
+Every ``changeSet`` artifact of a session becomes a patch file that
+``git apply`` accepts as is (the commit message and base commit sit in a
+header git skips), and pull request outputs are kept as metadata. An
+``index.json`` next to the patches lists them with per-file added/removed
+line counts, so a changeset can be sized up without opening it.
+
+Activities are read one page at a time and each patch is written out as soon
+as its page arrives, so memory stays bounded by a page however large the
+changeset. The index also stores the activity cursor: running ``outputs``
+again only fetches activities newer than the last download. Identical
+patches (a cumulative changeset re-sent unchanged) are stored once; they are
+recognised by hash before anything is written.
+"""
+import hashlib
+import json
+import os
+import re
+import time
+from typing import Any, Dict, Iterator, List, Optional
+
+from jules_client import (ActivityCursor, _resource_id, account_key, atomic_open, cache_dir, session_path,
+                          timestamp_key)
+
+# Small pages keep at most a few patches in memory at once
+PAGE_SIZE = 10
+HUNK_RE = re.compile(r"^@@ -\d+(?:,(\d+))? \+\d+(?:,(\d+))? @@")
+INDEX_NAME = "index.json"
+
+
+def default_outputs_dir(api_key: str, session_id: str) -> str:
+    return os.path.join(cache_dir(), f"outputs-{account_key(api_key)}", _resource_id(session_path(session_id)))
+
+
+def _lines(text: str) -> Iterator[str]:
+    """Yields the lines of ``text`` with their endings, without building a list of them."""
+    start = 0
+    while start < len(text):
+        end = text.find("\n", start)
+        end = len(text) if end < 0 else end + 1
+        yield text[start:end]
+        start = end
+
+
+def _diff_path(header: str) -> Optional[str]:
+    """Path from a ``--- a/x`` / ``+++ b/x`` line, or None for /dev/null."""
+    path = header[4:].rstrip("\n").split("\t", 1)[0]
+    if path == "/dev/null":
+        return None
+    return path[2:] if path[:2] in ("a/", "b/") else path
+
+
+class PatchStats:
+    """Per-file added/removed line counts, fed one unified diff line at a time.
+
+    Hunk line counts are tracked, so removed lines that happen to start with
+    ``---`` are not mistaken for file headers.
+    """
+
+    def __init__(self):
+        self.files: List[Dict[str, Any]] = []
+        self._current: Optional[Dict[str, Any]] = None
+        self._git_header = False
+        self._old_left = 0
+        self._new_left = 0
+
+    def _start(self, path: Optional[str]) -> Dict[str, Any]:
+        self._current = {"path": path, "status": "modified", "added": 0, "removed": 0}
+        self.files.append(self._current)
+        return self._current
+
+    def feed(self, line: str):
+        if self._old_left > 0 or self._new_left > 0:
+            marker = line[:1]
+            if marker == "+":
+                self._current["added"] += 1
+                self._new_left -= 1
+            elif marker == "-":
+                self._current["removed"] += 1
+                self._old_left -= 1
+            elif marker in (" ", "\n", ""):
+                self._old_left -= 1
+                self._new_left -= 1
+            return # "\ No newline at end of file" changes nothing
+
+        if line.startswith("diff --git "):
+            parts = line.rstrip("\n").split(" b/", 1)
+            self._start(parts[1] if len(parts) == 2 else None)
+            self._git_header = True
+        elif line.startswith("--- "):
+            old = _diff_path(line)
+            current = self._current if self._git_header else self._start(old)
+            current["path"] = current["path"] or old
+            if old is None:
+                current["status"] = "added"
+        elif line.startswith("+++ ") and self._current is not None:
+            new = _diff_path(line)
+            if new is None:
+                self._current["status"] = "deleted"
+            else:
+                self._current["path"] = new
+        elif line.startswith("@@") and self._current is not None:
+            match = HUNK_RE.match(line)
+            if match:
+                self._old_left = int(match.group(1) or 1)
+                self._new_left = int(match.group(2) or 1)
+            self._git_header = False
+        elif self._git_header and self._current is not None:
+            if line.startswith("new file mode"):
+                self._current["status"] = "added"
+            elif line.startswith("deleted file mode"):
+                self._current["status"] = "deleted"
+            elif line.startswith("rename from "):
+                self._current["status"] = "renamed"
+                self._current["from"] = line[12:].rstrip("\n")
+
+
+def patch_sha256(git_patch: Dict[str, Any]) -> str:
+    """Hash of the patch's diff, computed a line at a time."""
+    digest = hashlib.sha256()
+    for line in _lines(git_patch.get("unidiffPatch") or ""):
+        digest.update(line.encode("utf-8"))
+    return digest.hexdigest()
+
+
+def write_patch(path: str, git_patch: Dict[str, Any], activity: Optional[str] = None,
+                source: Optional[str] = None) -> Dict[str, Any]:
+    """Writes one ``gitPatch`` to ``path`` and returns its index entry (without the file name).
+
+    The diff is copied line by line through a buffered file, and the file is
+    moved into place only once complete.
+    """
+    message = (git_patch.get("suggestedCommitMessage") or "").strip()
+    diff = git_patch.get("unidiffPatch") or ""
+    subject, _, body = message.partition("\n")
+    header = [f"Subject: {subject}"]
+    if git_patch.get("baseCommitId"):
+        header.append(f"Base-Commit: {git_patch['baseCommitId']}")
+    if source:
+        header.append(f"Source: {source}")
+    if activity:
+        header.append(f"Activity: {activity}")
+    header.append("")
+    # Indented like git log, so a message line can never look like a diff header
+    if body.strip():
+        header.extend(f"    {line}".rstrip() for line in body.strip("\n").splitlines())
+        header.append("")
+    header.append("---\n")
+
+    stats = PatchStats()
+    with atomic_open(path, "w", encoding="utf-8", newline="") as f:
+        f.write("\n".join(header))
+        for line in _lines(diff):
+            stats.feed(line)
+            f.write(line)
+        if diff and not diff.endswith("\n"):
+            f.write("\n") # git apply rejects a patch whose last line is unterminated
+        size = f.tell()
+
+    return {
+        "activity": activity,
+        "source": source,
+        "baseCommit": git_patch.get("baseCommitId"),
+        "subject": subject,
+        "bytes": size,
+        "added": sum(entry["added"] for entry in stats.files),
+        "removed": sum(entry["removed"] for entry in stats.files),
+        "files": stats.files,
+    }
+
+
+class OutputsIndex:
+    """``index.json`` of one session's downloaded artifacts, plus the activity cursor to resume from."""
+
+    def __init__(self, directory: str, session: str):
+        self.directory = directory
+        self.session = session
+        self.cursor = ActivityCursor()
+        self.patches: List[Dict[str, Any]] = []
+        self.pull_requests: List[Dict[str, Any]] = []
+        self.state: Optional[str] = None
+        self.new: List[Dict[str, Any]] = []
+
+    @property
+    def path(self) -> str:
+        return os.path.join(self.directory, INDEX_NAME)
+
+    @classmethod
+    def load(cls, directory: str, session: str) -> "OutputsIndex":
+        index = cls(directory, session)
+        try:
+            with open(index.path, "r") as f:
+                data = json.load(f)
+        except (OSError, ValueError):
+            return index # Missing or corrupt: download everything again
+        index.cursor = ActivityCursor(data.get("createTime"), data.get("boundaryIds"))
+        index.patches = data.get("patches", [])
+        index.pull_requests = data.get("pullRequests", [])
+        index.state = data.get("state")
+        return index
+
+    def save(self):
+        data = {
+            "session": self.session,
+            "state": self.state,
+            "updated": time.strftime("%Y-%m-%dT%H:%M:%SZ", time.gmtime()),
+            "createTime": self.cursor.create_time,
+            "boundaryIds": sorted(self.cursor.boundary_ids),
+            "added": sum(patch["added"] for patch in self.patches),
+            "removed": sum(patch["removed"] for patch in self.patches),
+            "patches": self.patches,
+            "pullRequests": self.pull_requests,
+        }
+        # Unlike the caches, a failed write here is reported: the index is the command's output
+        with atomic_open(self.path) as f:
+            json.dump(data, f, indent=2)
+
+    def add_patch(self, git_patch: Dict[str, Any], activity: Optional[str], source: Optional[str],
+                  create_time: Optional[str]) -> Optional[Dict[str, Any]]:
+        """Writes the patch unless an identical one is already stored; returns the new entry."""
+        sha256 = patch_sha256(git_patch)
+        if any(patch["sha256"] == sha256 for patch in self.patches):
+            return None
+        name = f"{len(self.patches) + 1:04d}-{activity or 'session'}.patch"
+        entry = write_patch(os.path.join(self.directory, name), git_patch, activity, source)
+        entry = dict(file=name, createTime=create_time, sha256=sha256, **entry)
+        self.patches.append(entry)
+        self.new.append(entry)
+        return entry
+
+    def latest_patch(self) -> Optional[str]:
+        """The most recently created patch (not necessarily the last one written)."""
+        if not self.patches:
+            return None
+        latest = max(reversed(self.patches), key=lambda patch: timestamp_key(patch.get("createTime") or ""))
+        return os.path.join(self.directory, latest["file"])
+
+
+def _change_sets(artifacts: List[Dict[str, Any]]) -> Iterator[Dict[str, Any]]:
+    for artifact in artifacts or []:
+        change_set = artifact.get("changeSet")
+        if change_set and change_set.get("gitPatch"):
+            yield change_set
+
+
+def download_outputs(client, session_id: str, directory: Optional[str] = None, reset: bool = False,
+                     page_size: int = PAGE_SIZE) -> OutputsIndex:
+    """Downloads the session's new patches and pull request metadata into ``directory``.
+
+    ``reset`` discards the existing index (not the patch files) and starts over.
+    """
+    name = session_path(session_id)
+    directory = directory or default_outputs_dir(client.api_key, name)
+    os.makedirs(directory, exist_ok=True)
+    index = OutputsIndex(directory, _resource_id(name)) if reset else OutputsIndex.load(directory, _resource_id(name))
+
+    session = client.get_session(name)
+    index.state = session.get("state")
+
+    # The API isn't assumed to return activities in order, so each one is checked against
+    # the cursor as it was when the run started; the cursor only moves once every page is in.
+    # An interrupted run therefore replays from the old cursor, and the hash check skips
+    # patches it already wrote.
+    start = index.cursor
+    reached = ActivityCursor(start.create_time, list(start.boundary_ids))
+    seen = set()
+    pages = client.iter_activities(name, page_size=page_size, create_time=start.create_time)
+    pending = 0
+    for activity in pages:
+        act_id = activity.get("id") or activity.get("name", "")
+        if act_id in seen or not start.is_new(activity):
+            continue
+        seen.add(act_id)
+        reached.accept(activity)
+        for change_set in _change_sets(activity.get("artifacts")):
+            index.add_patch(change_set["gitPatch"], activity.get("id") or _resource_id(activity.get("name")),
+                            change_set.get("source"), activity.get("createTime"))
+        pending += 1
+        if pending >= page_size:
+            index.save() # Keeps the patches written so far listed if the run is interrupted
+            pending = 0
+    index.cursor = reached
+
+    pull_requests = []
+    for output in session.get("outputs", []):
+        if "pullRequest" in output:
+            pull_requests.append(output["pullRequest"])
+        for change_set in _change_sets([output]):
+            index.add_patch(change_set["gitPatch"], None, change_set.get("source"), session.get("updateTime"))
+    index.pull_requests = pull_requests or index.pull_requests
+    index.save()
+    return index
@@ -0,0 +1,60 @@
+"""Thin launcher for jules_client.py.
+
+Forwards argv to a running ``jules_client.py daemon`` over its Unix socket so
+each call costs a socket round-trip instead of a Python cold start. Falls back
+to the regular one-shot jules_client.py run when no daemon is listening.
+Keep this module free of heavy imports.
+"""
+import json
+import os
+import socket
+import sys
+
+
+def default_socket_path() -> str:
+    return os.getenv("JULES_DAEMON_SOCKET") or f"/tmp/jules-daemon-{os.getuid()}.sock"
+
+
+def forward(argv, socket_path: str) -> int:
+    """Sends one command to the daemon and relays its streamed output. Raises OSError if it isn't running."""
+    sock = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+    try:
+        sock.connect(socket_path)
+    except OSError:
+        sock.close()
+        raise
+
+    request = {"argv": argv, "cwd": os.getcwd(), "apiKey": os.getenv("JULES_API_KEY")}
+    with sock, sock.makefile("rb") as reader:
+        sock.sendall((json.dumps(request) + "\n").encode("utf-8"))
+        for line in reader:
+            message = json.loads(line)
+            if "out" in message:
+                sys.stdout.write(message["out"])
+                sys.stdout.flush()
+            elif "err" in message:
+                sys.stderr.write(message["err"])
+                sys.stderr.flush()
+            elif "exit" in message:
+                return message["exit"]
+    # Connection dropped without an exit status (daemon killed mid-command)
+    return 1
+
+
+def main():
+    argv = sys.argv[1:]
+    try:
+        sys.exit(forward(argv, default_socket_path()))
+    except (FileNotFoundError, ConnectionRefusedError):
+        pass
+    except KeyboardInterrupt:
+        # Closing the connection tells the daemon to stop the command (and save its checkpoint)
+        sys.exit(130)
+
+    # No daemon: run the regular one-shot client
+    client_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), "jules_client.py")
+    os.execv(sys.executable, [sys.executable, client_path] + argv)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,313 @@
+"""Local SQLite store for Jules sessions, activities and sources.
+
+Kept current by ``jules_client.py sync``, which only pulls activities newer
+than each session's stored high-water mark, and read by ``--local`` /
+``--max-age`` so repeated questions about a session don't re-fetch its whole
+history from the API.
+"""
+import json
+import os
+import re
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+from jules_client import ActivityCursor, account_key, cache_dir, session_path, timestamp_key
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS sessions (
+    name TEXT PRIMARY KEY,
+    title TEXT,
+    state TEXT,
+    prompt TEXT,
+    create_time TEXT,
+    create_key TEXT,
+    update_time TEXT,
+    data TEXT NOT NULL,
+    synced_at REAL NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_sessions_state ON sessions(state);
+CREATE INDEX IF NOT EXISTS idx_sessions_create_key ON sessions(create_key);
+
+CREATE TABLE IF NOT EXISTS activities (
+    name TEXT PRIMARY KEY,
+    session_name TEXT NOT NULL,
+    activity_id TEXT,
+    originator TEXT,
+    description TEXT,
+    create_time TEXT,
+    create_key TEXT,
+    data TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS idx_activities_session_time ON activities(session_name, create_key);
+CREATE INDEX IF NOT EXISTS idx_activities_originator ON activities(originator);
+
+CREATE TABLE IF NOT EXISTS sources (
+    name TEXT PRIMARY KEY,
+    owner TEXT,
+    repo TEXT,
+    data TEXT NOT NULL
+);
+
+-- High-water marks: activity cursor per session, plus list-level sync times
+CREATE TABLE IF NOT EXISTS sync_state (
+    key TEXT PRIMARY KEY,
+    create_time TEXT,
+    boundary_ids TEXT,
+    update_time TEXT,
+    synced_at REAL NOT NULL
+);
+"""
+
+
+# Full-text index over session titles/prompts and activity descriptions.
+# doc_key is the session or activity resource name; the other ids locate the hit.
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS search_index USING fts5(
+    doc_key UNINDEXED,
+    kind UNINDEXED,
+    session_name UNINDEXED,
+    title,
+    body,
+    tokenize = 'porter unicode61'
+);
+"""
+
+WORD_RE = re.compile(r"\w+", re.UNICODE)
+
+
+def default_store_path(api_key: str) -> str:
+    return os.path.join(cache_dir(), f"jules-{account_key(api_key)}.db")
+
+
+class JulesStore:
+    """Thin wrapper over one SQLite database in WAL mode (readers never block the syncing writer)."""
+
+    def __init__(self, path: str):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+        try:
+            self.conn.executescript(FTS_SCHEMA)
+            self.fts = True
+        except sqlite3.OperationalError:
+            self.fts = False # SQLite built without FTS5: search falls back to LIKE scans
+        if self.fts:
+            self._backfill_index()
+
+    def close(self):
+        self.conn.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # --- Writes ---
+
+    def _index(self, docs):
+        """Replaces search documents given as (doc_key, kind, session_name, title, body) tuples."""
+        if not self.fts or not docs:
+            return
+        self.conn.executemany("DELETE FROM search_index WHERE doc_key = ?", [(doc[0],) for doc in docs])
+        self.conn.executemany("INSERT INTO search_index VALUES (?, ?, ?, ?, ?)", docs)
+
+    def _backfill_index(self):
+        """Indexes rows stored before the search index existed."""
+        if self.conn.execute("SELECT 1 FROM search_index LIMIT 1").fetchone():
+            return
+        with self.conn:
+            self._index([(r["name"], "session", r["name"], r["title"] or "", r["prompt"] or "")
+                         for r in self.conn.execute("SELECT name, title, prompt FROM sessions")])
+            self._index([(r["name"], "activity", r["session_name"], "", r["description"] or "")
+                         for r in self.conn.execute("SELECT name, session_name, description FROM activities")])
+
+    def upsert_sessions(self, sessions: List[Dict[str, Any]]):
+        now = time.time()
+        rows = [(
+            s["name"], s.get("title"), s.get("state"), s.get("prompt"),
+            s.get("createTime"), timestamp_key(s.get("createTime", "")), s.get("updateTime"),
+            json.dumps(s), now,
+        ) for s in sessions if s.get("name")]
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._index([(row[0], "session", row[0], row[1] or "", row[3] or "") for row in rows])
+
+    def upsert_activities(self, session_name: str, activities: List[Dict[str, Any]]):
+        session_name = session_path(session_name)
+        rows = []
+        for a in activities:
+            activity_id = a.get("id") or a.get("name", "").rsplit("/", 1)[-1]
+            name = a.get("name") or f"{session_name}/activities/{activity_id}"
+            rows.append((
+                name, session_name, activity_id, (a.get("originator") or "").lower(),
+                a.get("description"), a.get("createTime"), timestamp_key(a.get("createTime", "")),
+                json.dumps(a),
+            ))
+        with self._lock, self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO activities VALUES (?, ?, ?, ?, ?, ?, ?, ?)", rows)
+            self._index([(row[0], "activity", session_name, "", row[4] or "") for row in rows])
+
+    def upsert_sources(self, sources: List[Dict[str, Any]]):
+        rows = [(
+            s["name"], s.get("githubRepo", {}).get("owner"), s.get("githubRepo", {}).get("repo"), json.dumps(s),
+        ) for s in sources if s.get("name")]
+        with self._lock, self.conn:
+            self.conn.executemany("INSERT OR REPLACE INTO sources VALUES (?, ?, ?, ?)", rows)
+
+    def save_cursor(self, session_name: str, cursor: ActivityCursor, update_time: Optional[str] = None):
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state VALUES (?, ?, ?, ?, ?)",
+                (session_path(session_name), cursor.create_time, json.dumps(sorted(cursor.boundary_ids)),
+                 update_time, time.time()))
+
+    def mark_synced(self, key: str):
+        """Records a list-level sync (e.g. ``"sessions"``) for ``--max-age`` checks."""
+        with self._lock, self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO sync_state (key, synced_at) VALUES (?, ?)", (key, time.time()))
+
+    # --- Reads ---
+
+    def cursor_for(self, session_name: str) -> ActivityCursor:
+        row = self.conn.execute(
+            "SELECT create_time, boundary_ids FROM sync_state WHERE key = ?",
+            (session_path(session_name),)).fetchone()
+        if row is None:
+            return ActivityCursor()
+        return ActivityCursor(row["create_time"], json.loads(row["boundary_ids"] or "[]"))
+
+    def synced_update_time(self, session_name: str) -> Optional[str]:
+        """The session ``updateTime`` at its last activity sync, if any."""
+        row = self.conn.execute(
+            "SELECT update_time FROM sync_state WHERE key = ?", (session_path(session_name),)).fetchone()
+        return row["update_time"] if row else None
+
+    def synced_within(self, key: str, max_age: Optional[float]) -> bool:
+        """True if ``key`` (``"sessions"`` or a session name) was synced less than ``max_age`` seconds ago."""
+        if max_age is None:
+            return True
+        row = self.conn.execute("SELECT synced_at FROM sync_state WHERE key = ?", (key,)).fetchone()
+        return row is not None and time.time() - row["synced_at"] <= max_age
+
+    def get_session(self, session_name: str, max_age: Optional[float] = None) -> Optional[Dict[str, Any]]:
+        row = self.conn.execute(
+            "SELECT data, synced_at FROM sessions WHERE name = ?", (session_path(session_name),)).fetchone()
+        if row is None or (max_age is not None and time.time() - row["synced_at"] > max_age):
+            return None
+        return json.loads(row["data"])
+
+    def list_sessions(self, limit: int = 30, state: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT data FROM sessions"
+        params: List[Any] = []
+        if state:
+            query += " WHERE state = ?"
+            params.append(state)
+        query += " ORDER BY create_key DESC LIMIT ?"
+        params.append(limit)
+        return [json.loads(row["data"]) for row in self.conn.execute(query, params)]
+
+    def list_activities(self, session_name: str, limit: Optional[int] = None,
+                        originator: Optional[str] = None) -> List[Dict[str, Any]]:
+        query = "SELECT data FROM activities WHERE session_name = ?"
+        params: List[Any] = [session_path(session_name)]
+        if originator:
+            query += " AND originator = ?"
+            params.append(originator.lower())
+        query += " ORDER BY create_key"
+        if limit:
+            query += " LIMIT ?"
+            params.append(limit)
+        return [json.loads(row["data"]) for row in self.conn.execute(query, params)]
+
+    def search(self, query: str, limit: int = 20, session_name: Optional[str] = None,
+               raw: bool = False) -> List[Dict[str, Any]]:
+        """Ranked full-text search over session titles/prompts and activity descriptions.
+
+        Plain queries match documents containing every word; ``raw`` passes
+        FTS5 query syntax (phrases, OR, NEAR, prefix*) through unchanged.
+        """
+        words = WORD_RE.findall(query)
+        if not words and not raw:
+            return []
+        params: List[Any] = []
+        if self.fts:
+            match = query if raw else " ".join(f'"{word}"' for word in words)
+            sql = ("SELECT doc_key, kind, session_name, title, "
+                   "snippet(search_index, 4, '[', ']', '...', 12) AS snippet, bm25(search_index) AS score "
+                   "FROM search_index WHERE search_index MATCH ?")
+            params.append(match)
+        else:
+            sql = ("SELECT doc_key, kind, session_name, title, substr(body, 1, 120) AS snippet, 0 AS score "
+                   "FROM (SELECT name AS doc_key, 'session' AS kind, name AS session_name, "
+                   "coalesce(title, '') AS title, coalesce(prompt, '') AS body FROM sessions "
+                   "UNION ALL SELECT name, 'activity', session_name, '', coalesce(description, '') FROM activities) "
+                   "WHERE 1")
+            for word in words:
+                sql += " AND (title LIKE ? OR body LIKE ?)"
+                params.extend([f"%{word}%", f"%{word}%"])
+        if session_name:
+            sql += " AND session_name = ?"
+            params.append(session_path(session_name))
+        sql += " ORDER BY score LIMIT ?"
+        params.append(limit)
+        return [{
+            "sessionName": row["session_name"],
+            "name": row["doc_key"],
+            "kind": row["kind"],
+            "title": row["title"],
+            "snippet": row["snippet"],
+            "score": round(-row["score"], 3),
+        } for row in self.conn.execute(sql, params)]
+
+    def list_sources(self) -> List[Dict[str, Any]]:
+        return [json.loads(row["data"]) for row in self.conn.execute("SELECT data FROM sources ORDER BY name")]
+
+
+def sync(client, store: JulesStore, session_ids: Optional[List[str]] = None,
+         include_sources: bool = False) -> Dict[str, int]:
+    """Brings the store up to date and returns counters.
+
+    Sessions are re-listed (cheap, 100 per page); activities are only fetched
+    for sessions whose state/updateTime moved since their last sync, and then
+    only past the stored cursor.
+    """
+    stats = {"sessions": 0, "sessions_synced": 0, "sessions_unchanged": 0, "activities": 0, "sources": 0}
+
+    if session_ids:
+        sessions = [client.get_session(session_id) for session_id in session_ids]
+    else:
+        sessions = list(client.iter_sessions(page_size=100))
+        store.mark_synced("sessions")
+    store.upsert_sessions(sessions)
+    stats["sessions"] = len(sessions)
+
+    for session in sessions:
+        name = session["name"]
+        update_time = session.get("updateTime")
+        if update_time and update_time == store.synced_update_time(name):
+            stats["sessions_unchanged"] += 1
+            continue
+        cursor = store.cursor_for(name)
+        activities = client.fetch_new_activities(name, cursor, page_size=100)
+        store.upsert_activities(name, activities)
+        store.save_cursor(name, cursor, update_time)
+        stats["sessions_synced"] += 1
+        stats["activities"] += len(activities)
+
+    if include_sources:
+        sources = list(client.iter_sources(page_size=100))
+        store.upsert_sources(sources)
+        store.mark_synced("sources")
+        stats["sources"] = len(sources)
+    return stats
@@ -0,0 +1,315 @@
+"""Local stand-in for the Jules REST API, for benchmarks and offline testing.
+
+Implements the sessions, activities and sources endpoints used by
+``jules_client.py`` with pagination and the ``createTime`` activity filter,
+plus knobs for latency, injected errors and activity growth. Point a client
+at it with ``JULES_API_BASE_URL=http://127.0.0.1:8777/v1alpha``.
+
+Usage:
+    python mock_jules_api.py [--port 8777] [--latency 0.05] [--error-rate 0.01]
+                             [--sessions 50] [--activities 20] [--growth 5] [--sources 250]
+
+Seeded sessions are ``sessions/1`` .. ``sessions/N`` (completed, ``--activities``
+each); ``--sized 10,1000,10000`` adds completed sessions ``sessions/size-10`` etc.
+Sessions created through the API grow by ``--growth`` activities per second
+up to ``--activities`` and then complete.
+"""
+import argparse
+import json
+import random
+import re
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List, Optional
+from urllib.parse import parse_qs, urlparse
+
+from jules_client import timestamp_key
+
+EPOCH = datetime(2025, 1, 1, tzinfo=timezone.utc)
+SESSION_RE = re.compile(r"^/v1alpha/sessions/([^/:]+)(?::(sendMessage|approvePlan))?$")
+ACTIVITIES_RE = re.compile(r"^/v1alpha/sessions/([^/]+)/activities(?:/([^/]+))?$")
+SOURCE_RE = re.compile(r"^/v1alpha/(sources/.+)$")
+
+
+def _timestamp(seconds: float) -> str:
+    """RFC 3339 timestamp ``seconds`` after EPOCH, with millisecond precision like the real API."""
+    return (EPOCH + timedelta(seconds=seconds)).strftime("%Y-%m-%dT%H:%M:%S.%f")[:-3] + "Z"
+
+
+def _git_patch(step: int) -> Dict[str, Any]:
+    """Small changeset for an "edited files" step: one modified file and one new file."""
+    diff = (
+        f"diff --git a/src/app.py b/src/app.py\n"
+        f"index 1111111..2222222 100644\n"
+        f"--- a/src/app.py\n"
+        f"+++ b/src/app.py\n"
+        f"@@ -1,3 +1,4 @@\n"
+        f" import os\n"
+        f"-STEP = 0\n"
+        f"+STEP = {step}\n"
+        f"+DEBUG = False\n"
+        f" \n"
+        f"diff --git a/tests/test_step{step}.py b/tests/test_step{step}.py\n"
+        f"new file mode 100644\n"
+        f"index 0000000..3333333\n"
+        f"--- /dev/null\n"
+        f"+++ b/tests/test_step{step}.py\n"
+        f"@@ -0,0 +1,2 @@\n"
+        f"+def test_step():\n"
+        f"+    assert {step} >= 0\n"
+    )
+    return {"baseCommitId": "0123456789abcdef0123456789abcdef01234567", "unidiffPatch": diff,
+            "suggestedCommitMessage": f"Update step to {step}\n\nAdds a regression test for step {step}."}
+
+
+class MockSession:
+    """One session whose activities are generated on demand (and grow over time if ``growth`` is set)."""
+
+    def __init__(self, session_id: str, target: int, growth: float = 0.0, title: str = "",
+                 created_at: float = 0.0, source: Optional[str] = None):
+        self.id = session_id
+        self.target = target
+        self.growth = growth
+        self.title = title or f"Mock session {session_id}"
+        self.created_at = created_at
+        self.started = time.monotonic()
+        self.source = source
+        self.state = "IN_PROGRESS" if growth else "COMPLETED"
+        self.activities: List[Dict[str, Any]] = []
+        self.messages = 0
+
+    def _grow(self):
+        count = self.target if not self.growth else \
+            min(self.target, int((time.monotonic() - self.started) * self.growth))
+        for index in range(len(self.activities), count):
+            activity = {
+                "name": f"sessions/{self.id}/activities/a{index}",
+                "id": f"a{index}",
+                "originator": "agent",
+                "description": f"Step {index}: ran the test suite" if index % 7 else f"Step {index}: edited files",
+                "createTime": _timestamp(self.created_at + index * 0.25),
+                "progressUpdated": {"title": f"Step {index}"},
+            }
+            if index % 7 == 0:
+                activity["artifacts"] = [{"changeSet": {"source": self.source or "sources/github/mock-org/repo0",
+                                                        "gitPatch": _git_patch(index)}}]
+            self.activities.append(activity)
+        if self.growth and count >= self.target and self.state == "IN_PROGRESS":
+            self.state = "COMPLETED"
+
+    def resource(self) -> Dict[str, Any]:
+        self._grow()
+        last = self.activities[-1]["createTime"] if self.activities else _timestamp(self.created_at)
+        session = {
+            "name": f"sessions/{self.id}",
+            "id": self.id,
+            "title": self.title,
+            "state": self.state,
+            "createTime": _timestamp(self.created_at),
+            "updateTime": last,
+            "url": f"https://jules.example/session/{self.id}",
+            "outputs": [],
+        }
+        if self.source:
+            session["sourceContext"] = {"source": self.source}
+        return session
+
+
+class MockJulesApi:
+    """In-memory API state shared by every request handler thread."""
+
+    def __init__(self, sessions: int = 50, activities: int = 20, growth: float = 5.0, sources: int = 250,
+                 sized: Optional[List[int]] = None, latency: float = 0.0, error_rate: float = 0.0):
+        self.latency = latency
+        self.error_rate = error_rate
+        self.growth = growth
+        self.activities = activities
+        self.lock = threading.Lock()
+        self.requests = 0
+        self.errors_injected = 0
+        self.sources = [{
+            "name": f"sources/github/mock-org/repo{index}",
+            "id": f"github/mock-org/repo{index}",
+            "githubRepo": {"owner": "mock-org", "repo": f"repo{index}", "isPrivate": False,
+                           "defaultBranch": {"displayName": "main"}},
+        } for index in range(sources)]
+        self.sessions: Dict[str, MockSession] = {}
+        for index in range(1, sessions + 1):
+            self._add(MockSession(str(index), activities, created_at=index * 3600))
+        for size in sized or []:
+            self._add(MockSession(f"size-{size}", size, created_at=0))
+        self._next_id = sessions + 1
+
+    def _add(self, session: MockSession):
+        self.sessions[session.id] = session
+
+    def reset_counters(self):
+        with self.lock:
+            self.requests = 0
+            self.errors_injected = 0
+
+    @staticmethod
+    def _page(items: List[Any], query: Dict[str, List[str]], default_size: int) -> Dict[str, Any]:
+        size = int(query.get("pageSize", [default_size])[0])
+        offset = int(query.get("pageToken", ["0"])[0] or 0)
+        page = {"items": items[offset:offset + size]}
+        if offset + size < len(items):
+            page["nextPageToken"] = str(offset + size)
+        return page
+
+    def handle(self, method: str, path: str, query: Dict[str, List[str]],
+               body: Optional[Dict[str, Any]]) -> (int, Dict[str, Any]):
+        """Routes one request and returns ``(status, payload)``."""
+        with self.lock:
+            self.requests += 1
+            inject = self.error_rate and random.random() < self.error_rate
+            if inject:
+                self.errors_injected += 1
+        if self.latency:
+            time.sleep(self.latency * random.uniform(0.5, 1.5))
+        if inject:
+            return 503, {"error": {"code": 503, "message": "Injected failure", "status": "UNAVAILABLE"}}
+
+        with self.lock:
+            if path == "/v1alpha/sessions" and method == "GET":
+                ordered = sorted(self.sessions.values(), key=lambda s: s.created_at, reverse=True)
+                page = self._page(ordered, query, 30)
+                page["sessions"] = [session.resource() for session in page.pop("items")]
+                return 200, page
+            if path == "/v1alpha/sessions" and method == "POST":
+                session_id = str(self._next_id)
+                self._next_id += 1
+                source = (body or {}).get("sourceContext", {}).get("source")
+                session = MockSession(session_id, self.activities, self.growth, (body or {}).get("title", ""),
+                                      created_at=time.time() - EPOCH.timestamp(), source=source)
+                self._add(session)
+                return 200, session.resource()
+
+            match = ACTIVITIES_RE.match(path)
+            if match and method == "GET":
+                session = self.sessions.get(match.group(1))
+                if session is None:
+                    return 404, {"error": {"code": 404, "message": "Session not found"}}
+                session.resource()
+                if match.group(2):
+                    activity = next((a for a in session.activities if a["id"] == match.group(2)), None)
+                    return (200, activity) if activity else (404, {"error": {"code": 404, "message": "Not found"}})
+                activities = session.activities
+                if "createTime" in query:
+                    after = timestamp_key(query["createTime"][0])
+                    activities = [a for a in activities if timestamp_key(a["createTime"]) >= after]
+                page = self._page(activities, query, 50)
+                page["activities"] = page.pop("items")
+                return 200, page
+
+            match = SESSION_RE.match(path)
+            if match:
+                session = self.sessions.get(match.group(1))
+                if session is None:
+                    return 404, {"error": {"code": 404, "message": "Session not found"}}
+                action = match.group(2)
+                if method == "GET" and not action:
+                    return 200, session.resource()
+                if method == "DELETE" and not action:
+                    del self.sessions[session.id]
+                    return 200, {}
+                if method == "POST" and action == "sendMessage":
+                    session.messages += 1
+                    return 200, {}
+                if method == "POST" and action == "approvePlan":
+                    return 200, {}
+
+            if path == "/v1alpha/sources" and method == "GET":
+                page = self._page(self.sources, query, 30)
+                page["sources"] = page.pop("items")
+                return 200, page
+            match = SOURCE_RE.match(path)
+            if match and method == "GET":
+                source = next((s for s in self.sources if s["name"] == match.group(1)), None)
+                return (200, source) if source else (404, {"error": {"code": 404, "message": "Source not found"}})
+
+        return 404, {"error": {"code": 404, "message": f"No mock route for {method} {path}"}}
+
+
+class MockJulesHandler(BaseHTTPRequestHandler):
+    api: MockJulesApi = None
+    protocol_version = "HTTP/1.1"  # Keep-alive, like the real API
+    # Headers and body go out in separate writes; with Nagle on, delayed ACKs add ~40ms per call
+    disable_nagle_algorithm = True
+
+    def log_message(self, format, *args):
+        pass # Request logging would dominate benchmark timings
+
+    def _dispatch(self, method: str):
+        parsed = urlparse(self.path)
+        body = None
+        length = int(self.headers.get("Content-Length") or 0)
+        if length:
+            body = json.loads(self.rfile.read(length) or b"{}")
+        status, payload = self.api.handle(method, parsed.path, parse_qs(parsed.query), body)
+        data = json.dumps(payload).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        if status == 503:
+            self.send_header("Retry-After", "1")
+        self.end_headers()
+        self.wfile.write(data)
+
+    def do_GET(self):
+        self._dispatch("GET")
+
+    def do_POST(self):
+        self._dispatch("POST")
+
+    def do_DELETE(self):
+        self._dispatch("DELETE")
+
+
+def create_mock_server(host: str = "127.0.0.1", port: int = 8777, **config) -> ThreadingHTTPServer:
+    """Builds (but does not start) a mock server; ``port=0`` picks a free port.
+
+    ``config`` is passed to ``MockJulesApi``; the state is reachable as ``server.api``.
+    """
+    api = MockJulesApi(**config)
+    handler = type("BoundMockJulesHandler", (MockJulesHandler,), {"api": api})
+    server = ThreadingHTTPServer((host, port), handler)
+    server.daemon_threads = True
+    server.api = api
+    return server
+
+
+def base_url(server: ThreadingHTTPServer) -> str:
+    host, port = server.server_address[:2]
+    return f"http://{host}:{port}/v1alpha"
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Local mock of the Jules API")
+    parser.add_argument("--host", default="127.0.0.1", help="Bind address (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8777, help="Port (default: 8777)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Mean added latency per request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Fraction of requests answered with 503")
+    parser.add_argument("--sessions", type=int, default=50, help="Seeded completed sessions (default: 50)")
+    parser.add_argument("--activities", type=int, default=20, help="Activities per session (default: 20)")
+    parser.add_argument("--growth", type=float, default=5.0,
+                        help="Activities per second added to sessions created via the API (default: 5)")
+    parser.add_argument("--sources", type=int, default=250, help="Connected sources (default: 250)")
+    parser.add_argument("--sized", default="", help="Comma-separated activity counts for extra sessions (e.g. 10,1000)")
+    args = parser.parse_args()
+
+    server = create_mock_server(
+        args.host, args.port, sessions=args.sessions, activities=args.activities, growth=args.growth,
+        sources=args.sources, sized=[int(size) for size in args.sized.split(",") if size],
+        latency=args.latency, error_rate=args.error_rate)
+    print(f"Mock Jules API at {base_url(server)}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
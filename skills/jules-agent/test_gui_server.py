@@ -0,0 +1,290 @@
+"""Unit tests for gui_server request handling.
+
+Run with ``python -m unittest`` from this directory (``make test`` runs them too).
+"""
+import gzip
+import json
+import os
+import socket
+import threading
+import time
+import unittest
+from unittest import mock
+
+import gui_server
+import mock_jules_api
+from gui_server import (MIN_COMPRESS_BYTES, ActivityBroadcaster, CompressedBodies, JulesGuiHandler, PooledHTTPServer,
+                        ResponseCache)
+from jules_client import JulesClient
+from jules_metrics import METRICS
+
+
+def http_request(address, raw: bytes) -> bytes:
+    """Sends ``raw`` and returns everything the server writes until it closes the connection."""
+    with socket.create_connection(address, timeout=10) as conn:
+        conn.sendall(raw)
+        chunks = []
+        while True:
+            chunk = conn.recv(65536)
+            if not chunk:
+                return b"".join(chunks)
+            chunks.append(chunk)
+
+
+def parse_response(response: bytes):
+    """(status, headers with lower-case names, body) of a raw HTTP/1.0 response."""
+    head, _, body = response.partition(b"\r\n\r\n")
+    lines = head.decode("iso-8859-1").split("\r\n")
+    headers = dict((name.lower(), value) for name, _, value in (line.partition(": ") for line in lines[1:]))
+    return int(lines[0].split()[1]), headers, body
+
+
+def sse_events(response: bytes):
+    """(id, event, data) of each Server-Sent Event in a raw response."""
+    events = []
+    for block in response.split(b"\r\n\r\n", 1)[-1].decode("utf-8").split("\n\n"):
+        fields = dict(line.split(": ", 1) for line in block.splitlines() if not line.startswith(":"))
+        if "event" in fields:
+            events.append((fields.get("id"), fields["event"], json.loads(fields["data"])))
+    return events
+
+
+class GuiServerTestCase(unittest.TestCase):
+    """Runs the GUI server (with its own client, caches and feeds) against an in-process mock API."""
+
+    handler_attributes = {}
+
+    def setUp(self):
+        self.api_server = mock_jules_api.create_mock_server(port=0, sessions=3, activities=20, sources=5)
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        self.client = JulesClient("k", requests_per_second=None)
+        self.client.base_url = mock_jules_api.base_url(self.api_server)
+        attributes = dict(client=self.client, cache=ResponseCache(), broadcaster=ActivityBroadcaster(),
+                          log_message=lambda *args: None)
+        attributes.update(self.handler_attributes)
+        self.handler = type("TestHandler", (JulesGuiHandler,), attributes)
+        self.server = PooledHTTPServer(("127.0.0.1", 0), self.handler, max_workers=4)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+        self.client.close()
+        self.api_server.shutdown()
+        self.api_server.server_close()
+
+    def get(self, path: str, **headers) -> bytes:
+        lines = [f"GET {path} HTTP/1.0"] + [f"{name.replace('_', '-')}: {value}" for name, value in headers.items()]
+        return http_request(self.server.server_address, ("\r\n".join(lines) + "\r\n\r\n").encode("utf-8"))
+
+    def post(self, path: str, payload) -> bytes:
+        body = json.dumps(payload).encode("utf-8")
+        head = f"POST {path} HTTP/1.0\r\nContent-Type: application/json\r\nContent-Length: {len(body)}\r\n\r\n"
+        return http_request(self.server.server_address, head.encode("utf-8") + body)
+
+
+class MalformedRequestTest(unittest.TestCase):
+    def setUp(self):
+        self.server = PooledHTTPServer(("127.0.0.1", 0), JulesGuiHandler, max_workers=2)
+        threading.Thread(target=self.server.serve_forever, daemon=True).start()
+
+    def tearDown(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def request(self, raw: bytes) -> bytes:
+        with socket.create_connection(self.server.server_address, timeout=5) as conn:
+            conn.sendall(raw)
+            chunks = []
+            while True:
+                chunk = conn.recv(4096)
+                if not chunk:
+                    return b"".join(chunks)
+                chunks.append(chunk)
+
+    def test_bad_request_line_gets_400_and_the_server_keeps_serving(self):
+        # Answered as HTTP/0.9, so there is no status line, only the error page
+        self.assertIn(b"Error code: 400", self.request(b"NONSENSE\r\n\r\n"))
+        self.assertTrue(self.request(b"GET /api/health HTTP/1.0\r\n\r\n").startswith(b"HTTP/1.0 200"))
+        routes = {dict(labels).get("route") for name, labels in METRICS.histograms
+                  if name == "jules_gui_request_duration_seconds"}
+        self.assertIn("other", routes)
+
+
+
+class FinishedStreamTest(GuiServerTestCase):
+    def test_terminal_session_stream_ends_with_an_end_event(self):
+        events = sse_events(self.get("/api/sessions/1/stream"))
+        self.assertEqual([event for _, event, _ in events], ["activity"] * 20 + ["state", "end"])
+        self.assertEqual(events[-1][2], {"state": "COMPLETED"})
+
+    def test_reconnects_to_a_finished_session_are_served_without_polling(self):
+        events = sse_events(self.get("/api/sessions/1/stream"))
+        requests_made = self.api_server.api.requests
+
+        # EventSource reconnects with the last ID it saw: nothing is left, so 204 stops it
+        response = self.get("/api/sessions/1/stream", Last_Event_ID=events[-1][0])
+        self.assertTrue(response.startswith(b"HTTP/1.0 204"))
+        # A new tab replays the finished backlog from memory
+        self.assertEqual(sse_events(self.get("/api/sessions/1/stream")), events)
+        # A reconnect that missed the tail gets just the tail
+        tail = sse_events(self.get("/api/sessions/1/stream", Last_Event_ID=events[-3][0]))
+        self.assertEqual(tail, events[-2:])
+        self.assertEqual(self.api_server.api.requests, requests_made)
+
+
+class ConditionalCompressedResponseTest(GuiServerTestCase):
+    def setUp(self):
+        super().setUp()
+        self.handler.compressed = CompressedBodies(max_entries=2)
+
+    def test_matching_if_none_match_gets_a_bodiless_304(self):
+        status, headers, body = parse_response(self.get("/api/sessions/1"))
+        self.assertEqual(status, 200)
+        etag = headers["etag"]
+        status, headers, body = parse_response(self.get("/api/sessions/1", If_None_Match=etag))
+        self.assertEqual((status, body), (304, b""))
+        self.assertEqual(headers["etag"], etag)
+        self.assertNotIn("content-length", headers)
+        # The tag of a compressed variant, or one in a list, matches too
+        _, compressed, _ = parse_response(self.get("/api/sessions/1/activities", Accept_Encoding="gzip"))
+        status, _, _ = parse_response(self.get("/api/sessions/1/activities", Accept_Encoding="gzip",
+                                               If_None_Match=f'"other", W/{compressed["etag"]}'))
+        self.assertEqual(status, 304)
+        status, _, _ = parse_response(self.get("/api/sessions/1", If_None_Match='"stale"'))
+        self.assertEqual(status, 200)
+
+    def test_accept_encoding_picks_the_coding(self):
+        _, plain, identity = parse_response(self.get("/api/sessions/1/activities"))
+        self.assertNotIn("content-encoding", plain)
+        self.assertGreaterEqual(len(identity), MIN_COMPRESS_BYTES)
+
+        _, headers, body = parse_response(self.get("/api/sessions/1/activities", Accept_Encoding="gzip, deflate"))
+        self.assertEqual(headers["content-encoding"], "gzip")
+        self.assertEqual(headers["vary"], "Accept-Encoding")
+        self.assertEqual(headers["etag"], plain["etag"][:-1] + '-gzip"')
+        self.assertEqual(gzip.decompress(body), identity)
+
+        _, headers, _ = parse_response(self.get("/api/sessions/1/activities", Accept_Encoding="gzip;q=0, deflate"))
+        self.assertNotIn("content-encoding", headers)
+
+        fake_brotli = mock.Mock(compress=lambda body, quality: b"br:" + body)
+        with mock.patch.object(gui_server, "brotli", fake_brotli):
+            _, headers, body = parse_response(self.get("/api/sessions/1/activities", Accept_Encoding="gzip, br"))
+        self.assertEqual((headers["content-encoding"], body), ("br", b"br:" + identity))
+        # Without brotli installed, br is never offered
+        with mock.patch.object(gui_server, "brotli", None):
+            _, headers, _ = parse_response(self.get("/api/sessions/1/activities", Accept_Encoding="br"))
+        self.assertNotIn("content-encoding", headers)
+
+    def test_small_bodies_are_sent_uncompressed(self):
+        _, headers, body = parse_response(self.get("/api/health", Accept_Encoding="gzip"))
+        self.assertLess(len(body), MIN_COMPRESS_BYTES)
+        self.assertNotIn("content-encoding", headers)
+        self.assertEqual(json.loads(body), {"status": "ok"})
+
+    def test_compressed_bodies_are_memoized_within_the_bound(self):
+        with mock.patch.object(gui_server, "_compress", wraps=gui_server._compress) as compress:
+            for session_id in ("1", "1", "2", "3", "1"):
+                self.get(f"/api/sessions/{session_id}/activities", Accept_Encoding="gzip")
+        # 1 once, 2, 3, then 1 again after 2 and 3 pushed it out
+        self.assertEqual(compress.call_count, 4)
+        self.assertEqual(len(self.handler.compressed._entries), 2)
+
+
+class ResponseCacheTest(unittest.TestCase):
+    def test_hits_until_the_ttl_expires(self):
+        cache = ResponseCache(ttl=0.2)
+        calls = []
+        fetch = lambda: calls.append(1) or len(calls)
+        self.assertEqual(cache.get_or_fetch("k", fetch), 1)
+        self.assertEqual(cache.get_or_fetch("k", fetch), 1)
+        time.sleep(0.25)
+        self.assertEqual(cache.get_or_fetch("k", fetch), 2)
+        self.assertEqual((cache.hits, cache.misses), (1, 2))
+
+    def test_least_recently_used_entry_is_evicted(self):
+        cache = ResponseCache(max_entries=2)
+        for key in ("a", "b", "a", "c"):
+            cache.get_or_fetch(key, lambda key=key: key.upper())
+        self.assertEqual(cache.get_or_fetch("a", lambda: "refetched"), "A")
+        self.assertEqual(cache.get_or_fetch("b", lambda: "refetched"), "refetched")
+
+    def test_concurrent_misses_share_one_upstream_call(self):
+        cache = ResponseCache()
+        release = threading.Event()
+        calls = []
+
+        def fetch():
+            calls.append(1)
+            release.wait(5)
+            return {"sessions": []}
+
+        results = []
+        threads = [threading.Thread(target=lambda: results.append(cache.get_or_fetch("k", fetch)))
+                   for _ in range(5)]
+        for thread in threads:
+            thread.start()
+        deadline = time.monotonic() + 5
+        while cache.misses < 5 and time.monotonic() < deadline:
+            time.sleep(0.01)
+        release.set()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(len(calls), 1)
+        self.assertEqual(results, [{"sessions": []}] * 5)
+
+    def test_failed_fetch_reaches_every_waiter_and_is_not_cached(self):
+        cache = ResponseCache()
+        with self.assertRaises(RuntimeError):
+            cache.get_or_fetch("k", lambda: (_ for _ in ()).throw(RuntimeError("upstream down")))
+        self.assertEqual(cache.get_or_fetch("k", lambda: "ok"), "ok")
+
+    def test_fetch_overlapping_an_invalidation_is_not_stored(self):
+        cache = ResponseCache()
+
+        def fetch():
+            cache.invalidate() # A mutation lands while the read is in flight
+            return "stale"
+
+        self.assertEqual(cache.get_or_fetch("k", fetch), "stale")
+        self.assertEqual(cache.get_or_fetch("k", lambda: "fresh"), "fresh")
+        self.assertEqual(cache.get_or_fetch("k", lambda: "refetched"), "fresh")
+
+    def test_invalidate_drops_only_matching_paths(self):
+        cache = ResponseCache()
+        cache.get_or_fetch(("/api/sessions", ""), lambda: "list")
+        cache.get_or_fetch(("/api/sessions/7", ""), lambda: "seven")
+        cache.get_or_fetch(("/api/sources", ""), lambda: "sources")
+        cache.invalidate(gui_server._session_paths("7"))
+        self.assertEqual(cache.get_or_fetch(("/api/sessions", ""), lambda: "new list"), "new list")
+        self.assertEqual(cache.get_or_fetch(("/api/sessions/7", ""), lambda: "new seven"), "new seven")
+        self.assertEqual(cache.get_or_fetch(("/api/sources", ""), lambda: "new sources"), "sources")
+
+
+class InitTest(GuiServerTestCase):
+    def test_new_key_swaps_the_client_without_closing_the_old_one(self):
+        self.assertIn(b'"id":"1"', self.get("/api/sessions/1"))
+        environ = {"JULES_API_BASE_URL": mock_jules_api.base_url(self.api_server)}
+        with mock.patch.dict(os.environ, environ), \
+                mock.patch.object(self.client, "close") as close, \
+                mock.patch.object(gui_server, "JulesClient", wraps=JulesClient) as constructor:
+            response = self.post("/api/init", {"apiKey": "k2"})
+        self.assertIn(b'"initialized"', response)
+        # Sized like create_server's client; the old one may still be serving feeds
+        constructor.assert_called_once_with("k2", pool_maxsize=self.server.max_workers)
+        close.assert_not_called()
+        new_client = self.handler.client
+        self.assertIsNot(new_client, self.client)
+        self.addCleanup(new_client.close)
+        self.assertEqual(new_client.api_key, "k2")
+        self.assertEqual(self.client.get_session("1")["id"], "1")
+
+        # Cached reads from the old key are dropped
+        requests_made = self.api_server.api.requests
+        self.assertIn(b'"id":"1"', self.get("/api/sessions/1"))
+        self.assertEqual(self.api_server.api.requests, requests_made + 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
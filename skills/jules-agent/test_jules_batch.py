@@ -0,0 +1,62 @@
+"""Unit tests for jules_batch manifest parsing and batch-create resumption.
+
+Run with ``python -m unittest`` from this directory (``make test`` runs them too).
+"""
+import os
+import tempfile
+import threading
+import unittest
+
+import mock_jules_api
+from jules_batch import append_result, completed_keys, create_sessions, load_manifest, spec_prompt
+from jules_client import JulesClient
+
+
+class LoadManifestTest(unittest.TestCase):
+    def write(self, text: str) -> str:
+        path = os.path.join(tempfile.mkdtemp(), "manifest.jsonl")
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def test_title_only_spec_is_accepted(self):
+        specs = load_manifest(self.write('{"title": "Fix the flaky test"}\n\n{"body": "Details"}\n'))
+        self.assertEqual([spec_prompt(spec) for spec in specs], ["Fix the flaky test", "Details"])
+
+    def test_spec_without_any_prompt_is_rejected(self):
+        path = self.write('{"prompt": "ok"}\n{"title": "", "repo": "org/repo"}\n')
+        with self.assertRaisesRegex(ValueError, "spec 2 needs a 'prompt'"):
+            load_manifest(path)
+
+
+class ResumeTest(unittest.TestCase):
+    def setUp(self):
+        self.api_server = mock_jules_api.create_mock_server(port=0, sessions=0, sources=1)
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        self.client = JulesClient("k", requests_per_second=None)
+        self.client.base_url = mock_jules_api.base_url(self.api_server)
+        self.results = os.path.join(tempfile.mkdtemp(), "manifest.results.jsonl")
+
+    def tearDown(self):
+        self.client.close()
+        self.api_server.shutdown()
+        self.api_server.server_close()
+
+    def run_batch(self, specs, defaults):
+        return create_sessions(self.client, specs, requests_per_second=1000, defaults=defaults,
+                               skip=completed_keys(self.results), on_result=append_result(self.results))
+
+    def test_rerun_with_changed_defaults_skips_created_specs(self):
+        specs = [{"id": "fix-login", "prompt": "Fix the login"}, {"prompt": "Add a changelog"},
+                 {"title": "Bump deps", "branch": "release"}]
+        first = self.run_batch(specs, {"branch": "main"})
+        self.assertEqual([result["status"] for result in first], ["created"] * 3)
+
+        second = self.run_batch(specs, {"branch": "develop", "auto_pr": True, "require_approval": True})
+        self.assertEqual([result["status"] for result in second], ["skipped"] * 3)
+        self.assertEqual([result["key"] for result in second], [result["key"] for result in first])
+        self.assertEqual(len(self.api_server.api.sessions), 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
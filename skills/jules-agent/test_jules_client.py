@@ -0,0 +1,381 @@
+"""Unit tests for jules_client: the shared request layer (RetryPolicy,
+CircuitBreaker, RateLimiter), poll decisions, the source index and atomic
+cache writes.
+
+Run with ``python -m unittest`` from this directory (``make test`` runs them too).
+"""
+import asyncio
+import contextlib
+import io
+import json
+import os
+import socket
+import stat
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import unittest
+from unittest import mock
+
+import requests
+
+import jules_client
+import mock_jules_api
+from jules_client import (ApiRequest, CircuitBreaker, CircuitOpenError, ClientDisconnected, JulesClient, PollState,
+                          RateLimiter, RecordWriter, RetryPolicy, SessionPoller, SourceIndex, atomic_open,
+                          atomic_write_json)
+
+GET = ApiRequest("GET", "sessions/1", "Error")
+POST = ApiRequest("POST", "sessions", "Error")
+IDEMPOTENT_POST = ApiRequest("POST", "sessions/1:approvePlan", "Error", idempotent=True)
+
+
+class RetryPolicyTest(unittest.TestCase):
+    def test_reads_retry_on_transient_statuses_only(self):
+        policy = RetryPolicy(max_retries=3)
+        for status in (429, 500, 502, 503, 504):
+            self.assertTrue(policy.should_retry(GET, 0, status))
+        for status in (400, 401, 403, 404):
+            self.assertFalse(policy.should_retry(GET, 0, status))
+
+    def test_writes_retry_only_when_the_api_cannot_have_acted(self):
+        policy = RetryPolicy()
+        self.assertTrue(policy.should_retry(POST, 0, 429))
+        self.assertFalse(policy.should_retry(POST, 0, 503))
+        self.assertFalse(policy.should_retry(POST, 0, None))
+        self.assertTrue(policy.should_retry(POST, 0, None, connect_failed=True))
+        self.assertTrue(policy.should_retry(IDEMPOTENT_POST, 0, 503))
+
+    def test_stops_after_max_retries(self):
+        policy = RetryPolicy(max_retries=2)
+        self.assertTrue(policy.should_retry(GET, 1, 503))
+        self.assertFalse(policy.should_retry(GET, 2, 503))
+
+    def test_delay_honours_retry_after_up_to_max_delay(self):
+        policy = RetryPolicy(base_delay=0.5, max_delay=10)
+        self.assertEqual(policy.delay(0, retry_after=3), 3)
+        self.assertEqual(policy.delay(0, retry_after=60), 10)
+        for attempt in range(6):
+            self.assertLessEqual(policy.delay(attempt), min(10, 0.5 * 2 ** attempt))
+
+
+class CircuitBreakerTest(unittest.TestCase):
+    def open_breaker(self, reset_timeout=0.0):
+        breaker = CircuitBreaker(failure_threshold=2, reset_timeout=reset_timeout)
+        for _ in range(2):
+            breaker.release(breaker.before_request())
+            breaker.record(False)
+        return breaker
+
+    def test_opens_after_threshold_and_fails_fast(self):
+        breaker = self.open_breaker(reset_timeout=60)
+        self.assertEqual(breaker.state, "open")
+        with self.assertRaises(CircuitOpenError) as caught:
+            breaker.before_request()
+        self.assertGreater(caught.exception.retry_in, 0)
+
+    def test_half_open_admits_one_trial(self):
+        breaker = self.open_breaker()
+        trial = breaker.before_request()
+        self.assertIsNotNone(trial)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+        breaker.record(True)
+        breaker.release(trial)
+        self.assertEqual(breaker.state, "closed")
+        self.assertIsNone(breaker.before_request())
+
+    def test_failed_trial_reopens(self):
+        breaker = self.open_breaker(reset_timeout=0.05)
+        time.sleep(0.06)
+        trial = breaker.before_request()
+        breaker.record(False)
+        breaker.release(trial)
+        self.assertEqual(breaker.state, "open")
+
+    def test_released_trial_without_outcome_frees_the_slot(self):
+        breaker = self.open_breaker()
+        breaker.release(breaker.before_request())
+        self.assertIsNotNone(breaker.before_request())
+
+    def test_stale_release_does_not_free_a_newer_trial(self):
+        breaker = self.open_breaker()
+        first = breaker.before_request()
+        breaker.release(first)
+        breaker.before_request()
+        breaker.release(first)
+        with self.assertRaises(CircuitOpenError):
+            breaker.before_request()
+
+    def test_interrupted_sync_trial_is_released(self):
+        client = JulesClient("k", requests_per_second=None, circuit_breaker=self.open_breaker())
+        try:
+            with mock.patch.object(client.session, "request", side_effect=KeyboardInterrupt):
+                with self.assertRaises(KeyboardInterrupt):
+                    client._send(GET, report=False)
+            response = requests.Response()
+            response.status_code = 200
+            response._content = b"{}"
+            with mock.patch.object(client.session, "request", return_value=response):
+                self.assertIs(client._send(GET, report=False), response)
+            self.assertEqual(client.circuit_breaker.state, "closed")
+        finally:
+            client.close()
+
+    def test_cancelled_async_trial_is_released(self):
+        from jules_async import AsyncJulesClient
+
+        async def scenario():
+            async with AsyncJulesClient("k", requests_per_second=None, circuit_breaker=self.open_breaker()) as client:
+                async def hang(*args, **kwargs):
+                    await asyncio.sleep(60)
+
+                with mock.patch.object(client.http, "request", side_effect=hang):
+                    task = asyncio.ensure_future(client._send(GET, report=False))
+                    await asyncio.sleep(0.01)
+                    task.cancel()
+                    with self.assertRaises(asyncio.CancelledError):
+                        await task
+                # The next call is let through as the new trial instead of failing fast
+                self.assertIsNotNone(client.circuit_breaker.before_request())
+
+        asyncio.run(scenario())
+
+
+class RateLimiterTest(unittest.TestCase):
+    def test_burst_is_free_then_callers_queue(self):
+        limiter = RateLimiter(rate=10, burst=3)
+        self.assertEqual([limiter.reserve() for _ in range(3)], [0.0, 0.0, 0.0])
+        first, second = limiter.reserve(), limiter.reserve()
+        self.assertAlmostEqual(first, 0.1, delta=0.02)
+        self.assertAlmostEqual(second, 0.2, delta=0.02)
+
+    def test_tokens_refill_over_time(self):
+        limiter = RateLimiter(rate=100, burst=1)
+        limiter.reserve()
+        time.sleep(0.02)
+        self.assertEqual(limiter.reserve(), 0.0)
+
+
+class PollStateTest(unittest.TestCase):
+    def test_unchanged_session_skips_the_activities_fetch(self):
+        poll = PollState("1")
+        session = {"state": "IN_PROGRESS", "updateTime": "2025-01-01T00:00:00Z"}
+        self.assertTrue(poll.should_fetch(session))
+        poll.fetched()
+        poll.finish([], True, 0.01)
+        self.assertFalse(poll.should_fetch(session))
+        self.assertEqual(poll.scheduler.stats["activity_fetches_skipped"], 1)
+
+    def test_failed_fetch_is_repeated_counted_and_throttled(self):
+        poll = PollState("1")
+        session = {"state": "IN_PROGRESS", "updateTime": "2025-01-01T00:00:00Z"}
+        poll.should_fetch(session)
+        error = Exception("slow down")
+        poll.fetch_failed(error, mock.Mock(status_code=429, headers={"Retry-After": "7"}))
+        self.assertIs(poll.last_error, error)
+        self.assertEqual((poll.scheduler.stats["errors"], poll.scheduler.stats["throttled"]), (1, 1))
+        self.assertGreaterEqual(poll.scheduler.next_delay(), 6)
+        self.assertTrue(poll.should_fetch(session))
+        self.assertIsNone(poll.last_error)
+
+    def test_async_poller_counts_throttled_activity_fetches(self):
+        import httpx
+        from jules_async import AsyncJulesClient
+
+        calls = {"activities": 0}
+
+        def handler(request):
+            if request.url.path.endswith("/activities"):
+                calls["activities"] += 1
+                if calls["activities"] == 1:
+                    return httpx.Response(429, headers={"Retry-After": "0"})
+                return httpx.Response(200, json={"activities": [
+                    {"id": "a1", "createTime": "2025-01-01T00:00:01Z"}]})
+            return httpx.Response(200, json={"state": "COMPLETED" if calls["activities"] > 1 else "IN_PROGRESS",
+                                             "updateTime": "2025-01-01T00:00:00Z"})
+
+        async def scenario():
+            async with AsyncJulesClient("k", requests_per_second=None,
+                                        retry_policy=RetryPolicy(max_retries=0)) as client:
+                await client.http.aclose()
+                client.http = httpx.AsyncClient(transport=httpx.MockTransport(handler))
+                poll = PollState("1", min_interval=0.01, max_interval=0.01)
+                activities = [activity async for activity in client.poll_session("1", timeout=5, poll=poll)]
+                return activities, poll
+
+        activities, poll = asyncio.run(scenario())
+        self.assertEqual([activity["id"] for activity in activities], ["a1"])
+        self.assertEqual(poll.scheduler.stats["errors"], 1)
+        self.assertEqual(poll.scheduler.stats["throttled"], 1)
+        self.assertEqual(poll.state, "COMPLETED")
+
+
+class WatchSessionsTest(unittest.TestCase):
+    def test_each_session_is_polled_once_whatever_the_id_form(self):
+        polled = []
+
+        def tick(poller):
+            polled.append(poller.session_name)
+            poller.state = "COMPLETED"
+            return []
+
+        client = JulesClient("k", requests_per_second=None)
+        try:
+            with mock.patch.object(SessionPoller, "tick", tick), contextlib.redirect_stdout(io.StringIO()):
+                states = client.watch_sessions(["1", "sessions/1", "2"], plain=True, timeout=5)
+        finally:
+            client.close()
+        self.assertEqual(sorted(polled), ["sessions/1", "sessions/2"])
+        self.assertEqual(states, {"sessions/1": "COMPLETED", "sessions/2": "COMPLETED"})
+
+
+class RecordWriterTest(unittest.TestCase):
+    def test_fields_project_records_but_not_summaries(self):
+        out = io.StringIO()
+        writer = RecordWriter(fields=["id"])
+        with contextlib.redirect_stdout(out):
+            writer.emit("session", {"id": "1", "state": "COMPLETED"})
+            writer.emit("summary", {"states": {"1": "COMPLETED"}})
+        self.assertEqual([json.loads(line) for line in out.getvalue().splitlines()], [
+            {"type": "session", "id": "1"},
+            {"type": "summary", "states": {"1": "COMPLETED"}},
+        ])
+
+
+class SourceIndexTest(unittest.TestCase):
+    def setUp(self):
+        self.path = os.path.join(tempfile.mkdtemp(), "sources.json")
+        # repo1 is listed first, but hash order of the names used to decide partial matches
+        self.sources = [{"name": f"sources/github/org/repo{n}", "githubRepo": {"owner": "org", "repo": f"repo{n}"}}
+                        for n in (15, 1, 109, 150, 121)]
+
+    def test_partial_names_resolve_in_api_order(self):
+        index = SourceIndex(self.path)
+        index.replace(self.sources)
+        self.assertEqual(index.lookup("repo1"), "sources/github/org/repo1")
+        self.assertEqual(index.lookup("po1"), "sources/github/org/repo15")
+        self.assertEqual(SourceIndex(self.path).lookup("po1"), "sources/github/org/repo15")
+
+    def test_repo_tail_beats_substring(self):
+        index = SourceIndex(self.path)
+        index.replace(list(reversed(self.sources)))
+        self.assertEqual(index.lookup("REPO1"), "sources/github/org/repo1")
+        self.assertEqual(index.lookup("org/repo1"), "sources/github/org/repo1")
+
+
+class AtomicWriteTest(unittest.TestCase):
+    def test_concurrent_writers_in_one_process(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "sub", "state.json")
+        results = []
+        threads = [threading.Thread(target=lambda n=n: results.append(atomic_write_json(path, {"n": n, "pad": "x" * 50000})))
+                   for n in range(16)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(results, [True] * 16)
+        with open(path) as f:
+            self.assertIn(json.load(f)["n"], range(16))
+        self.assertEqual(os.listdir(os.path.dirname(path)), ["state.json"])
+
+    def test_failed_block_leaves_nothing_behind(self):
+        directory = tempfile.mkdtemp()
+        path = os.path.join(directory, "state.json")
+        with self.assertRaises(ValueError):
+            with atomic_open(path) as f:
+                f.write("partial")
+                raise ValueError
+        self.assertEqual(os.listdir(directory), [])
+
+    def test_unwritable_path_returns_false(self):
+        blocker = os.path.join(tempfile.mkdtemp(), "file")
+        open(blocker, "w").close()
+        self.assertFalse(atomic_write_json(os.path.join(blocker, "state.json"), {}))
+
+
+
+class CancellationTest(unittest.TestCase):
+    def tearDown(self):
+        jules_client._command.cancel = None
+
+    def test_pause_wakes_when_the_command_is_cancelled(self):
+        cancel = threading.Event()
+        jules_client._command.cancel = cancel
+        threading.Timer(0.05, cancel.set).start()
+        started = time.monotonic()
+        with self.assertRaises(ClientDisconnected):
+            jules_client._pause(30)
+        self.assertLess(time.monotonic() - started, 5)
+
+    def test_pause_sleeps_outside_the_daemon(self):
+        jules_client._pause(0.01)
+
+
+class DaemonTest(unittest.TestCase):
+    """Runs ``jules_client.py daemon`` against an in-process mock API."""
+
+    def setUp(self):
+        self.api_server = mock_jules_api.create_mock_server(port=0, sessions=1, activities=200, growth=0.2)
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        self.directory = tempfile.mkdtemp()
+        self.socket_path = os.path.join(self.directory, "daemon.sock")
+        env = dict(os.environ, JULES_API_BASE_URL=mock_jules_api.base_url(self.api_server), JULES_API_KEY="k",
+                   JULES_CACHE_DIR=self.directory, JULES_DAEMON_SOCKET=self.socket_path)
+        self.daemon = subprocess.Popen([sys.executable, "jules_client.py", "daemon"], env=env,
+                                       stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+        deadline = time.monotonic() + 20
+        while not os.path.exists(self.socket_path):
+            self.assertLess(time.monotonic(), deadline, "daemon did not start")
+            time.sleep(0.05)
+
+    def tearDown(self):
+        self.daemon.terminate()
+        self.daemon.wait(10)
+        self.api_server.shutdown()
+        self.api_server.server_close()
+
+    def send(self, argv):
+        conn = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        conn.connect(self.socket_path)
+        conn.sendall((json.dumps({"argv": argv, "cwd": self.directory, "apiKey": "k"}) + "\n").encode("utf-8"))
+        return conn
+
+    def test_socket_is_owner_only(self):
+        self.assertEqual(stat.S_IMODE(os.stat(self.socket_path).st_mode), 0o600)
+
+    def test_disconnect_stops_the_command_and_saves_its_checkpoint(self):
+        session = JulesClient("k", requests_per_second=None)
+        session.base_url = mock_jules_api.base_url(self.api_server)
+        session_id = session.create_session("grow")["name"].split("/")[-1]
+        session.close()
+
+        # One activity every 5s: between them the command only waits, printing nothing
+        conn = self.send(["follow", "--session-id", session_id, "--plain", "--poll-min", "0.2", "--poll-max", "0.2"])
+        reader = conn.makefile("rb")
+        self.assertIn("Following session", json.loads(reader.readline())["out"])
+        time.sleep(0.5)
+        reader.close()
+        conn.close()
+
+        # The poll wait is cut short once the daemon sees EOF
+        time.sleep(1.0)
+        requests_after_stop = self.api_server.api.requests
+        time.sleep(1.0)
+        self.assertEqual(self.api_server.api.requests, requests_after_stop)
+        checkpoint = os.path.join(self.directory, f"checkpoints-{jules_client.account_key('k')}", f"{session_id}.json")
+        with open(checkpoint) as f:
+            self.assertEqual(json.load(f)["state"], "IN_PROGRESS")
+
+        # The daemon keeps serving other commands
+        conn = self.send(["get-session", "--session-id", session_id, "--plain"])
+        with conn, conn.makefile("rb") as reader:
+            replies = [json.loads(line) for line in reader]
+        self.assertEqual(replies[-1], {"exit": 0})
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,96 @@
+"""Unit tests for jules_context: budget truncation, dedup, glob filtering and the pack cache."""
+import os
+import tempfile
+import unittest
+from unittest import mock
+
+import jules_context
+from jules_context import TRUNCATED_NOTE, pack_context
+
+LICENSE = "\n".join(f"# Copyright line {n}: permission is granted to use, copy and modify this file." for n in range(4))
+
+
+class PackContextTest(unittest.TestCase):
+    def setUp(self):
+        self.base = tempfile.mkdtemp()
+        environ = mock.patch.dict(os.environ, {"JULES_CACHE_DIR": tempfile.mkdtemp()})
+        environ.start()
+        self.addCleanup(environ.stop)
+
+    def write(self, name: str, text: str) -> str:
+        path = os.path.join(self.base, name)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(text)
+        return path
+
+    def pack(self, specs, **kwargs):
+        kwargs.setdefault("use_cache", False)
+        return pack_context(specs, base=self.base, **kwargs)
+
+    def test_truncates_to_the_budget_and_omits_the_rest(self):
+        self.write("big.txt", "".join(f"line {n}\n" for n in range(2000)))
+        self.write("small.txt", "small\n")
+        packed = self.pack(["big.txt", "small.txt"], max_bytes=2000)
+        self.assertLessEqual(len(packed.text.encode("utf-8")), 2000)
+        self.assertIn(TRUNCATED_NOTE.strip(), packed.text)
+        self.assertEqual(packed.truncated, ["big.txt"])
+        self.assertEqual(packed.omitted, ["small.txt"])
+
+    def test_repeated_blocks_and_files_are_sent_once(self):
+        self.write("a.py", f"{LICENSE}\n\nprint('a')\n")
+        self.write("b.py", f"{LICENSE}\n\nprint('b')\n")
+        self.write("c.py", f"{LICENSE}\n\nprint('a')\n")
+        packed = self.pack(["a.py", "b.py", "c.py"])
+        self.assertEqual(packed.text.count("Copyright line 0"), 1)
+        self.assertIn("--- b.py ---\n[... same block as in a.py ...]\n\nprint('b')", packed.text)
+        self.assertIn("--- c.py ---\n[identical to a.py]", packed.text)
+
+    def test_nothing_refers_to_text_that_was_truncated_away(self):
+        # The cut lands in indentation, so stripping it leaves budget for the next files
+        text = "head\n" + " " * 3000 + "x\n\n" + LICENSE + "\n"
+        self.write("a.txt", text)
+        self.write("b.txt", f"{LICENSE}\n\ntail\n")
+        self.write("a-copy.txt", text)
+        packed = self.pack(["a.txt", "b.txt", "a-copy.txt"], max_bytes=1500)
+        self.assertEqual(packed.truncated[0], "a.txt")
+        self.assertNotIn("same block as in a.txt", packed.text)
+        self.assertNotIn("[identical to a.txt]", packed.text)
+        self.assertIn("--- b.txt ---\n# Copyright line 0", packed.text)
+
+    def test_glob_skips_vendored_directories_unless_named(self):
+        self.write("src/app.js", "app\n")
+        self.write("node_modules/lib/index.js", "lib\n")
+        self.assertEqual(self.pack(["**/*.js"]).included, ["src/app.js"])
+        self.assertEqual(self.pack(["node_modules/**/*.js"]).included, ["node_modules/lib/index.js"])
+
+    def test_cache_reuses_a_bundle_until_an_input_changes(self):
+        path = self.write("notes.md", "first\n")
+        self.assertFalse(self.pack(["notes.md"], use_cache=True).cached)
+        self.assertTrue(self.pack(["notes.md"], use_cache=True).cached)
+        with open(path, "a") as f:
+            f.write("second\n")
+        packed = self.pack(["notes.md"], use_cache=True)
+        self.assertFalse(packed.cached)
+        self.assertIn("second", packed.text)
+
+    def test_cache_keeps_only_the_most_recently_used_bundles(self):
+        path = self.write("notes.md", "notes\n")
+
+        def bundle(max_bytes):
+            return jules_context._cache_path(jules_context._fingerprint([path], max_bytes, self.base))
+
+        with mock.patch.object(jules_context, "MAX_CACHED_PACKS", 2):
+            self.pack(["notes.md"], max_bytes=1000, use_cache=True)
+            self.pack(["notes.md"], max_bytes=2000, use_cache=True)
+            os.utime(bundle(1000), (1, 1))
+            os.utime(bundle(2000), (2, 2))
+            # Using the older bundle again makes the other one the least recently used
+            self.assertTrue(self.pack(["notes.md"], max_bytes=1000, use_cache=True).cached)
+            self.pack(["notes.md"], max_bytes=3000, use_cache=True)
+        self.assertTrue(os.path.exists(bundle(1000)))
+        self.assertFalse(os.path.exists(bundle(2000)))
+        self.assertTrue(os.path.exists(bundle(3000)))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,118 @@
+"""Unit tests for jules_digest: run collapsing, budgeted rendering and the unchanged-session path."""
+import os
+import tempfile
+import threading
+import unittest
+
+import mock_jules_api
+from jules_client import JulesClient
+from jules_digest import SessionDigest, digest_session
+from jules_metrics import METRICS
+
+
+def progress(step, text):
+    return {"id": f"a{step}", "originator": "agent", "description": f"Step {step}: {text}",
+            "progressUpdated": {"title": f"Step {step}"}}
+
+
+class SessionDigestTest(unittest.TestCase):
+    def test_steps_that_differ_only_in_numbers_collapse_into_one_run(self):
+        digest = SessionDigest("7")
+        for step, text in enumerate(["ran tests"] * 3 + ["edited files"] + ["ran tests"] * 2, 1):
+            digest.add(progress(step, text))
+        self.assertEqual([(run["count"], run["text"]) for run in digest.runs],
+                         [(3, "Step 3: ran tests"), (1, "Step 4: edited files"), (2, "Step 6: ran tests")])
+        self.assertEqual((digest.total, digest.progress_updates, digest.latest_progress), (6, 6, "Step 6: ran tests"))
+        self.assertIn("- AGENT progressUpdated x3: Step 3: ran tests", digest.render())
+
+    def test_render_stays_within_budget_keeping_the_newest_runs(self):
+        digest = SessionDigest("7")
+        digest.update_session({"title": "Refactor the parser", "state": "IN_PROGRESS", "url": "https://jules/7"})
+        for step in range(60):
+            digest.add(progress(step, "edited files" if step % 2 else "ran tests"))
+
+        self.assertNotIn("omitted", digest.render(max_chars=10000))
+        for budget in (200, 400, 800):
+            text = digest.render(max_chars=budget)
+            self.assertLessEqual(len(text), budget)
+            self.assertTrue(text.startswith("Session 7: Refactor the parser [IN_PROGRESS]"))
+        # Runs are printed oldest first, ending with the newest, after a count of those left out
+        text = digest.render(max_chars=800)
+        self.assertIn("Recent activity:\n- (47 earlier runs omitted)\n- AGENT progressUpdated: Step 47:", text)
+        self.assertTrue(text.endswith("- AGENT progressUpdated: Step 59: edited files"))
+        self.assertTrue(digest.render(max_chars=400).endswith("- AGENT progressUpdated: Step 59: edited files"))
+
+    def test_sections_fill_in_priority_order(self):
+        digest = SessionDigest("7")
+        digest.add({"id": "p", "originator": "agent", "planGenerated": {"plan": {"steps": [
+            {"title": f"Plan step {n} with a fairly long description"} for n in range(8)]}}})
+        for step in range(20):
+            digest.add(progress(step, "ran tests"))
+        self.assertIn("8. Plan step 7", digest.render(max_chars=10000))
+
+        # The plan gets what fits before progress and recent activity do
+        text = digest.render(max_chars=200)
+        self.assertLessEqual(len(text), 200)
+        self.assertIn("Plan (8 steps, awaiting approval):\n1. Plan step 0", text)
+        self.assertNotIn("8. Plan step 7", text)
+        self.assertNotIn("Recent activity:", text)
+
+    def test_folded_state_survives_a_save_and_load(self):
+        path = os.path.join(tempfile.mkdtemp(), "digest.json")
+        digest = SessionDigest("7")
+        for step in range(5):
+            digest.add(progress(step, "ran tests"))
+        digest.cursor.accept({"id": "a4", "createTime": "2025-01-01T00:00:04Z"})
+        digest.save(path)
+        loaded = SessionDigest.load(path, "7")
+        self.assertEqual(loaded.render(), digest.render())
+        self.assertEqual(loaded.cursor.create_time, "2025-01-01T00:00:04Z")
+
+
+class DigestSessionTest(unittest.TestCase):
+    def setUp(self):
+        self.api_server = mock_jules_api.create_mock_server(port=0, sessions=1, activities=20)
+        self.api = self.api_server.api
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        self.client = JulesClient("k", requests_per_second=None)
+        self.client.base_url = mock_jules_api.base_url(self.api_server)
+        self.path = os.path.join(tempfile.mkdtemp(), "digest.json")
+
+    def tearDown(self):
+        self.client.close()
+        self.api_server.shutdown()
+        self.api_server.server_close()
+
+    def digest(self, **kwargs):
+        requests_before = self.api.requests
+        text = digest_session(self.client, "1", path=self.path, **kwargs)
+        return text, self.api.requests - requests_before
+
+    def cache_hits(self):
+        return METRICS.counters.get(("jules_cache_requests_total", (("cache", "digest"), ("result", "hit"))), 0)
+
+    def test_unchanged_session_costs_one_get_and_reuses_the_rendered_text(self):
+        first, requests_made = self.digest()
+        self.assertIn("Activities: 20 (agent 20)", first)
+        self.assertGreater(requests_made, 1)
+
+        hits = self.cache_hits()
+        second, requests_made = self.digest()
+        self.assertEqual((second, requests_made), (first, 1))
+        self.assertEqual(self.cache_hits(), hits + 1)
+
+        # A new budget re-renders the cached state without fetching activities
+        short, requests_made = self.digest(max_chars=300)
+        self.assertLessEqual(len(short), 300)
+        self.assertEqual(requests_made, 1)
+
+    def test_changed_session_fetches_only_new_activities(self):
+        self.digest()
+        self.api.sessions["1"].target = 25
+        text, _ = self.digest()
+        self.assertIn("Activities: 25 (agent 25)", text)
+        self.assertEqual(SessionDigest.load(self.path, "1").total, 25)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,79 @@
+"""Unit tests for jules_metrics: summaries and per-command scopes.
+
+Run with ``python -m unittest`` from this directory (``make test`` runs them too).
+"""
+import threading
+import unittest
+from concurrent.futures import ThreadPoolExecutor
+
+from jules_metrics import Metrics, in_scope
+
+
+class SummarySinceTest(unittest.TestCase):
+    def test_summary_since_snapshot_covers_only_later_events(self):
+        metrics = Metrics()
+        metrics.record_request("GET", "sessions/1", 0.002, 200, size=2048)
+        metrics.cache("sources", True)
+        baseline = metrics.snapshot()
+        metrics.record_request("GET", "sessions/2", 0.2, 200, size=1024)
+        metrics.record_request("GET", "sources", 0.02, 503, attempt=1)
+        metrics.cache("sources", False)
+
+        self.assertEqual(metrics.summary(since=baseline), [
+            "GET sessions/{id}: 1 requests, avg 200.0ms, p50 <=250ms, p95 <=250ms, 1.0 KiB, 0 retries, 0 errors",
+            "GET sources: 1 requests, avg 20.0ms, p50 <=25ms, p95 <=25ms, 0.0 KiB, 1 retries, 0 errors",
+            "cache sources: 0 hits, 1 misses (0% hit ratio)",
+        ])
+        self.assertIn("GET sessions/{id}: 2 requests", metrics.summary()[0])
+
+    def test_nothing_since_snapshot_is_empty(self):
+        metrics = Metrics()
+        metrics.record_request("GET", "sessions/1", 0.002, 200)
+        self.assertEqual(metrics.summary(since=metrics.snapshot()), [])
+
+
+class ScopeTest(unittest.TestCase):
+    def requests_in(self, metrics):
+        return sorted(dict(labels)["endpoint"] for (name, labels) in metrics.counters
+                      if name == "jules_api_requests_total")
+
+    def test_concurrent_commands_only_see_their_own_requests(self):
+        metrics = Metrics()
+        both_started = threading.Barrier(2)
+        scopes = {}
+
+        def command(session):
+            scoped = metrics.start_scope()
+            both_started.wait(5)
+            metrics.record_request("GET", f"sessions/{session}", 0.01, 200)
+            metrics.record_request("GET", "sources", 0.01, 200)
+            both_started.wait(5)
+            metrics.stop_scope(scoped)
+            scopes[session] = scoped
+
+        threads = [threading.Thread(target=command, args=(session,)) for session in ("1", "2:approvePlan")]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(5)
+        self.assertEqual(self.requests_in(scopes["1"]), ["GET sessions/{id}", "GET sources"])
+        self.assertEqual(self.requests_in(scopes["2:approvePlan"]), ["GET sessions/{id}:approvePlan", "GET sources"])
+        self.assertIn("GET sources: 1 requests", scopes["1"].summary()[1])
+        self.assertIn("GET sources: 2 requests", metrics.summary()[2])
+
+    def test_pool_work_joins_the_scope_only_when_wrapped(self):
+        metrics = Metrics()
+        scoped = metrics.start_scope()
+        record = lambda path: metrics.record_request("GET", path, 0.01, 200)
+        with ThreadPoolExecutor(max_workers=2) as pool:
+            pool.submit(in_scope(record), "sessions").result()
+            pool.submit(record, "sources").result()
+        metrics.stop_scope(scoped)
+        record("sessions/1")
+
+        self.assertEqual(self.requests_in(scoped), ["GET sessions"])
+        self.assertEqual(self.requests_in(metrics), ["GET sessions", "GET sessions/{id}", "GET sources"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,125 @@
+"""Unit tests for jules_outputs: patch stats and incremental downloads."""
+import os
+import shutil
+import subprocess
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import jules_outputs
+import mock_jules_api
+from jules_client import JulesClient
+from jules_outputs import PatchStats, download_outputs
+
+DIFF = (
+    "diff --git a/app.py b/app.py\n"
+    "--- a/app.py\n"
+    "+++ b/app.py\n"
+    "@@ -1,2 +1,2 @@\n"
+    "--- not a header\n"
+    "+x = {n}\n"
+    " y = 1\n"
+)
+
+
+def activity(n, second):
+    return {"id": f"a{n}", "createTime": f"2025-01-01T00:00:{second:02d}Z",
+            "artifacts": [{"changeSet": {"source": "sources/github/o/r",
+                                         "gitPatch": {"unidiffPatch": DIFF.format(n=n),
+                                                      "suggestedCommitMessage": f"Step {n}"}}}]}
+
+
+class FakeClient:
+    api_key = "k"
+
+    def __init__(self, activities):
+        self.activities = activities
+
+    def get_session(self, name):
+        return {"name": name, "state": "COMPLETED", "outputs": []}
+
+    def iter_activities(self, name, page_size=50, create_time=None):
+        return iter(self.activities)
+
+
+class PatchStatsTest(unittest.TestCase):
+    def test_removed_line_starting_with_dashes_is_not_a_header(self):
+        stats = PatchStats()
+        for line in DIFF.format(n=1).splitlines(keepends=True):
+            stats.feed(line)
+        self.assertEqual(stats.files, [{"path": "app.py", "status": "modified", "added": 1, "removed": 1}])
+
+
+class DownloadOutputsTest(unittest.TestCase):
+    def setUp(self):
+        self.directory = tempfile.mkdtemp()
+
+    def test_out_of_order_activities_are_all_written(self):
+        client = FakeClient([activity(3, 30), activity(1, 10), activity(2, 20)])
+        index = download_outputs(client, "1", self.directory, page_size=2)
+        self.assertEqual(sorted(p["activity"] for p in index.patches), ["a1", "a2", "a3"])
+        self.assertEqual(index.cursor.create_time, "2025-01-01T00:00:30Z")
+        self.assertTrue(index.latest_patch().endswith("-a3.patch"))
+
+    def test_rerun_writes_nothing(self):
+        client = FakeClient([activity(1, 10), activity(2, 20)])
+        download_outputs(client, "1", self.directory)
+        with mock.patch.object(jules_outputs, "write_patch") as write_patch:
+            index = download_outputs(client, "1", self.directory)
+        write_patch.assert_not_called()
+        self.assertEqual(index.new, [])
+        self.assertEqual(len(index.patches), 2)
+
+    def test_identical_patch_is_not_written_twice(self):
+        client = FakeClient([activity(1, 10), dict(activity(1, 20), id="a9")])
+        with mock.patch.object(jules_outputs, "write_patch", wraps=jules_outputs.write_patch) as write_patch:
+            index = download_outputs(client, "1", self.directory)
+        self.assertEqual(write_patch.call_count, 1)
+        self.assertEqual(len(index.patches), 1)
+
+    def test_patch_file_layout(self):
+        index = download_outputs(FakeClient([activity(1, 10)]), "1", self.directory)
+        with open(os.path.join(self.directory, index.patches[0]["file"])) as f:
+            text = f.read()
+        self.assertTrue(text.startswith("Subject: Step 1\n"))
+        self.assertIn("\n---\ndiff --git a/app.py b/app.py\n", text)
+
+
+@unittest.skipUnless(shutil.which("git"), "git is not installed")
+class GitApplyTest(unittest.TestCase):
+    def setUp(self):
+        self.api_server = mock_jules_api.create_mock_server(port=0, sessions=1, activities=15)
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        self.client = JulesClient("k", requests_per_second=None)
+        self.client.base_url = mock_jules_api.base_url(self.api_server)
+        self.repo = tempfile.mkdtemp()
+        os.makedirs(os.path.join(self.repo, "src"))
+        with open(os.path.join(self.repo, "src", "app.py"), "w") as f:
+            f.write("import os\nSTEP = 0\n\n")
+        self.git("init", "-q")
+
+    def tearDown(self):
+        self.client.close()
+        self.api_server.shutdown()
+        self.api_server.server_close()
+
+    def git(self, *args):
+        return subprocess.run(["git", *args], cwd=self.repo, capture_output=True, text=True)
+
+    def test_downloaded_patches_apply_with_git(self):
+        directory = tempfile.mkdtemp()
+        index = download_outputs(self.client, "1", directory)
+        self.assertEqual([p["activity"] for p in index.patches], ["a0", "a7", "a14"])
+        for patch in index.patches:
+            result = self.git("apply", "--check", os.path.join(directory, patch["file"]))
+            self.assertEqual(result.returncode, 0, result.stderr)
+
+        self.assertEqual(self.git("apply", index.latest_patch()).returncode, 0)
+        with open(os.path.join(self.repo, "src", "app.py")) as f:
+            self.assertEqual(f.read(), "import os\nSTEP = 14\nDEBUG = False\n\n")
+        self.assertTrue(os.path.exists(os.path.join(self.repo, "tests", "test_step14.py")))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,139 @@
+"""Unit tests for jules_store: incremental sync, search and the CLI's local reads and write-through."""
+import contextlib
+import io
+import json
+import os
+import tempfile
+import threading
+import unittest
+from unittest import mock
+
+import jules_client
+import jules_store
+import mock_jules_api
+from jules_client import JulesClient
+from jules_store import JulesStore, default_store_path, sync
+
+
+class StoreTestCase(unittest.TestCase):
+    """A temp-dir store and cache dir, synced from an in-process mock API."""
+
+    def setUp(self):
+        self.api_server = mock_jules_api.create_mock_server(port=0, sessions=3, activities=20, sources=2)
+        self.api = self.api_server.api
+        threading.Thread(target=self.api_server.serve_forever, daemon=True).start()
+        self.directory = tempfile.mkdtemp()
+        environ = mock.patch.dict(os.environ, {"JULES_API_BASE_URL": mock_jules_api.base_url(self.api_server),
+                                               "JULES_CACHE_DIR": self.directory})
+        environ.start()
+        self.addCleanup(environ.stop)
+        self.client = JulesClient("k", requests_per_second=None)
+        self.store = JulesStore(default_store_path("k"))
+
+    def tearDown(self):
+        self.store.close()
+        self.client.close()
+        self.api_server.shutdown()
+        self.api_server.server_close()
+
+    def run_cli(self, *argv):
+        """Runs one command in-process; returns its jsonl records and the API requests it made."""
+        requests_before = self.api.requests
+        output = io.StringIO()
+        with contextlib.redirect_stdout(output):
+            jules_client.main(list(argv) + ["--api-key", "k", "--format", "jsonl"])
+        records = [json.loads(line) for line in output.getvalue().splitlines() if line.strip()]
+        return records, self.api.requests - requests_before
+
+
+class SyncTest(StoreTestCase):
+    def test_second_sync_only_lists_sessions(self):
+        stats = sync(self.client, self.store)
+        self.assertEqual((stats["sessions_synced"], stats["activities"]), (3, 60))
+
+        requests_before = self.api.requests
+        stats = sync(self.client, self.store)
+        self.assertEqual((stats["sessions_unchanged"], stats["activities"]), (3, 0))
+        self.assertEqual(self.api.requests - requests_before, 1)
+
+    def test_changed_session_fetches_only_new_activities(self):
+        sync(self.client, self.store)
+        self.api.sessions["2"].target = 25
+
+        stats = sync(self.client, self.store)
+        self.assertEqual((stats["sessions_synced"], stats["sessions_unchanged"], stats["activities"]), (1, 2, 5))
+        activities = self.store.list_activities("2")
+        self.assertEqual([a["id"] for a in activities], [f"a{index}" for index in range(25)])
+
+
+class SearchTest(StoreTestCase):
+    def setUp(self):
+        super().setUp()
+        sync(self.client, self.store)
+
+    def search_names(self, query, **kwargs):
+        return sorted(hit["name"] for hit in self.store.search(query, limit=100, **kwargs))
+
+    def test_fts_and_like_paths_find_the_same_documents(self):
+        self.assertTrue(self.store.fts)
+        edited = [f"sessions/{s}/activities/a{i}" for s in "123" for i in (0, 14, 7)]
+        self.assertEqual(self.search_names("edited files"), sorted(edited))
+        self.assertEqual(self.search_names("Step 7 edited", session_name="2"), ["sessions/2/activities/a7"])
+        self.assertEqual(self.search_names("Mock session 3"), ["sessions/3"])
+
+        self.store.fts = False # As on an SQLite built without FTS5
+        self.assertEqual(self.search_names("edited files"), sorted(edited))
+        self.assertEqual(self.search_names("Step 7 edited", session_name="2"), ["sessions/2/activities/a7"])
+        self.assertEqual(self.search_names("Mock session 3"), ["sessions/3"])
+
+    def test_raw_fts_queries_are_ranked_with_marked_snippets(self):
+        hits = self.store.search('"edited files" OR "ran the test"', raw=True, limit=100)
+        self.assertEqual(len(hits), 60)
+        self.assertTrue(all("[" in hit["snippet"] for hit in hits))
+        self.assertEqual(hits, sorted(hits, key=lambda hit: -hit["score"]))
+
+    def test_rows_stored_before_the_index_existed_are_backfilled(self):
+        self.store.conn.execute("DROP TABLE search_index")
+        self.store.close()
+        self.store = JulesStore(default_store_path("k"))
+        self.assertEqual(len(self.search_names("edited files")), 9)
+
+    def test_store_without_fts5_falls_back_to_like(self):
+        # As on an SQLite built without the fts5 module
+        with mock.patch.object(jules_store, "FTS_SCHEMA", "CREATE VIRTUAL TABLE search_index USING fts5_missing(x);"):
+            store = JulesStore(os.path.join(self.directory, "plain.db"))
+        self.addCleanup(store.close)
+        self.assertFalse(store.fts)
+        store.upsert_activities("4", [{"id": "x1", "description": "rebuilt the index"}])
+        self.assertEqual([hit["name"] for hit in store.search("index rebuilt")], ["sessions/4/activities/x1"])
+
+
+class LocalReadTest(StoreTestCase):
+    def test_local_and_max_age_reads_make_no_api_requests(self):
+        self.run_cli("sync")
+        records, requests_made = self.run_cli("list-sessions", "--local")
+        self.assertEqual(sorted(record["id"] for record in records), ["1", "2", "3"])
+        self.assertEqual(requests_made, 0)
+
+        records, requests_made = self.run_cli("list-activities", "--session-id", "1", "--max-age", "3600")
+        self.assertEqual(len(records), 20)
+        self.assertEqual(requests_made, 0)
+
+        _, requests_made = self.run_cli("list-sessions", "--max-age", "0")
+        self.assertEqual(requests_made, 1)
+
+    def test_fetched_activities_are_written_through(self):
+        self.run_cli("sync", "--session-id", "1")
+        self.assertEqual(self.store.list_activities("2"), [])
+
+        records, requests_made = self.run_cli("list-activities", "--session-id", "2", "--all")
+        self.assertEqual(len(records), 20)
+        self.assertGreater(requests_made, 0)
+
+        records, requests_made = self.run_cli("list-activities", "--session-id", "2", "--local")
+        self.assertEqual(len(records), 20)
+        self.assertEqual(requests_made, 0)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,29 @@
+import { spawnSync } from 'child_process';
+import path from 'path';
+import { fileURLToPath } from 'url';
+
+const JULES_DIR = path.resolve(path.dirname(fileURLToPath(import.meta.url)), '../../skills/jules-agent');
+
+function runPython(args) {
+  return spawnSync('python3', args, { cwd: JULES_DIR, encoding: 'utf-8', timeout: 120000 });
+}
+
+describe('jules-agent', () => {
+  test('--plain path does not import rich', () => {
+    const result = runPython(['bench_startup.py', '--json', '--no-timing']);
+
+    expect(result.error).toBeUndefined();
+    const report = JSON.parse(result.stdout);
+    expect(report.failures).toEqual([]);
+    expect(report.plain_imports_rich).toBe(false);
+    expect(result.status).toBe(0);
+  }, 120000);
+
+  test('python unit tests pass', () => {
+    const result = runPython(['-m', 'unittest', 'discover', '-p', 'test_*.py']);
+
+    expect(result.error).toBeUndefined();
+    expect(result.stderr).toMatch(/\nOK/);
+    expect(result.status).toBe(0);
+  }, 120000);
+});
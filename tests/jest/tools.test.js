@@ -33,6 +33,9 @@ describe('ToolRegistry', () => {
     expect(tools.make.run).toHaveBeenCalledWith('jules', expect.objectContaining({
       A: expect.stringContaining('send-message --plain')
     }));
+    expect(tools.make.run).toHaveBeenCalledWith('jules', expect.objectContaining({
+      A: expect.stringContaining('--format jsonl')
+    }));
     expect(tools.make.run).toHaveBeenCalledWith('jules', expect.objectContaining({
       A: expect.stringContaining('--session-id 123')
     }));